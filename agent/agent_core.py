@@ -1,6 +1,8 @@
 # agent/agent_core.py
 
 import asyncio
+import re
+import time
 from agent.memory_bus import MemoryBus
 from agent.command_router import CommandRouter
 from agent.session_state import SessionState
@@ -8,19 +10,24 @@ from llm.engine import LLMEngine
 from llm.prompt_builder import PromptBuilder
 from llm.model_selector import ModelSelector
 from utils.logger import log_event
+from utils.metrics import Metrics
 from config.settings import load_config
-from memory.behavior_analyzer import BehaviorAnalyzer
+from memory.rolling_summary import RollingSummarizer
+from memory.time_index import time_window_from_text
 
 # ✅ NEW MEMORY SYSTEM
 from memory.memory_manager import MemoryManager  # <-- Create this in next steps
 
+RECALL_CUE = re.compile(r"\b(discuss\w*|talk\w*|said|say|mention\w*|ask\w*|told|remember)\b", re.I)
+
 class AgentCore:
     def __init__(self, session: SessionState):
         self.session_state = session
         self.config = load_config()
 
         # Load model dynamically using selector
-        model = ModelSelector(self.config).get_active_model()
+        selector = ModelSelector(self.config)
+        model = selector.get_active_model()
 
         # Core components
         # self.memory = MemoryBus(self.config)
@@ -28,36 +35,129 @@ class AgentCore:
         self.memory_manager = MemoryManager(               # <-- ✅ NEW
             profile_path=self.config.get("profile_path", "data/profile.json"),
             log_dir=self.config.get("log_dir", "data/logs/"),
-            llm_engine=self.llm  # Pass the LLM engine
+            llm_engine=self.llm,  # Pass the LLM engine
+            fused_analysis=self.config.get("fused_analysis", False),
+            ingest_threshold_chars=self.config.get("ingest_threshold_chars", 4000),
+            vector_store_path=self.config.get("vector_store_path"),
+            lexical_index_path=self.config.get("lexical_index_path"),
+            memory_search_mode=self.config.get("memory_search_mode", "hybrid"),
+            dedup_consolidate_every=self.config.get("memory_dedup_consolidate_every", 200),
+            digest_path=self.config.get("memory_digest_path"),
+            digest_interval_s=self.config.get("memory_digest_interval_s", 3600),
+            backend_path=self.config.get("sqlite_backend_path"),
+            summary_mode=self.config.get("memory_summary_mode", "extractive"),
+            fact_rules_path=self.config.get("fact_rules_path", "config/fact_rules.yaml"),
+            behavior_prototypes_path=self.config.get("behavior_prototypes_path", "config/behavior_prototypes.yaml"),
+            vector_options={
+                "ann_min_size": self.config.get("vector_ann_min_size"),
+                "ann_n_probe": self.config.get("vector_ann_n_probe", 16),
+                "compression": self.config.get("vector_compression"),
+                "pca_components": self.config.get("vector_pca_components", 128),
+                "cache_size": self.config.get("embedding_cache_size", 0),
+                "cache_path": self.config.get("embedding_cache_path"),
+                "dedup_threshold": self.config.get("memory_dedup_threshold"),
+                "hot_capacity": self.config.get("memory_hot_capacity"),
+                "hot_cold_threshold": self.config.get("memory_hot_cold_threshold", 0.45),
+            }
             # ,
 
             # vector_memory=None  # <- placeholder, we'll implement in later steps
         )
-        self.router = CommandRouter()
-        self.behavior_analyzer = BehaviorAnalyzer(llm_engine=self.llm, max_history_messages=10)
-        self.prompt_builder = PromptBuilder(mode="default", model=model)
+        self.router = CommandRouter(self.config)
+        if self.config.get("semantic_routing", False):
+            self.router.enable_semantic_routing(self.memory_manager.vector.encode)
+        # Shared with MemoryManager, so both per-turn analyses hit the same classifier state
+        self.behavior_analyzer = self.memory_manager.behavior
+        self.prompt_builder = PromptBuilder(
+            mode="default",
+            model=model,
+            memory_token_budget=self.config.get("memory_token_budget", 300)
+        )
+
+        # Retrieval-augmented prompting (optional, bounded by a hard deadline)
+        self.retrieval_enabled = self.config.get("memory_retrieval", False)
+        self.retrieval_top_k = self.config.get("memory_retrieval_top_k", 3)
+        self.retrieval_deadline = self.config.get("memory_retrieval_deadline_ms", 150) / 1000.0
+        self.metrics = Metrics()
+
+        # Rolling summary of history evicted from the session window
+        if self.config.get("rolling_summary", False):
+            self.rolling_summarizer = RollingSummarizer(
+                self.llm,
+                self.session_state,
+                model=selector.get_cheapest_model(),
+                max_chars=self.config.get("rolling_summary_max_chars", 800)
+            )
+            self.session_state.on_evict = self.rolling_summarizer.on_evict
+
+    async def _retrieve_memories(self, user_input: str, turn_ctx) -> list:
+        """
+        Fetch top-k memories for the prompt. Runs on the embedding worker thread and is abandoned
+        if it misses the deadline, so a slow index never delays the turn.
+        """
+        if not self.retrieval_enabled:
+            return []
+        self.metrics.incr("retrieval_requests")
+        # "what did we discuss last tuesday": recall questions with a time phrase search only that period
+        window = time_window_from_text(user_input) if RECALL_CUE.search(user_input) else None
+        since, until = window or (None, None)
+        start = time.perf_counter()
+        try:
+            hits = await asyncio.wait_for(
+                self.memory_manager.aretrieve_memory(user_input, top_k=self.retrieval_top_k, context=turn_ctx,
+                                                     since=since, until=until),
+                timeout=self.retrieval_deadline
+            )
+        except asyncio.TimeoutError:
+            self.metrics.incr("retrieval_timeouts")
+            hits = []
+        self.metrics.observe("retrieval", time.perf_counter() - start)
+        return hits
+
+    def get_retrieval_metrics(self) -> dict:
+        return {
+            "latency": self.metrics.latency_summary("retrieval"),
+            "timeout_rate": self.metrics.rate("retrieval_timeouts", "retrieval_requests"),
+            "embedding_cache": self.memory_manager.embedding_cache_stats(),
+            "hot_tier": self.memory_manager.vector.hot_stats(),
+            "dedup": self.memory_manager.dedup_stats(),
+        }
 
     async def handle_input(self, user_input: str) -> str:
         log_event("Received input", user_input)
+        # One embedding of the user message per turn, shared by routing and memory
+        turn_ctx = self.memory_manager.new_turn_context(user_input)
+        if self.router.description_vectors:
+            await turn_ctx.prefetch()  # semantic routing reads turn_ctx.vector synchronously
 
          # 1. Tool command routing
-        if self.router.is_tool_command(user_input):
-            result = await self.router.route_command(user_input, self.session_state)
+        if self.router.is_tool_command(user_input, turn_ctx):
+            result = await self.router.route_command(user_input, self.session_state, turn_ctx)
+            if hasattr(result, "__aiter__"):
+                result = "".join([chunk async for chunk in result])
             log_event("Tool handled", result)
             return result
 
         # ✅ 2. Manual memory search
         if user_input.lower().startswith("search memory for"):
             query = user_input.replace("search memory for", "").strip()
-            memory_hits = self.memory_manager.retrieve_memory(query)
+            # "... last tuesday" / "... yesterday" narrow the search to that period
+            window = time_window_from_text(query) or (None, None)
+            memory_hits = await self.memory_manager.aretrieve_memory(query, context=turn_ctx,
+                                                                     since=window[0], until=window[1])
             return "\n".join(memory_hits) if memory_hits else "No matching memory found."
 
         # 3. Load profile & recent chat from MemoryManager
         profile = self.memory_manager.get_profile()
         context = self.session_state.get_recent_messages()
+        memories = await self._retrieve_memories(user_input, turn_ctx)
 
         # 4. Construct prompt
-        prompt = self.prompt_builder.build_prompt(user_input, profile, context)
+        prompt = self.prompt_builder.build_prompt(
+            user_input, profile, context,
+            memories=memories,
+            summary=self.session_state.rolling_summary
+        )
 
         # 5. Query the LLM (full response)
         response = await self.llm.get_response(prompt)
@@ -71,33 +171,47 @@ class AgentCore:
         # self.memory_manager.process_turn(user_input, response)
 
         # ✅ Await the async memory update
-        await self.memory_manager.process_turn(user_input, response)
-
-        # Now infer behavior:
-        # Pass the full recent chat history (or a subset) for analysis
-        chat_history = self.session_state.get_recent_messages()
-        behavior = await self.behavior_analyzer.analyze(chat_history)
-        # You can store this behavior in profile or memory_manager as well:
-        if behavior:
-            # e.g., store under a key in ProfileStore or MemoryManager
-            # Example: memory_manager.profile.set("behavior", behavior)
-            self.memory_manager.profile.set("behavior", behavior)
+        await self.memory_manager.process_turn(user_input, response, context=turn_ctx)
+
+        # Now infer behavior (skipped when the fused analyzer already produced it this turn):
+        if self.memory_manager.fused_analyzer is None:
+            # Pass the full recent chat history (or a subset) for analysis
+            chat_history = self.session_state.get_recent_messages()
+            behavior = await self.behavior_analyzer.analyze(chat_history)
+            # You can store this behavior in profile or memory_manager as well:
+            if behavior:
+                # e.g., store under a key in ProfileStore or MemoryManager
+                # Example: memory_manager.profile.set("behavior", behavior)
+                self.memory_manager.profile.set("behavior", behavior)
         
         return response
 
 
     async def stream_input(self, user_input: str):
         log_event("Streaming input", user_input)
+        turn_ctx = self.memory_manager.new_turn_context(user_input)
+        if self.router.description_vectors:
+            await turn_ctx.prefetch()
 
-        if self.router.is_tool_command(user_input):
-            result = await self.router.route_command(user_input, self.session_state)
-            yield result
+        if self.router.is_tool_command(user_input, turn_ctx):
+            result = await self.router.route_command(user_input, self.session_state, turn_ctx)
+            if hasattr(result, "__aiter__"):
+                # Tools with progress (downloads) stream their result line by line
+                async for chunk in result:
+                    yield chunk
+            else:
+                yield result
             return
 
         # 2. Load profile from MemoryManager
         profile = self.memory_manager.get_profile()
         context = self.session_state.get_recent_messages()
-        prompt = self.prompt_builder.build_prompt(user_input, profile, context)
+        memories = await self._retrieve_memories(user_input, turn_ctx)
+        prompt = self.prompt_builder.build_prompt(
+            user_input, profile, context,
+            memories=memories,
+            summary=self.session_state.rolling_summary
+        )
 
         collected_response = ""
         # Log start of streaming only
@@ -112,7 +226,7 @@ class AgentCore:
         # After streaming, update session & memory
         self.session_state.append_message("user", user_input)
         self.session_state.append_message("assistant", collected_response)
-        await self.memory_manager.process_turn(user_input, collected_response)
+        await self.memory_manager.process_turn(user_input, collected_response, context=turn_ctx)
 
         print(f"[AgentCore] Logging conversation to memory: {user_input} -> {collected_response}")
 
@@ -127,9 +241,20 @@ class AgentCore:
             # Instead of return (not allowed in generator), yield once
             yield result
 
+    async def ingest_file(self, path: str, summarize: bool = False) -> dict:
+        """
+        Stream a (possibly very large) text file into vector memory.
+        """
+        log_event("Ingesting file", path)
+        return await self.memory_manager.ingestor.ingest_file(path, summarize=summarize)
+
     def reset_session(self):
         self.session_state.reset()
 
+    async def shutdown(self):
+        """Let queued memory writes finish and stop the memory worker threads."""
+        await self.memory_manager.shutdown()
+
 # EOC=================================================================================================================
 
 # 🧠 What This Handles:
@@ -1,11 +1,14 @@
 # agent/command_router.py
 
 import re
+from typing import Callable, Optional
+import numpy as np
 from tools import file_search, media_downloader, schedule_manager
 from utils.logger import log_event
 
 class CommandRouter:
-    def __init__(self):
+    def __init__(self, config: Optional[dict] = None):
+        config = config or {}
         # List of available commands with their handlers
         self.commands = {
             "search file": file_search.search_files,
@@ -16,30 +19,69 @@ class CommandRouter:
         # Keyword triggers (can later be replaced with local intent model)
         self.patterns = {
             "search file": r"(find|search).*(file|document)",
-            "download video": r"(download).*(youtube|video|mp4)",
+            "download video": r"(download).*(youtube|video|mp4|https?://)",
             "set reminder": r"(remind|reminder|schedule).*"
         }
 
-    def is_tool_command(self, user_input: str) -> bool:
+        # Tool descriptions used for embedding-based intent matching
+        self.descriptions = {
+            "search file": "find or search for a file or document on my computer",
+            "download video": "download a video or media file from a url or youtube",
+            "set reminder": "remind me later, set a reminder or schedule a task"
+        }
+        self.semantic_threshold = float(config.get("semantic_routing_threshold", 0.6))
+        self.description_vectors = None  # command name -> unit vector, set by enable_semantic_routing()
+
+    def enable_semantic_routing(self, encoder: Callable[[str], np.ndarray]):
+        """
+        Precompute normalized tool-description vectors once; turns then only need the
+        user-message embedding (shared through TurnEmbeddingContext).
+        """
+        vectors = {}
+        for name, desc in self.descriptions.items():
+            vec = np.asarray(encoder(desc), dtype=np.float32)
+            vectors[name] = vec / (np.linalg.norm(vec) or 1.0)
+        self.description_vectors = vectors
+
+    def match_command(self, user_input: str, context=None) -> Optional[str]:
+        """
+        Return the matching command name, trying regex triggers first and then,
+        if enabled and a TurnEmbeddingContext is given, embedding similarity.
+        """
+        text = user_input.lower()
+        for command_name, pattern in self.patterns.items():
+            if re.search(pattern, text):
+                return command_name
+
+        if self.description_vectors and context is not None:
+            qvec = np.asarray(context.vector, dtype=np.float32)
+            qvec = qvec / (np.linalg.norm(qvec) or 1.0)
+            best_name, best_score = None, self.semantic_threshold
+            for name, vec in self.description_vectors.items():
+                score = float(np.dot(qvec, vec))
+                if score >= best_score:
+                    best_name, best_score = name, score
+            return best_name
+        return None
+
+    def is_tool_command(self, user_input: str, context=None) -> bool:
         """
         Checks if the input matches any known tool command pattern.
         """
-        user_input = user_input.lower()
-        for pattern in self.patterns.values():
-            if re.search(pattern, user_input):
-                return True
-        return False
+        return self.match_command(user_input, context) is not None
 
-    async def route_command(self, user_input: str, session_state):
+    async def route_command(self, user_input: str, session_state, context=None):
         """
         Match input to a command, run it, and return the result.
+        The result is a string, or an async iterator of strings for long-running
+        tools that stream progress (e.g. downloads).
         """
-        user_input = user_input.lower()
-        for command_name, pattern in self.patterns.items():
-            if re.search(pattern, user_input):
-                handler = self.commands[command_name]
-                # log_event("Tool matched", command_name)  # Commented out for performance
-                return await handler(user_input, session_state)
+        command_name = self.match_command(user_input, context)
+        if command_name:
+            handler = self.commands[command_name]
+            # log_event("Tool matched", command_name)  # Commented out for performance
+            # Original casing is kept: URLs and reminder texts are case-sensitive
+            return await handler(user_input, session_state)
 
         # log_event("No tool matched", user_input)  # Commented out for performance
         return "Sorry, I couldn't understand the command."
@@ -52,4 +94,6 @@ class CommandRouter:
 # "download YouTube video"	media_downloader.py
 # "reminder"	schedule_manager.py
 
-# More tools can easily be plugged in later.
\ No newline at end of file
+# More tools can easily be plugged in later.
+# Semantic routing: set `semantic_routing: true` in config/settings.yaml to fall back to
+# embedding similarity against self.descriptions when no regex trigger matches.
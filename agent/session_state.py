@@ -4,8 +4,12 @@ from collections import deque
 from datetime import datetime
 
 class SessionState:
-    def __init__(self, max_messages=10):
+    def __init__(self, max_messages=10, on_evict=None):
         self.chat_history = deque(maxlen=max_messages)
+        # Optional callback(message) invoked for each message pushed out of the window
+        self.on_evict = on_evict
+        # Compact summary of everything evicted so far (maintained by RollingSummarizer)
+        self.rolling_summary = ""
 
     def append_message(self, role: str, content: str):
         message = {
@@ -13,6 +17,8 @@ class SessionState:
             "content": content,
             "timestamp": datetime.now().isoformat()
         }
+        if self.on_evict and len(self.chat_history) == self.chat_history.maxlen:
+            self.on_evict(self.chat_history[0])
         self.chat_history.append(message)
 
     def get_recent_messages(self):
@@ -20,6 +26,7 @@ class SessionState:
 
     def reset(self):
         self.chat_history.clear()
+        self.rolling_summary = ""
 
     def get_last_user_message(self):
         for message in reversed(self.chat_history):
@@ -37,4 +44,5 @@ class SessionState:
 # append_message(role, content)	Adds a new message (e.g., user input or LLM reply)
 # get_recent_messages()	Returns a list of the last N messages
 # reset()	Clears the session history (useful for “new chat”)
-# get_last_user_message()	Handy for tools or repeating the last command
\ No newline at end of file
+# get_last_user_message()	Handy for tools or repeating the last command
+# on_evict / rolling_summary	Hook + slot for summarizing messages that fall out of the window
\ No newline at end of file
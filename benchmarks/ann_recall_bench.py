@@ -0,0 +1,61 @@
+# benchmarks/ann_recall_bench.py
+#
+# Recall@k and query latency of the IVF index against exact search, on
+# clustered synthetic embeddings. Run from the project root:
+#   python benchmarks/ann_recall_bench.py --size 200000 --probes 1 4 8 16 32
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Add project root
+
+from memory.ann_index import IVFIndex
+
+
+def clustered_vectors(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    """Gaussian blobs on the unit sphere; closer to real sentence embeddings than uniform noise."""
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_topk(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return top
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(args.size, args.dim, args.clusters, rng)
+    queries = clustered_vectors(args.queries, args.dim, args.clusters, np.random.default_rng(1))
+
+    start = time.perf_counter()
+    truth = exact_topk(vectors, queries, args.top_k)
+    exact_ms = 1000 * (time.perf_counter() - start) / args.queries
+    print(f"n={args.size:,} dim={args.dim} k={args.top_k}: exact {exact_ms:.2f} ms/query (batched)")
+
+    start = time.perf_counter()
+    index = IVFIndex(args.dim)
+    index.train(vectors)
+    print(f"IVF train+assign: {time.perf_counter() - start:.1f} s, {len(index.centroids)} cells")
+
+    for n_probe in args.probes:
+        start = time.perf_counter()
+        found, _ = index.search(queries, args.top_k, vectors, n_probe=n_probe)
+        ms = 1000 * (time.perf_counter() - start) / args.queries
+        recall = np.mean([len(set(f) & set(t)) / args.top_k for f, t in zip(found, truth)])
+        print(f"  n_probe={n_probe:>3}: recall@{args.top_k} {recall:.3f}  {ms:.2f} ms/query")
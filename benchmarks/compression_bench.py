@@ -0,0 +1,56 @@
+# benchmarks/compression_bench.py
+#
+# RAM footprint, recall@k and query latency of VectorMemory's compact search
+# codes (float16 / int8 / pca) against the exact float32 scan, on clustered
+# synthetic embeddings in a temporary vector store. Run from the project root:
+#   python benchmarks/compression_bench.py --size 200000 --modes float16 int8 pca
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Add project root
+
+from memory.vector_memory import VectorMemory
+from benchmarks.ann_recall_bench import clustered_vectors, exact_topk
+from benchmarks.vector_memory_bench import RandomEncoder
+
+
+def bench(mode, vectors, queries, truth, args):
+    with tempfile.TemporaryDirectory() as directory:
+        memory = VectorMemory(model=RandomEncoder(args.dim), store_path=directory, compression=mode,
+                              pca_components=args.pca_components, rescore_factor=args.rescore_factor)
+        for start in range(0, len(vectors), 50_000):
+            block = vectors[start:start + 50_000]
+            memory.add_batch([""] * len(block), [{} for _ in block], vectors=block)
+
+        start = time.perf_counter()
+        found = [memory.search_vectors(query, args.top_k)[0][0] for query in queries]
+        ms = 1000 * (time.perf_counter() - start) / len(queries)
+        recall = np.mean([len(set(f) & set(t)) / args.top_k for f, t in zip(found, truth)])
+        ram = memory.compact.nbytes if memory.compact is not None else vectors.nbytes
+        print(f"  {mode or 'float32':>8}: scan RAM {ram / 2**20:8.1f} MiB  "
+              f"recall@{args.top_k} {recall:.3f}  {ms:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--pca-components", type=int, default=128)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["float16", "int8", "pca"])
+    args = parser.parse_args()
+
+    vectors = clustered_vectors(args.size, args.dim, args.clusters, np.random.default_rng(0))
+    queries = clustered_vectors(args.queries, args.dim, args.clusters, np.random.default_rng(1))
+    truth = exact_topk(vectors, queries, args.top_k)
+    print(f"n={args.size:,} dim={args.dim} k={args.top_k} rescore x{args.rescore_factor}")
+    for mode in [None] + args.modes:
+        bench(mode, vectors, queries, truth, args)
@@ -0,0 +1,71 @@
+# benchmarks/fact_rules_bench.py
+#
+# Messages/sec of the YAML rule engine in FactExtractor against running every rule's
+# regex on every message (the previous behavior), plus batch extraction over
+# synthetic chat logs with a process pool. Run from the project root:
+#   python benchmarks/fact_rules_bench.py --messages 200000 --workers 1 4
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Add project root
+
+from memory.fact_extractor import FactExtractor, extract_logs
+
+CHATTER = [
+    "can you explain how transformers work", "what's the weather like tomorrow",
+    "write a python function that reverses a list", "thanks, that helped a lot",
+    "summarize this article for me please", "how do I fix a merge conflict in git",
+    "tell me a joke about cats", "what time is it in Tokyo right now",
+]
+FACTS = ["my name is Alex Morgan", "just call me Sam", "i live in Lisbon", "I work as a nurse",
+         "I love spicy ramen", "my friend's name is Priya"]
+
+
+def messages(n: int, fact_rate: float, seed: int = 0):
+    rng = random.Random(seed)
+    return [rng.choice(FACTS) if rng.random() < fact_rate else rng.choice(CHATTER) for _ in range(n)]
+
+
+def unfiltered(extractor: FactExtractor, text: str):
+    """Every rule's regex on every message, as before the trigger prefilter."""
+    return [rule["regex"].search(text) for rule in extractor.rules]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--fact-rate", type=float, default=0.05, help="share of messages containing a fact")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    extractor = FactExtractor()
+    texts = messages(args.messages, args.fact_rate)
+    print(f"{len(extractor.rules)} rules, {args.messages:,} messages, {args.fact_rate:.0%} with a fact")
+    for label, fn in (("all regexes", lambda t: unfiltered(extractor, t)), ("prefiltered", extractor.extract_facts)):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        seconds = time.perf_counter() - start
+        print(f"  {label:>12}: {len(texts) / seconds:12,.0f} messages/sec")
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        per_file = max(1, len(texts) // 8)
+        for day in range(0, len(texts), per_file):
+            with open(os.path.join(log_dir, f"2025-01-{day // per_file + 1:02d}.jsonl"), "w", encoding="utf-8") as f:
+                for i, text in enumerate(texts[day:day + per_file]):
+                    f.write(json.dumps({"time": f"2025-01-01T00:00:{i % 60:02d}", "user": text,
+                                        "assistant": "Sure, here is an answer."}) + "\n")
+        for workers in args.workers:
+            stats = {}
+            start = time.perf_counter()
+            for _ in extract_logs(log_dir, workers=workers, chunk_bytes=1 << 20, stats=stats):
+                pass
+            seconds = time.perf_counter() - start
+            print(f"  logs, {workers:2d} worker(s): {stats['lines'] / seconds:12,.0f} lines/sec "
+                  f"({stats['facts']:,} facts)")
@@ -0,0 +1,84 @@
+# benchmarks/vector_memory_bench.py
+#
+# Add/query latency of VectorMemory at growing corpus sizes, using random
+# vectors (no encoder involved). Run from the project root:
+#   python benchmarks/vector_memory_bench.py --sizes 1000 100000 1000000
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Add project root
+
+from memory.vector_memory import VectorMemory
+
+
+class RandomEncoder:
+    """Stand-in for SentenceTransformer so only index costs are measured."""
+
+    def __init__(self, dim: int, seed: int = 0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=32):
+        if isinstance(texts, str):
+            return self.rng.standard_normal(self.dim).astype(np.float32)
+        return self.rng.standard_normal((len(texts), self.dim)).astype(np.float32)
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.3f} ms"
+
+
+def bench(size: int, dim: int, queries: int, batch: int, top_k: int):
+    encoder = RandomEncoder(dim)
+    memory = VectorMemory(model=encoder)
+
+    # Bulk load in slices to keep peak memory ~ one slice of float32 vectors
+    start = time.perf_counter()
+    step = 50_000
+    for offset in range(0, size, step):
+        n = min(step, size - offset)
+        memory.add_batch([""] * n, [{} for _ in range(n)], vectors=encoder.encode([""] * n))
+    bulk = time.perf_counter() - start
+
+    # Single inserts on top of a corpus of this size
+    singles = 1000
+    vectors = encoder.encode([""] * singles)
+    start = time.perf_counter()
+    for vec in vectors:
+        memory.add("", {}, vector=vec)
+    add_single = (time.perf_counter() - start) / singles
+
+    qvecs = encoder.encode([""] * queries)
+    start = time.perf_counter()
+    for qvec in qvecs:
+        memory.search_vectors(qvec, top_k)
+    query_single = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    for offset in range(0, queries, batch):
+        memory.search_vectors(qvecs[offset:offset + batch], top_k)
+    query_batched = (time.perf_counter() - start) / queries
+
+    print(
+        f"n={size:>9,}  bulk load {bulk:7.2f} s  add {_ms(add_single):>11}  "
+        f"query {_ms(query_single):>11}  batched query ({batch}) {_ms(query_batched):>11}/query"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)  # all-MiniLM-L6-v2
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+    for n in args.sizes:
+        bench(n, args.dim, args.queries, args.batch, args.top_k)
@@ -57,6 +57,7 @@ import asyncio
 from agent.agent_core import AgentCore
 from agent.session_state import SessionState
 from utils.logger import log_event
+from tools import schedule_manager
 
 class EventDispatcher:
     def __init__(
@@ -64,13 +65,17 @@ class EventDispatcher:
         on_response_chunk=None,
         on_start=None,
         on_end=None,
-        on_error=None
+        on_error=None,
+        on_progress=None,
+        on_reminder=None
     ):
         """
         :param on_response_chunk: callback(chunk: str) called for each streamed chunk or full response.
         :param on_start: optional callback() called once just before streaming begins.
         :param on_end: optional callback() called once after streaming completes successfully.
         :param on_error: optional callback(error_msg: str) called if an exception/error occurs.
+        :param on_progress: optional callback(name: str, done: int, total: int) for document ingestion.
+        :param on_reminder: optional callback(reminder: dict) called when a scheduled reminder fires.
         """
         self.session = SessionState()
         self.agent = AgentCore(self.session)
@@ -78,6 +83,33 @@ class EventDispatcher:
         self.on_start = on_start
         self.on_end = on_end
         self.on_error = on_error
+        self.on_progress = on_progress
+        self.agent.memory_manager.ingestor.on_progress = on_progress
+        self.on_reminder = on_reminder
+
+    async def start(self):
+        """
+        Start background services on the agent's event loop (reminders persisted from
+        earlier runs begin firing right away; memory digests are built for finished days).
+        """
+        scheduler = schedule_manager.get_scheduler()
+        scheduler.on_fire = self._deliver_reminder
+        scheduler.start()
+        self.agent.memory_manager.start_background()
+
+    async def shutdown(self):
+        """
+        Stop background services and flush pending memory writes (call before exiting).
+        """
+        await schedule_manager.get_scheduler().stop()
+        await self.agent.shutdown()
+
+    def _deliver_reminder(self, reminder: dict):
+        if self.on_reminder:
+            try:
+                self.on_reminder(reminder)
+            except Exception as e:
+                log_event("EventDispatcher on_reminder callback error", str(e))
 
     async def handle_input(self, user_input: str, stream: bool = False) -> str:
         """
@@ -164,6 +196,22 @@ class EventDispatcher:
             # Return a fallback error message
             return "Sorry, something went wrong while processing your request."
 
+    async def ingest_file(self, path: str, summarize: bool = False) -> dict:
+        """
+        Ingests a dropped/opened document into memory; progress goes to on_progress.
+        """
+        try:
+            return await self.agent.ingest_file(path, summarize=summarize)
+        except Exception as exc:
+            err_msg = f"Error ingesting {path}: {exc}"
+            log_event("EventDispatcher error", err_msg)
+            if self.on_error:
+                try:
+                    self.on_error(err_msg)
+                except Exception as e:
+                    log_event("EventDispatcher on_error callback error", str(e))
+            return {"chunks": 0, "summary": None}
+
     def get_history(self):
         return self.session.get_recent_messages()
 
@@ -174,4 +222,6 @@ class EventDispatcher:
 # Feature	Description
 # on_response_chunk	Function pointer from UI (e.g., update_output_text())
 # stream=True	Supports live typing effect in GUI
-# get_history()	UI can use this to show full chat so far
\ No newline at end of file
+# get_history()	UI can use this to show full chat so far
+# on_progress	Progress of ingest_file() / long pasted text ingestion
+# on_reminder	Reminders fired by tools/schedule_manager (call start() once on the loop)
\ No newline at end of file
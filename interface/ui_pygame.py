@@ -6,6 +6,7 @@ import asyncio
 import threading
 from queue import Queue
 from interface.event_dispatcher import EventDispatcher
+from utils.logger import log_event
 
 # UI Settings
 WIDTH, HEIGHT = 800, 600
@@ -34,13 +35,17 @@ class AssistantPygameUI:
         self.response_queue = Queue()
 
         # Event dispatcher for async response
-        self.dispatcher = EventDispatcher(on_response_chunk=self.handle_chunk)
+        self.dispatcher = EventDispatcher(on_response_chunk=self.handle_chunk, on_reminder=self.handle_reminder)
         self.loop = asyncio.new_event_loop()
         threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self.dispatcher.start(), self.loop)
 
     def handle_chunk(self, chunk):
         self.response_queue.put(chunk)
 
+    def handle_reminder(self, reminder):
+        self.response_queue.put(("reminder", reminder["text"]))
+
     def submit_input(self):
         text = self.input_text.strip()
         if text:
@@ -55,6 +60,9 @@ class AssistantPygameUI:
     def update_response_from_queue(self):
         while not self.response_queue.empty():
             chunk = self.response_queue.get()
+            if isinstance(chunk, tuple):
+                self.chat_lines.append(f"⏰ Reminder: {chunk[1]}")
+                continue
             if self.chat_lines and self.chat_lines[-1].startswith("🤖:"):
                 self.chat_lines[-1] += chunk
 
@@ -91,6 +99,10 @@ class AssistantPygameUI:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
+                try:
+                    asyncio.run_coroutine_threadsafe(self.dispatcher.shutdown(), self.loop).result(timeout=10)
+                except Exception as e:
+                    log_event("UI shutdown error", str(e))
                 sys.exit()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_RETURN:
@@ -6,6 +6,7 @@ import asyncio
 import threading
 import time
 from interface.event_dispatcher import EventDispatcher
+from utils.logger import log_event
 from spellchecker import SpellChecker  # pip install pyspellchecker
 from datetime import datetime
 import platform
@@ -163,10 +164,13 @@ class AssistantUI:
             on_response_chunk=self.handle_chunk,
             on_start=self._on_response_start,
             on_end=self._on_response_end,
-            on_error=self._on_response_error
+            on_error=self._on_response_error,
+            on_progress=self._on_ingest_progress,
+            on_reminder=self._on_reminder
         )
         self.loop = asyncio.new_event_loop()
         threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self.dispatcher.start(), self.loop)
         try:
             self.spellchecker = SpellChecker()
         except Exception:
@@ -394,6 +398,22 @@ class AssistantUI:
         if error_msg:
             self._append_chat("System", f"❌ Error: {error_msg}", tag="error")
 
+    def _on_ingest_progress(self, name, done, total):
+        """Called from the agent loop while a document is being ingested"""
+        def update():
+            if total and done >= total:
+                self._set_status("Memory", "ok")
+                self.suggestion_label.config(text=f"📄 Added {name} to memory")
+            else:
+                self._set_status("Memory", "busy")
+                percent = f" {100 * done // total}%" if total else ""
+                self.suggestion_label.config(text=f"📄 Ingesting {name}...{percent}")
+        self.root.after(0, update)
+
+    def _on_reminder(self, reminder):
+        """Called from the agent loop when a reminder is due"""
+        self.root.after(0, lambda: self._append_chat("System", f"⏰ Reminder: {reminder['text']}"))
+
     def _start_loading_animation(self):
         """Start typing animation"""
         def animate():
@@ -477,6 +497,11 @@ class AssistantUI:
         """Start the UI main loop"""
         print("[DEBUG UI] Entering mainloop")
         self.root.mainloop()
+        try:
+            # Window closed: let pending memory writes land before the daemon loop dies
+            asyncio.run_coroutine_threadsafe(self.dispatcher.shutdown(), self.loop).result(timeout=10)
+        except Exception as e:
+            log_event("UI shutdown error", str(e))
 
 # EOC=============================================================================================================================
 
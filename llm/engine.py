@@ -16,16 +16,20 @@ class LLMEngine:
         selector = ModelSelector(config)
         self.model = config.get("model", selector.get_active_model())
 
-    async def get_response(self, prompt: str) -> str:
+    async def get_response(self, prompt: str, model: str = None, format=None) -> str:
         """
         Send a prompt and get a complete response.
+        :param model: optional per-call model override (does not touch self.model)
+        :param format: optional Ollama structured-output spec ("json" or a JSON schema dict)
         """
         url = f"{self.base_url}/api/generate"
         payload = {
-            "model": self.model,
+            "model": model or self.model,
             "prompt": prompt,
             "stream": False
         }
+        if format is not None:
+            payload["format"] = format
 
         try:
             async with aiohttp.ClientSession() as session:
@@ -81,16 +85,10 @@ class LLMEngine:
 
     async def complete(self, prompt: str, model: str = None, stream: bool = False) -> str:
             """
-            Async wrapper to get a response; if model override needed, temporarily override self.model.
+            Async wrapper to get a response; the model override is passed per call so
+            concurrent background requests never change the model of an interactive turn.
             """
-            orig_model = self.model
-            if model:
-                self.model = model
-            try:
-                resp = await self.get_response(prompt)
-            finally:
-                self.model = orig_model
-            return resp
+            return await self.get_response(prompt, model=model)
 # EOC=================================================================================================================
 
 # ✅ Features Summary
@@ -17,6 +17,31 @@ def list_local_models():
     except Exception as e:
         return [f"Error getting model list: {e}"]
 
+def _parse_size_gb(size: str, unit: str) -> float:
+    factors = {"KB": 1e-6, "MB": 1e-3, "GB": 1.0, "TB": 1e3}
+    try:
+        return float(size) * factors.get(unit.upper(), 1.0)
+    except ValueError:
+        return float("inf")
+
+def list_local_models_with_size():
+    """
+    Returns [(model_name, size_gb)] parsed from `ollama list` (NAME ID SIZE MODIFIED).
+    """
+    try:
+        result = subprocess.run(["ollama", "list"], capture_output=True, text=True)
+        lines = result.stdout.strip().splitlines()
+        models = []
+
+        for line in lines[1:]:  # Skip header
+            parts = line.split()
+            if len(parts) >= 4:
+                models.append((parts[0], _parse_size_gb(parts[2], parts[3])))
+
+        return models
+    except Exception:
+        return []
+
 def get_ollama_library_url():
     return OLLAMA_MODELS_URL
 
@@ -39,3 +64,15 @@ class ModelSelector:
                     return model
 
         return self.local_models[0] if self.local_models else "openhermes:latest"
+
+    def get_cheapest_model(self) -> str:
+        """
+        Model for background jobs (summaries etc.): `summary_model` from config,
+        else the smallest locally installed model, else the active model.
+        """
+        if "summary_model" in self.config:
+            return self.config["summary_model"]
+        sized = list_local_models_with_size()
+        if sized:
+            return min(sized, key=lambda item: item[1])[0]
+        return self.get_active_model()
@@ -7,12 +7,15 @@ import json
 import re
 
 class PromptBuilder:
-    def __init__(self, mode="default", model="openhermes:latest", exclude_profile_keys=None):
+    def __init__(self, mode="default", model="openhermes:latest", exclude_profile_keys=None,
+                 memory_token_budget: int = 300):
         """
         :param mode: instruction mode, passed to get_instruction(mode)
         :param model: model name for PromptTemplate
         :param exclude_profile_keys: iterable of profile keys to exclude or mask, e.g. ["password", "token"]
+        :param memory_token_budget: approx. max tokens spent on retrieved memories
         """
+        self.memory_token_budget = memory_token_budget
         self.system_instruction = get_instruction(mode).strip()
         self.formatter = PromptTemplate(model=model)
         # default exclude sensitive keys
@@ -77,14 +80,40 @@ class PromptBuilder:
             lines.append(line)
         return lines
 
-    def build_prompt(self, user_input: str, profile: dict, chat_history: list) -> str:
+    def _estimate_tokens(self, text: str) -> int:
+        # Rough heuristic (~4 chars per token); avoids loading a tokenizer
+        return max(1, len(text) // 4)
+
+    def _format_memory_lines(self, memories: list) -> list:
+        """
+        Keep retrieved memories (most relevant first) until the token budget is spent.
+        """
+        lines = []
+        used = 0
+        seen = set()
+        for text in memories or []:
+            text = " ".join(str(text).split())
+            if not text or text in seen:
+                continue
+            cost = self._estimate_tokens(text)
+            if used + cost > self.memory_token_budget:
+                break
+            seen.add(text)
+            used += cost
+            lines.append(f"- {text}")
+        return lines
+
+    def build_prompt(self, user_input: str, profile: dict, chat_history: list, memories: list = None,
+                     summary: str = None) -> str:
         """
         Build prompt string combining:
          1. system instruction
          2. dynamic profile facts (all keys except excluded)
          3. timestamp
-         4. chat history (list of {"role":..., "content":...})
-         5. current user_input
+         4. relevant memories retrieved from VectorMemory (within memory_token_budget)
+         5. rolling summary of messages evicted from the session window
+         6. chat history (list of {"role":..., "content":...})
+         7. current user_input
         """
         # 1. Format profile lines
         profile_lines = self._format_profile_lines(profile)
@@ -121,6 +150,12 @@ class PromptBuilder:
             system_parts.extend(profile_lines)
         if behavior_lines:
             system_parts.extend(behavior_lines)
+        memory_lines = self._format_memory_lines(memories)
+        if memory_lines:
+            system_parts.append("Relevant memories from earlier conversations:")
+            system_parts.extend(memory_lines)
+        if summary and summary.strip():
+            system_parts.append(f"Summary of the earlier conversation: {summary.strip()}")
         system_block = "\n".join(system_parts)
 
         # 5. Pass to template formatter
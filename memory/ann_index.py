@@ -0,0 +1,155 @@
+# memory/ann_index.py
+
+import os
+from typing import Optional, Tuple
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF-flat) approximate nearest-neighbour index for normalized
+    vectors, in plain NumPy. Spherical k-means splits the space into `n_lists`
+    cells; a query scores the centroids, probes the `n_probe` closest cells and
+    re-scores only their members exactly. More probes = higher recall, slower.
+    Row ids are the caller's row indices; inserts are incremental (nearest cell),
+    and the index persists as centroids + per-row assignments.
+    """
+
+    def __init__(self, dim: int, n_lists: Optional[int] = None, n_probe: int = 8, seed: int = 0):
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.rng = np.random.default_rng(seed)
+        self.centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)  # cell of each row, in row order (with spare capacity)
+        self._n = 0
+        self._lists = []   # per cell: int64 array of row ids (with spare capacity)
+        self._counts = None
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def assignments(self) -> np.ndarray:
+        return self._assignments[:self._n]
+
+    def __len__(self):
+        return self._n
+
+    # ---------- training ----------
+
+    def train(self, vectors: np.ndarray, sample_size: int = 50_000, iterations: int = 10):
+        """Fit centroids on a sample of `vectors` and (re)assign every row."""
+        n = len(vectors)
+        n_lists = self.n_lists or int(np.clip(4 * np.sqrt(n), 16, 65536))
+        n_lists = min(n_lists, n)
+        sample_ids = np.sort(self.rng.choice(n, size=min(n, sample_size), replace=False))
+        sample = np.asarray(vectors[sample_ids], dtype=np.float32)
+        centroids = sample[self.rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = self._nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():  # re-seed dead cells with random sample points
+                sums[empty] = sample[self.rng.choice(len(sample), size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = sums / norms
+        self.centroids = centroids.astype(np.float32)
+        self._assignments = np.empty(n, dtype=np.int32)
+        self._n = 0
+        self._lists = [np.empty(16, dtype=np.int64) for _ in range(n_lists)]
+        self._counts = np.zeros(n_lists, dtype=np.int64)
+        for start in range(0, n, 65536):
+            self.add(vectors[start:start + 65536], start)
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        out = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            out[start:start + chunk] = np.argmax(np.asarray(vectors[start:start + chunk]) @ centroids.T, axis=1)
+        return out
+
+    # ---------- updates ----------
+
+    def add(self, vectors: np.ndarray, start_id: int):
+        """Assign rows start_id .. start_id+len(vectors)-1 to their nearest cells."""
+        if len(vectors) == 0:
+            return
+        if start_id != self._n:
+            raise ValueError(f"IVFIndex expected row {self._n}, got {start_id}")
+        assign = self._nearest(vectors, self.centroids)
+        if self._n + len(assign) > len(self._assignments):
+            grown = np.empty(max(self._n + len(assign), 2 * len(self._assignments)), dtype=np.int32)
+            grown[:self._n] = self._assignments[:self._n]
+            self._assignments = grown
+        self._assignments[self._n:self._n + len(assign)] = assign
+        self._n += len(assign)
+        ids = np.arange(start_id, start_id + len(vectors), dtype=np.int64)
+        order = np.argsort(assign, kind="stable")
+        cells, starts = np.unique(assign[order], return_index=True)
+        for cell, part in zip(cells, np.split(ids[order], starts[1:])):
+            self._append_to_cell(int(cell), part)
+
+    def _append_to_cell(self, cell: int, ids: np.ndarray):
+        count = self._counts[cell]
+        bucket = self._lists[cell]
+        if count + len(ids) > len(bucket):
+            grown = np.empty(max(count + len(ids), 2 * len(bucket)), dtype=np.int64)
+            grown[:count] = bucket[:count]
+            self._lists[cell] = bucket = grown
+        bucket[count:count + len(ids)] = ids
+        self._counts[cell] = count + len(ids)
+
+    # ---------- search ----------
+
+    def search(self, queries: np.ndarray, top_k: int, vectors: np.ndarray,
+               n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param queries: normalized query vectors, shape (m, dim)
+        :param vectors: the full row matrix (RAM or memmap) used for exact re-scoring
+        :return: (indices, scores), shape (m, <=top_k) padded with -1 / -inf
+        """
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        cell_scores = queries @ self.centroids.T
+        probes = np.argpartition(-cell_scores, n_probe - 1, axis=1)[:, :n_probe]
+        out_ids = np.full((len(queries), top_k), -1, dtype=np.int64)
+        out_scores = np.full((len(queries), top_k), -np.inf, dtype=np.float32)
+        for qi, query in enumerate(queries):
+            candidates = np.concatenate([self._lists[c][:self._counts[c]] for c in probes[qi]])
+            if len(candidates) == 0:
+                continue
+            candidates.sort()  # sequential access pattern for memory-mapped rows
+            scores = np.asarray(vectors[candidates]) @ query
+            k = min(top_k, len(candidates))
+            best = np.argpartition(-scores, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+            best = best[np.argsort(-scores[best])]
+            out_ids[qi, :k] = candidates[best]
+            out_scores[qi, :k] = scores[best]
+        return out_ids, out_scores
+
+    # ---------- persistence ----------
+
+    def save(self, path: str):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, centroids=self.centroids, assignments=self.assignments,
+                 n_probe=np.int64(self.n_probe))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, dim: int, n_probe: Optional[int] = None) -> "IVFIndex":
+        data = np.load(path)
+        index = cls(dim, n_lists=len(data["centroids"]), n_probe=n_probe or int(data["n_probe"]))
+        index.centroids = data["centroids"].astype(np.float32)
+        assignments = data["assignments"].astype(np.int32)
+        n_lists = len(index.centroids)
+        index._counts = np.bincount(assignments, minlength=n_lists).astype(np.int64)
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        index._lists = np.split(order, np.cumsum(index._counts)[:-1])
+        index._lists = [cell if len(cell) else np.empty(16, dtype=np.int64) for cell in index._lists]
+        index._assignments = assignments
+        index._n = len(assignments)
+        return index
@@ -0,0 +1,265 @@
+# memory/backfill.py
+#
+# Bulk backfill of VectorMemory from the historical chat logs in data/logs/*.jsonl.
+# Run from the project root:
+#   python -m memory.backfill --workers 4
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from utils.logger import log_event
+
+
+def turn_text(user: str, assistant: str) -> str:
+    # Same shape as the live snippets written by MemoryManager.process_turn
+    return f"User: {user} Assistant: {assistant}"
+
+
+def _text_hash(text: str) -> int:
+    normalized = " ".join(text.lower().split())
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def normalize_timestamp(value: Optional[str]) -> Optional[str]:
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        return value
+
+
+def iter_log_turns(path: str, start_offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+    """
+    Stream turns from one JSONL chat log, starting at byte `start_offset`.
+    Understands both MemoryBus lines ({"time", "user", "assistant"}) and SessionLogger
+    lines ({"time", "role", "text"}, paired user -> assistant). Yields (turn, end_offset),
+    where end_offset is where to resume after this turn. A user line still waiting for
+    its reply at the end of the file, and a torn last line, are left for the next run.
+    """
+    pending = None  # (user text, time) of a SessionLogger user line awaiting its reply
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        offset = start_offset
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # line still being written
+            line_start, offset = offset, offset + len(raw)
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue  # torn or hand-edited line
+            if "user" in entry or "assistant" in entry:
+                if pending:
+                    yield {"user": pending[0], "assistant": "", "time": pending[1]}, line_start
+                    pending = None
+                yield {"user": entry.get("user", ""), "assistant": entry.get("assistant", ""),
+                       "time": entry.get("time")}, offset
+            elif entry.get("role") == "user":
+                if pending:
+                    yield {"user": pending[0], "assistant": "", "time": pending[1]}, line_start
+                pending = (entry.get("text", ""), entry.get("time"))
+            elif entry.get("role") == "assistant":
+                user, when = pending if pending else ("", entry.get("time"))
+                pending = None
+                yield {"user": user, "assistant": entry.get("text", ""), "time": when}, offset
+
+
+# ---------- worker process ----------
+
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads: int):
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(threads)  # one process per core slice instead of oversubscribing
+    except ImportError:
+        pass
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name)
+
+
+def _encode_chunk(texts: List[str], batch_size: int) -> np.ndarray:
+    return np.asarray(_worker_model.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+
+# ---------- job ----------
+
+class LogBackfill:
+    """
+    Streams historical turns into VectorMemory: dedupes them by normalized-text hash
+    (seeded from what the store already holds), encodes chunks on a process pool with
+    large batches, and appends each chunk with one bulk write. After every chunk the
+    per-file byte offsets and the store size are checkpointed atomically, so an
+    interrupted run resumes where it stopped; rows the store committed after the last
+    checkpoint are hashed into the seen set on resume, so they are not added twice.
+    Progress goes to `on_progress(stats)`.
+    """
+
+    def __init__(self, vector_memory, log_dir: str = "data/logs/", checkpoint_path: str = "data/backfill.json",
+                 workers: Optional[int] = None, chunk_turns: int = 2048, encode_batch_size: int = 256,
+                 on_progress: Optional[Callable[[Dict], None]] = None):
+        """
+        :param workers: encoder processes (default: CPU count); 0 encodes in this process
+        :param chunk_turns: turns per pool task and per bulk write
+        """
+        self.vector = vector_memory
+        self.log_dir = log_dir
+        self.checkpoint_path = checkpoint_path
+        self.seen_path = checkpoint_path + ".seen"
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_turns = chunk_turns
+        self.encode_batch_size = encode_batch_size
+        self.on_progress = on_progress
+        self.checkpoint = self._load_checkpoint()
+        self.seen = self._load_seen()
+        self._catch_up_seen()
+        self.stats = {"turns_read": 0, "turns_added": 0, "duplicates": 0, "seconds": 0.0, "turns_per_sec": 0.0}
+
+    # ---------- checkpoint ----------
+
+    def _load_checkpoint(self) -> Dict:
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            # saved right away, so a crash before the first chunk's checkpoint can still be caught up
+            self.checkpoint = {"files": {}, "turns_added": 0, "vector_rows": self.vector.size}
+            self._save_checkpoint()
+            return self.checkpoint
+
+    def _save_checkpoint(self):
+        os.makedirs(os.path.dirname(self.checkpoint_path) or ".", exist_ok=True)
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint_path)
+
+    def _load_seen(self) -> set:
+        if os.path.exists(self.seen_path):
+            return set(np.fromfile(self.seen_path, dtype=np.uint64).tolist())
+        # First run: do not re-add turns the live agent already stored
+        seen = {_text_hash(meta.get("text", "")) for meta in self.vector.metadata}
+        os.makedirs(os.path.dirname(self.seen_path) or ".", exist_ok=True)
+        np.array(sorted(seen), dtype=np.uint64).tofile(self.seen_path)
+        return seen
+
+    def _catch_up_seen(self):
+        """Hash rows written after the last checkpoint (crash between the bulk write and the checkpoint)."""
+        committed = self.checkpoint.get("vector_rows", 0)  # checkpoints from before this field: rescan all
+        if committed >= self.vector.size:
+            return
+        if self.vector.store is not None:
+            metas = self.vector.store.iter_metadata(committed)
+        else:
+            metas = self.vector.metadata[committed:]
+        hashes = [h for h in (_text_hash(meta.get("text", "")) for meta in metas) if h not in self.seen]
+        self.seen.update(hashes)
+        with open(self.seen_path, "ab") as f:
+            f.write(np.array(hashes, dtype=np.uint64).tobytes())
+        self.checkpoint["vector_rows"] = self.vector.size
+        self._save_checkpoint()
+
+    # ---------- pipeline ----------
+
+    def _iter_chunks(self) -> Iterator[Tuple[List[str], List[Dict], List[int], Dict[str, int]]]:
+        texts, metas, hashes, offsets = [], [], [], {}
+        for name in sorted(os.listdir(self.log_dir)):
+            if not name.endswith(".jsonl"):
+                continue
+            start = self.checkpoint["files"].get(name, 0)
+            for turn, end in iter_log_turns(os.path.join(self.log_dir, name), start):
+                self.stats["turns_read"] += 1
+                offsets[name] = end
+                text = turn_text(turn["user"], turn["assistant"])
+                digest = _text_hash(text)
+                if digest in self.seen:
+                    self.stats["duplicates"] += 1
+                    continue
+                self.seen.add(digest)
+                texts.append(text)
+                metas.append({"timestamp": normalize_timestamp(turn["time"]), "source": "backfill", "log": name})
+                hashes.append(digest)
+                if len(texts) >= self.chunk_turns:
+                    yield texts, metas, hashes, offsets
+                    texts, metas, hashes, offsets = [], [], [], {}
+        if texts or offsets:
+            yield texts, metas, hashes, offsets
+
+    def _commit(self, texts: List[str], metas: List[Dict], hashes: List[int], offsets: Dict[str, int],
+                vectors: Optional[np.ndarray]):
+        if texts:
+            self.vector.add_batch(texts, metas, vectors=vectors)
+            with open(self.seen_path, "ab") as f:
+                f.write(np.array(hashes, dtype=np.uint64).tobytes())
+        self.checkpoint["files"].update(offsets)
+        self.checkpoint["turns_added"] += len(texts)
+        self.checkpoint["vector_rows"] = self.vector.size
+        self._save_checkpoint()
+        self.stats["turns_added"] += len(texts)
+        elapsed = time.perf_counter() - self._started
+        self.stats["seconds"] = round(elapsed, 2)
+        self.stats["turns_per_sec"] = round(self.stats["turns_read"] / elapsed, 1) if elapsed else 0.0
+        if self.on_progress:
+            self.on_progress(dict(self.stats))
+
+    def run(self) -> Dict:
+        self._started = time.perf_counter()
+        if self.workers <= 0:
+            for texts, metas, hashes, offsets in self._iter_chunks():
+                vectors = self.vector.encode_batch(texts, batch_size=self.encode_batch_size) if texts else None
+                self._commit(texts, metas, hashes, offsets, vectors)
+        else:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            # spawn: forking a process that already holds a torch model can deadlock
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                     initargs=(self.vector.model_name, threads)) as pool:
+                inflight = deque()
+                for chunk in self._iter_chunks():
+                    future = pool.submit(_encode_chunk, chunk[0], self.encode_batch_size) if chunk[0] else None
+                    inflight.append((chunk, future))
+                    if len(inflight) > 2 * self.workers:  # bounded read-ahead; commits stay in log order
+                        self._commit_next(inflight)
+                while inflight:
+                    self._commit_next(inflight)
+        log_event("Backfill finished", json.dumps(self.stats))
+        return self.stats
+
+    def _commit_next(self, inflight: deque):
+        (texts, metas, hashes, offsets), future = inflight.popleft()
+        self._commit(texts, metas, hashes, offsets, future.result() if future else None)
+
+
+if __name__ == "__main__":
+    from config.settings import load_config
+    from memory.vector_memory import VectorMemory
+
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Backfill vector memory from chat logs")
+    parser.add_argument("--log-dir", default=config.get("log_dir", "data/logs/"))
+    parser.add_argument("--store", default=config.get("vector_store_path", "data/vector_store"))
+    parser.add_argument("--checkpoint", default="data/backfill.json")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-turns", type=int, default=2048)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    memory = VectorMemory(store_path=args.store)
+    job = LogBackfill(memory, args.log_dir, args.checkpoint, workers=args.workers, chunk_turns=args.chunk_turns,
+                      encode_batch_size=args.batch_size,
+                      on_progress=lambda s: print(f"\r{s['turns_read']:,} turns read, {s['turns_added']:,} added, "
+                                                  f"{s['duplicates']:,} duplicates, {s['turns_per_sec']:,.0f} turns/sec",
+                                                  end="", flush=True))
+    job.run()
+    print()
@@ -1,26 +1,43 @@
 # memory/behavior_analyzer.py
 
 import json
-from typing import List, Dict, Optional
+import re
+from typing import Awaitable, Callable, List, Dict, Optional
+import numpy as np
 from utils.logger import log_event
 from llm.engine import LLMEngine
 from config.settings import load_config
 from datetime import datetime
 
+# Messages that may reveal goals / habits / preferences; only these reach the LLM
+# when the local classifier is confident about mood and tone
+OPEN_ENDED_HINTS = re.compile(
+    r"\b(?:i want|i'd like|i plan|planning|my goal|trying to|going to|i usually|every (?:day|morning|night|week)"
+    r"|i always|i never|i prefer|i like|i love|i hate|i enjoy|my favorite)\b", re.I
+)
+
 class BehaviorAnalyzer:
     """
     Uses offline LLM to infer user behavior patterns—tone, mood, goals, habits, preferences, etc.—from conversation.
     Maintains previous state to detect changes if desired.
+    With a BehaviorClassifier, mood / tone / emotional cues come from the user message
+    embedding in milliseconds; the LLM is asked only for the open-ended fields (goals,
+    habits, preferences) when the message hints at them, or for everything when the
+    classifier is not confident.
     """
 
     def __init__(self,
                  llm_engine: Optional[LLMEngine] = None,
                  max_history_messages: int = 10,
-                 temperature: float = 0.0):
+                 temperature: float = 0.0,
+                 classifier=None,
+                 encoder: Optional[Callable[[str], Awaitable[np.ndarray]]] = None):
         """
         :param llm_engine: an instance of LLMEngine; if None, create one via config
         :param max_history_messages: how many recent user/assistant messages to include for behavior inference
         :param temperature: sampling temperature for behavior LLM calls (0.0 for deterministic)
+        :param classifier: optional BehaviorClassifier for local mood / tone / cues
+        :param encoder: awaitable text -> embedding for the classifier (e.g. EmbeddingService.encode)
         """
         if llm_engine is None:
             config = load_config()
@@ -31,13 +48,53 @@ class BehaviorAnalyzer:
         self.temperature = temperature
         # Store last inferred behavior state
         self.last_behavior: Dict = {}
+        self.classifier = classifier if encoder is not None else None
+        self.encoder = encoder
+        self._last_user: Optional[str] = None
+        self.stats = {"local": 0, "llm_open_ended": 0, "llm_full": 0}
 
-    async def analyze(self, messages: List[Dict]) -> Dict:
+    async def analyze(self, messages: List[Dict], vector: Optional[np.ndarray] = None) -> Dict:
         """
         Analyze the conversation messages to infer behavior patterns.
         :param messages: list of {"role": "user" or "assistant", "content": str}, in chronological order.
+        :param vector: embedding of the latest user message, if already computed this turn
         :return: dict of inferred behavior attributes.
         """
+        if self.classifier is not None:
+            last_user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+            if last_user.strip():
+                return await self._analyze_local(messages, last_user, vector)
+        return await self._analyze_llm(messages)
+
+    async def _analyze_local(self, messages: List[Dict], last_user: str, vector: Optional[np.ndarray]) -> Dict:
+        if last_user == self._last_user:
+            return self.last_behavior  # same turn analyzed again (memory update + agent)
+        try:
+            if not self.classifier.ready:
+                await self.classifier.prepare(self.encoder)
+            if vector is None:
+                vector = await self.encoder(last_user)
+            local = self.classifier.classify(vector, text=last_user)
+        except Exception as e:
+            log_event("BehaviorAnalyzer classifier error", str(e))
+            return await self._analyze_llm(messages)
+        self._last_user = last_user
+        if self.classifier.uncertain(local):
+            self.stats["llm_full"] += 1
+            behavior = await self._analyze_llm(messages)
+            self.last_behavior = {**local, **behavior} if behavior else dict(local)
+            return self.last_behavior
+        behavior = dict(local)
+        self.stats["local"] += 1
+        if OPEN_ENDED_HINTS.search(last_user):
+            self.stats["llm_open_ended"] += 1
+            extra = await self._analyze_llm(messages, open_ended_only=True)
+            if extra:
+                behavior.update({k: v for k, v in extra.items() if k in ("goals", "habits", "preferences")})
+        self.last_behavior = behavior
+        return behavior
+
+    async def _analyze_llm(self, messages: List[Dict], open_ended_only: bool = False) -> Dict:
         # 1. Collect recent messages (user + assistant) up to limit. Here include both roles so LLM can see context.
         #    But if you prefer only user messages, adjust accordingly.
         recent = messages[-self.max_history*2:]  # take roughly last N turns (user+assistant)
@@ -58,7 +115,7 @@ class BehaviorAnalyzer:
         #    We instruct the LLM to respond with a JSON object only, with keys we define.
         #    For example: {"mood": "...", "tone": "...", "goals": [...], "habits": [...], "preferences": [...], "emotional_state": "..."}
         #    You can adjust the schema as you like.
-        prompt = self._build_behavior_prompt(convo_snippet)
+        prompt = self._build_behavior_prompt(convo_snippet, open_ended_only)
         try:
             # 3. Call LLMEngine to get a response
             raw = await self.llm.get_response(prompt)
@@ -72,13 +129,28 @@ class BehaviorAnalyzer:
             log_event("BehaviorAnalyzer Error", f"{e}; raw response: {raw if 'raw' in locals() else 'N/A'}")
             return None
 
-    def _build_behavior_prompt(self, convo_snippet: str) -> str:
+    def _build_behavior_prompt(self, convo_snippet: str, open_ended_only: bool = False) -> str:
         """
         Constructs a prompt instructing the LLM to analyze the user behavior from the conversation snippet.
         We ask for a JSON-only response.
         """
         # You can refine instructions to your style/model.
         # Here we explicitly ask for JSON output, no extra text.
+        if open_ended_only:
+            # mood / tone / cues already come from the local classifier
+            return (
+                "You are a system that analyzes user behavior from conversation. "
+                "Given the following recent conversation between the user and assistant, infer the user's:\n"
+                "  - goals or intentions (if any apparent)\n"
+                "  - habits or routine hints (e.g., mentions waking times, study habits, work styles)\n"
+                "  - preferences or interests mentioned (e.g., likes/dislikes)\n"
+                "Respond ONLY as a JSON object, with keys among: \"goals\", \"habits\", \"preferences\", "
+                "each a JSON array. If you cannot infer something, omit that key. "
+                "Do NOT output any explanation—only the JSON.\n\n"
+                "Conversation:\n"
+                f"{convo_snippet}\n\n"
+                "JSON:"
+            )
         prompt = (
             "You are a system that analyzes user behavior and emotional context from conversation. "
             "Given the following recent conversation between the user and assistant, infer the user's:\n"
@@ -0,0 +1,96 @@
+# memory/behavior_classifier.py
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+import numpy as np
+import yaml
+
+DEFAULT_PROTOTYPES_PATH = "config/behavior_prototypes.yaml"
+
+
+class BehaviorClassifier:
+    """
+    Local mood / tone / emotional-cue labels from the sentence embedding of the user
+    message: nearest centroid per field, where each label's centroid is the mean
+    embedding of its example messages (config/behavior_prototypes.yaml). Cosines
+    to the centroids go through a softmax, and the per-field probabilities are
+    smoothed across turns with an exponential moving average, so one terse message
+    does not flip the mood. Confidence is the winning label's smoothed probability.
+    Emotional cues are per-turn multi-labels: every cue whose centroid is close enough.
+    One matrix-vector product per turn; the centroids are encoded once on first use.
+    """
+
+    def __init__(self, prototypes_path: str = DEFAULT_PROTOTYPES_PATH, ema_alpha: float = 0.4,
+                 temperature: float = 0.05, min_confidence: float = 0.4, cue_min_cosine: float = 0.4):
+        """
+        :param ema_alpha: weight of the newest turn in the moving average
+        :param temperature: softmax temperature over cosines (lower = sharper)
+        :param min_confidence: below this a field counts as uncertain (see uncertain())
+        :param cue_min_cosine: emotional cues are per turn (not averaged) and need this cosine to their centroid
+        """
+        with open(prototypes_path, "r", encoding="utf-8") as f:
+            self.prototypes: Dict[str, Dict[str, List[str]]] = yaml.safe_load(f) or {}
+        self.ema_alpha = ema_alpha
+        self.temperature = temperature
+        self.min_confidence = min_confidence
+        self.cue_min_cosine = cue_min_cosine
+        self.labels = {field: list(labels) for field, labels in self.prototypes.items()}
+        self.centroids: Optional[Dict[str, np.ndarray]] = None  # field -> (n_labels, dim)
+        self.ema: Dict[str, np.ndarray] = {}
+        self._lock = asyncio.Lock()
+        self._last_text: Optional[str] = None
+        self._last_result: Optional[Dict] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.centroids is not None
+
+    async def prepare(self, encode: Callable[[str], Awaitable[np.ndarray]]):
+        """Encode all examples (concurrently, so a batching encoder sees them as one batch)."""
+        async with self._lock:
+            if self.centroids is not None:
+                return
+            groups = [(field, label, examples) for field, labels in self.prototypes.items()
+                      for label, examples in labels.items()]
+            texts = [text for _, _, examples in groups for text in examples]
+            vectors = np.asarray(await asyncio.gather(*(encode(t) for t in texts)), dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            centroids: Dict[str, List[np.ndarray]] = {}
+            start = 0
+            for field, label, examples in groups:
+                mean = vectors[start:start + len(examples)].mean(axis=0)
+                centroids.setdefault(field, []).append(mean / max(np.linalg.norm(mean), 1e-12))
+                start += len(examples)
+            self.centroids = {field: np.stack(rows) for field, rows in centroids.items()}
+
+    def classify(self, vector: np.ndarray, text: Optional[str] = None) -> Dict:
+        """
+        Update the moving average with one user-message embedding and return
+        {"mood", "tone", "emotional_cues": [..], "confidence": {field: p}}.
+        Repeating the same `text` (one turn analyzed twice) does not count it again.
+        """
+        if text is not None and text == self._last_text and self._last_result is not None:
+            return self._last_result
+        unit = np.asarray(vector, dtype=np.float32)
+        unit = unit / max(np.linalg.norm(unit), 1e-12)
+        result, confidence = {}, {}
+        for field, centroids in self.centroids.items():
+            cosines = centroids @ unit
+            if field == "emotional_cues":
+                result[field] = [self.labels[field][i] for i in np.argsort(-cosines)
+                                 if cosines[i] >= self.cue_min_cosine][:2]
+                continue
+            logits = cosines / self.temperature
+            probs = np.exp(logits - logits.max())
+            probs /= probs.sum()
+            previous = self.ema.get(field)
+            self.ema[field] = probs if previous is None else (1 - self.ema_alpha) * previous + self.ema_alpha * probs
+            best = int(np.argmax(self.ema[field]))
+            confidence[field] = round(float(self.ema[field][best]), 3)
+            result[field] = self.labels[field][best]
+        result["confidence"] = confidence
+        self._last_text, self._last_result = text, result
+        return result
+
+    def uncertain(self, result: Dict) -> bool:
+        return any(p < self.min_confidence for p in result.get("confidence", {}).values())
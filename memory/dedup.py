@@ -0,0 +1,172 @@
+# memory/dedup.py
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Optional
+import numpy as np
+from utils.logger import log_event
+
+MERGES_FILE = "merges.i64"
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word unigrams + bigrams; near-identical texts differ in few bits."""
+    words = re.findall(r"\w+", text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return 0
+    digests = b"".join(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in features)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(features), 64)
+    weights = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)  # +1 per set bit, -1 per clear bit
+    return int.from_bytes(np.packbits(weights > 0).tobytes(), "big")
+
+
+def hamming(a: np.ndarray, b: int) -> np.ndarray:
+    """Bit distance between each uint64 in `a` and `b`."""
+    xor = np.bitwise_xor(a, np.uint64(b))
+    return np.unpackbits(xor.view(np.uint8)).reshape(len(a), 64).sum(axis=1)
+
+
+class NearDuplicateFilter:
+    """
+    Insert-time dedup for VectorMemory. Rows are often keyed on a partial embedding
+    (the user message of a turn), so a cosine match alone does not make two entries
+    duplicates: the stored *texts* must also be within `max_hamming` SimHash bits.
+    A new entry is checked against
+      1. the SimHashes of the last `recent` inserts (cheap text prefilter; candidates
+         are verified by cosine), then
+      2. optionally its nearest existing neighbours (one top-k search; hits are
+         verified by the SimHash of their stored text).
+    If both match, the new entry is merged into the existing row: VectorMemory updates
+    that row's text, metadata and timestamp in place and its merge count goes up, so
+    repeats do not grow the store. Merge counts are persisted (merges.i64 next to the tombstones, or the
+    SQLite backend's meta table). consolidate() later sweeps rows added in bulk
+    (which bypass the check) the same way.
+    """
+
+    def __init__(self, vector_memory, threshold: float = 0.95, max_hamming: int = 6,
+                 recent: int = 1024, check_nearest: bool = True, nearest_k: int = 4,
+                 path: Optional[str] = None):
+        """
+        :param nearest_k: neighbours whose stored text is compared in the nearest check
+        :param path: file for the persisted merge counts (None = backend meta, if any)
+        """
+        self.vector = vector_memory
+        self.threshold = threshold
+        self.max_hamming = max_hamming
+        self.check_nearest = check_nearest
+        self.nearest_k = nearest_k
+        self.path = path
+        self._hashes = np.zeros(recent, dtype=np.uint64)
+        self._rows = np.full(recent, -1, dtype=np.int64)
+        self._next = 0
+        self.merge_counts: Dict[int, int] = self._load_merge_counts()
+        self._consolidated_upto = vector_memory.size  # rows before startup were already stored as-is
+        self.stats = {"checked": 0, "inserted": 0, "merged_simhash": 0, "merged_nearest": 0,
+                      "simhash_candidates": 0, "nearest_text_mismatch": 0, "consolidated": 0}
+
+    # ---------- merge counts ----------
+
+    def _load_merge_counts(self) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        if self.path and os.path.exists(self.path):
+            pairs = np.fromfile(self.path, dtype=np.int64)
+            pairs = pairs[:len(pairs) // 2 * 2].reshape(-1, 2)  # drop a torn last pair
+            for row, count in pairs.tolist():  # appended in order, so later pairs win
+                counts[row] = count
+        elif self.vector.backend is not None:
+            counts = {int(row): count for row, count in
+                      json.loads(self.vector.backend.get_meta("merge_counts") or "{}").items()}
+        return {row: count for row, count in counts.items()
+                if row < self.vector.size and not self.vector.is_removed(row)}
+
+    def _persist_merge_count(self, row: int):
+        if self.path:
+            with open(self.path, "ab") as f:
+                f.write(np.array([row, self.merge_counts[row]], dtype=np.int64).tobytes())
+        elif self.vector.backend is not None:
+            self.vector.backend.set_meta("merge_counts", json.dumps(self.merge_counts))
+
+    # ---------- insert-time check ----------
+
+    def _text_matches(self, row: int, text_hash: int) -> bool:
+        stored = self.vector.metadata[row].get("text", "")
+        return hamming(np.array([simhash(stored)], dtype=np.uint64), text_hash)[0] <= self.max_hamming
+
+    def find_duplicate(self, text: str, vector: np.ndarray) -> Optional[int]:
+        """Row id of an existing near-duplicate of (text, vector), or None."""
+        self.stats["checked"] += 1
+        if not self.vector.live_count:
+            return None
+        unit = vector / (np.linalg.norm(vector) or 1.0)
+        text_hash = simhash(text)
+        valid = self._rows >= 0
+        if valid.any():
+            close = valid & (hamming(self._hashes, text_hash) <= self.max_hamming)
+            rows = self._rows[close]
+            rows = rows[[not self.vector.is_removed(r) for r in rows]] if len(rows) else rows
+            self.stats["simhash_candidates"] += len(rows)
+            if len(rows):
+                scores = np.asarray(self.vector.embeddings[np.sort(rows)]) @ unit
+                if scores.max() >= self.threshold:
+                    self.stats["merged_simhash"] += 1
+                    return int(np.sort(rows)[int(np.argmax(scores))])
+        if self.check_nearest:
+            ids, scores = self.vector.search_vectors(unit, top_k=self.nearest_k)
+            for row, score in zip(ids[0], scores[0]):
+                if row < 0 or score < self.threshold:
+                    break
+                if self._text_matches(int(row), text_hash):
+                    self.stats["merged_nearest"] += 1
+                    return int(row)
+                self.stats["nearest_text_mismatch"] += 1
+        return None
+
+    def merge(self, row: int, into: Optional[int] = None):
+        """Count one merge on `row`; with `into`, the count moves to the superseding row."""
+        count = self.merge_counts.pop(row, 0) + 1
+        target = row if into is None else into
+        self.merge_counts[target] = count
+        self._persist_merge_count(target)
+
+    def remember(self, row: int, text: str):
+        """Record a newly inserted row in the recent-SimHash ring."""
+        self.stats["inserted"] += 1
+        slot = self._next % len(self._hashes)
+        self._hashes[slot] = simhash(text)
+        self._rows[slot] = row
+        self._next += 1
+
+    def consolidate(self, batch: int = 1024) -> int:
+        """
+        Tombstone near-duplicates among rows added since the last sweep (bulk inserts,
+        backfills). Each new row is compared with its nearest older live rows; when one
+        is a duplicate (cosine and text), the older row is removed. Returns the number
+        of rows removed.
+        """
+        start, end = self._consolidated_upto, self.vector.size
+        removed = 0
+        for lo in range(start, end, batch):
+            rows = np.arange(lo, min(lo + batch, end))
+            rows = rows[[not self.vector.is_removed(r) for r in rows]]
+            if not len(rows):
+                continue
+            ids, scores = self.vector.search_vectors(np.asarray(self.vector.embeddings[rows]), top_k=3)
+            dupes = set()
+            for row, hit_ids, hit_scores in zip(rows, ids, scores):
+                text_hash = simhash(self.vector.metadata[int(row)].get("text", ""))
+                for other, score in zip(hit_ids, hit_scores):
+                    # the newer copy keeps its text and timestamp; the older one is removed
+                    if (0 <= other < row and other not in dupes and score >= self.threshold
+                            and self._text_matches(int(other), text_hash)):
+                        dupes.add(int(other))
+                        self.merge(int(other), into=int(row))
+                        break
+            removed += self.vector.remove(np.array(sorted(dupes), dtype=np.int64)) if dupes else 0
+        self._consolidated_upto = end
+        self.stats["consolidated"] += removed
+        if removed:
+            log_event("NearDuplicateFilter consolidated", f"{removed} rows removed")
+        return removed
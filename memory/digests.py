@@ -0,0 +1,195 @@
+# memory/digests.py
+
+import asyncio
+from datetime import date, datetime, timedelta, time as dtime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from memory.vector_memory import VectorMemory
+from utils.logger import log_event
+
+
+def _day_bounds(day: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(day, dtime.min)  # local midnight; row timestamps compare in epoch time
+    return start, start + timedelta(days=1)
+
+
+class DigestIndex:
+    """
+    Coarse layer of memory: one LLM digest per finished day of memories (the
+    VectorMemory rows in that day's time window: turns, backfilled history and
+    document summaries) and one per finished ISO week, rolled up from its day
+    digests. Digests are embedded into their own small VectorMemory. Retrieval is
+    coarse-to-fine: the query is scored against the digests, and only the rows inside
+    the best-matching periods plus the not-yet-digested tail (rows after the last
+    digested day) are scored, so a query scores a few days of rows instead of the
+    whole history. When no digest matches well enough, callers fall back to the
+    normal search. consolidate() runs as a background task and only builds missing digests.
+    """
+
+    def __init__(self, service, summarizer, index_path: str = "data/digests",
+                 interval_s: float = 3600.0, periods: int = 3, min_score: float = 0.25,
+                 max_chunk_chars: int = 6000):
+        """
+        :param service: EmbeddingService of the main VectorMemory (encoder + worker thread)
+        :param summarizer: Summarizer used for the digests
+        :param index_path: directory of the digest VectorStore
+        :param interval_s: how often the background task looks for finished days/weeks
+        :param periods: digests expanded into fine search per query
+        :param min_score: best digest score needed for coarse-to-fine (else full search)
+        :param max_chunk_chars: digest input per LLM call; longer days are summarized in parts
+        """
+        self.service = service
+        self.vector = service.vector
+        self.summarizer = summarizer
+        self.interval_s = interval_s
+        self.periods = periods
+        self.min_score = min_score
+        self.max_chunk_chars = max_chunk_chars
+        self.coarse = VectorMemory(self.vector.model_name, model=self.vector.model, store_path=index_path)
+        self.done = {(m["level"], m["period"]) for m in self.coarse.store.iter_metadata()}
+        # end of the last digested day; rows from here on are the undigested tail
+        self.covered_until = max((m["until"] for m in self.coarse.store.iter_metadata() if m["level"] == "day"),
+                                 default=None)
+        self.stats = {"coarse_queries": 0, "fallbacks": 0, "rows_scored": 0, "digests_built": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------- consolidation ----------
+
+    def start(self):
+        """Start the background consolidation loop on the current event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            try:
+                await self.consolidate()
+            except Exception as e:
+                log_event("DigestIndex consolidate error", str(e))
+            await asyncio.sleep(self.interval_s)
+
+    async def consolidate(self, today: Optional[date] = None) -> int:
+        """Build digests for finished days, then for finished weeks; returns how many were built."""
+        today = today or date.today()
+        built = 0
+        days = await self.service.run(self._memory_days, today)
+        for day in days:
+            built += await self._digest_day(day)
+            if ("day", day.isoformat()) not in self.done:
+                break  # LLM unavailable; retried on the next interval
+        weeks = {}
+        for level, period in self.done:
+            if level == "day":
+                day = date.fromisoformat(period)
+                weeks.setdefault(day - timedelta(days=day.weekday()), []).append(day)
+        for monday in sorted(weeks):
+            label = "{}-W{:02d}".format(*monday.isocalendar()[:2])
+            if monday + timedelta(days=7) <= today and ("week", label) not in self.done:
+                built += await self._digest_week(monday, label, sorted(weeks[monday]))
+        if built:
+            log_event("DigestIndex consolidated", f"{built} digests")
+        return built
+
+    def _memory_days(self, today: date) -> List[date]:
+        """Finished days without a digest that have memories (two binary searches per day)."""
+        dated = self.vector.time_index.window()
+        if not len(dated):
+            return []
+        first = datetime.fromtimestamp(self.vector.time_index.timestamps[dated[0]] / 1000.0).date()
+        days = []
+        for offset in range((today - first).days):
+            day = first + timedelta(days=offset)
+            if ("day", day.isoformat()) not in self.done and len(self.vector.time_index.window(*_day_bounds(day))):
+                days.append(day)
+        return days
+
+    async def _digest_day(self, day: date) -> int:
+        since, until = _day_bounds(day)
+        lines = await self.service.run(self._texts_in, since, until)
+        if not lines:
+            self.done.add(("day", day.isoformat()))  # only removed rows or document chunks; skipped for good
+            self.covered_until = max(self.covered_until or "", until.isoformat())
+            return 0
+        text = await self._summarize("\n".join(lines), day.strftime("%A %Y-%m-%d"))
+        if not text:
+            return 0  # not recorded as digested, so the day is retried
+        await self._add("day", day.isoformat(), since, until, text)
+        self.covered_until = max(self.covered_until or "", until.isoformat())
+        return 1
+
+    def _texts_in(self, since: datetime, until: datetime) -> List[str]:
+        """Texts of the live memories in the window; ingested documents by their summary, not their chunks."""
+        rows = self.vector.time_index.window(since, until)
+        metas = [self.vector.metadata[i] for i in rows if not self.vector.is_removed(i)]
+        return [m.get("text", "") for m in metas if "chunk" not in m]
+
+    async def _digest_week(self, monday: date, label: str, days: List[date]) -> int:
+        metas = [m for m in self.coarse.store.iter_metadata() if m["level"] == "day"]
+        by_period = {m["period"]: m["text"] for m in metas}
+        parts = [f"{d.strftime('%A')}: {by_period[d.isoformat()]}" for d in days if d.isoformat() in by_period]
+        if not parts:
+            self.done.add(("week", label))
+            return 0
+        text = await self._summarize("\n".join(parts), f"the week of {monday.isoformat()}")
+        if not text:
+            return 0
+        since = datetime.combine(monday, dtime.min)
+        await self._add("week", label, since, since + timedelta(days=7), text)
+        return 1
+
+    async def _summarize(self, text: str, period: str) -> str:
+        """
+        Summarize in parts of max_chunk_chars, then summarize the parts, until one call
+        fits. "" when any LLM call fails, so no error text is stored as a digest.
+        """
+        while len(text) > self.max_chunk_chars:
+            chunks = [text[i:i + self.max_chunk_chars] for i in range(0, len(text), self.max_chunk_chars)]
+            parts = [await self.summarizer.digest(chunk, period) for chunk in chunks]
+            if not all(parts):
+                return ""
+            text = "\n".join(parts)
+        return await self.summarizer.digest(text, period)
+
+    async def _add(self, level: str, period: str, since: datetime, until: datetime, text: str):
+        meta = {"level": level, "period": period, "since": since.isoformat(), "until": until.isoformat(),
+                "timestamp": since.isoformat()}
+        vector = await self.service.encode(text)
+        await self.service.run(self.coarse.add_memory, text, meta, vector)
+        self.done.add((level, period))
+        self.stats["digests_built"] += 1
+
+    # ---------- retrieval ----------
+
+    def search(self, vector: np.ndarray, top_k: int = 3) -> Optional[List[Dict]]:
+        """
+        Coarse-to-fine search for one query vector; None when no digest scores at least
+        min_score (search everything instead). Call on the embedding worker thread.
+        """
+        self.stats["coarse_queries"] += 1
+        if not self.coarse.live_count:
+            self.stats["fallbacks"] += 1
+            return None
+        ids, scores = self.coarse.search_vectors(vector, self.periods)
+        periods = [self.coarse.metadata[i] for i, s in zip(ids[0], scores[0]) if i >= 0 and s >= self.min_score]
+        if not periods:
+            self.stats["fallbacks"] += 1
+            return None
+        index = self.vector.time_index
+        windows = [index.window(p["since"], p["until"]) for p in periods]
+        windows.append(index.window(since=self.covered_until))  # not digested yet (only today, normally)
+        windows.append(index.undated())
+        rows = np.unique(np.concatenate(windows))
+        self.stats["rows_scored"] += len(rows)
+        hit_ids, _ = self.vector.search_vectors(vector, top_k, rows=rows)
+        return [self.vector.metadata[i] for i in hit_ids[0] if i >= 0]
+
+    async def asearch(self, vector: np.ndarray, top_k: int = 3) -> Optional[List[Dict]]:
+        return await self.service.run(self.search, vector, top_k)
@@ -0,0 +1,125 @@
+# memory/embedding_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+import numpy as np
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    """Content address of an embedding: model name + NFC/whitespace-normalized text."""
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.blake2b(f"{model_name}\0{normalized}".encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """
+    Drop-in wrapper around a SentenceTransformer-like encoder that remembers embeddings:
+    a bounded in-RAM LRU in front of an optional persistent SQLite tier. Batch calls look
+    every text up first and send only the misses to the model, in one encode call.
+    Thread-safe (ingestion and retrieval encode from executor threads).
+    """
+
+    def __init__(self, encoder, model_name: str, capacity: int = 10_000, disk_path: Optional[str] = None):
+        """
+        :param encoder: object with encode(texts, batch_size) and get_sentence_embedding_dimension()
+        :param model_name: part of the key, so switching models never returns stale vectors
+        :param capacity: max embeddings kept in RAM
+        :param disk_path: SQLite file for the persistent tier (None = RAM only)
+        """
+        self.encoder = encoder
+        self.model_name = model_name
+        self.capacity = capacity
+        self.dim = encoder.get_sentence_embedding_dimension()
+        self._lru: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "ram_hits": 0, "disk_hits": 0, "misses": 0}
+        self._db = None
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Same contract as SentenceTransformer.encode: a str gives a vector, a list a matrix."""
+        if isinstance(texts, str):
+            return self.encode_many([texts], batch_size)[0]
+        return self.encode_many(list(texts), batch_size)
+
+    def encode_many(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        keys = [cache_key(self.model_name, text) for text in texts]
+        with self._lock:
+            self.stats["requests"] += len(texts)
+            missing = {}  # key -> positions still unresolved
+            for i, key in enumerate(keys):
+                vec = self._lru.get(key)
+                if vec is not None:
+                    self._lru.move_to_end(key)
+                    out[i] = vec
+                    self.stats["ram_hits"] += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+            if missing and self._db is not None:
+                for key, vec in self._disk_get(list(missing)).items():
+                    for i in missing.pop(key):
+                        out[i] = vec
+                    self.stats["disk_hits"] += 1
+                    self._remember(key, vec)
+            self.stats["misses"] += len(missing)
+
+        if missing:
+            # Encode outside the lock; a concurrent duplicate miss is harmless
+            miss_keys = list(missing)
+            vectors = np.asarray(self.encoder.encode([texts[missing[k][0]] for k in miss_keys],
+                                                     batch_size=batch_size), dtype=np.float32)
+            for key, vec in zip(miss_keys, vectors):
+                for i in missing[key]:
+                    out[i] = vec
+            with self._lock:
+                for key, vec in zip(miss_keys, vectors):
+                    self._remember(key, vec.copy())
+                if self._db is not None:
+                    self._db.executemany("INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)",
+                                         [(key, vec.tobytes()) for key, vec in zip(miss_keys, vectors)])
+                    self._db.commit()
+        return out
+
+    def _remember(self, key: bytes, vec: np.ndarray):
+        vec.setflags(write=False)
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    def _disk_get(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        found = {}
+        for start in range(0, len(keys), 500):  # stay under SQLite's host-parameter limit
+            part = keys[start:start + 500]
+            rows = self._db.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def hit_rate(self) -> float:
+        requests = self.stats["requests"]
+        return (self.stats["ram_hits"] + self.stats["disk_hits"]) / requests if requests else 0.0
+
+    def snapshot(self) -> Dict:
+        return dict(self.stats, hit_rate=round(self.hit_rate(), 3), ram_entries=len(self._lru))
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
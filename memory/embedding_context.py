@@ -0,0 +1,57 @@
+# memory/embedding_context.py
+
+from typing import Awaitable, Callable, Dict, Optional
+import numpy as np
+
+
+class TurnEmbeddingContext:
+    """
+    Holds the embeddings computed during a single chat turn so the user message
+    is encoded once and reused for routing, memory retrieval and memory insert.
+    """
+
+    def __init__(self, encoder: Callable[[str], np.ndarray], text: str, stats: Optional[Dict] = None,
+                 async_encoder: Optional[Callable[[str], Awaitable[np.ndarray]]] = None):
+        """
+        :param encoder: function text -> embedding (e.g. VectorMemory.encode)
+        :param text: the user message for this turn
+        :param stats: shared counter dict updated with "encoder_calls" / "encoder_calls_avoided"
+        :param async_encoder: awaitable text -> embedding used by aencode() (e.g. EmbeddingService.encode)
+        """
+        self.encoder = encoder
+        self.async_encoder = async_encoder
+        self.text = text
+        self.stats = stats if stats is not None else {"encoder_calls": 0, "encoder_calls_avoided": 0}
+        self._cache: Dict[str, np.ndarray] = {}
+
+    @property
+    def vector(self) -> np.ndarray:
+        """Embedding of the turn's user message (computed on first access)."""
+        return self.encode(self.text)
+
+    def encode(self, text: str) -> np.ndarray:
+        """Return the embedding for `text`, encoding it only the first time this turn."""
+        vec = self._cache.get(text)
+        if vec is not None:
+            self.stats["encoder_calls_avoided"] = self.stats.get("encoder_calls_avoided", 0) + 1
+            return vec
+        vec = self.encoder(text)
+        self.stats["encoder_calls"] = self.stats.get("encoder_calls", 0) + 1
+        self._cache[text] = vec
+        return vec
+
+    async def aencode(self, text: str) -> np.ndarray:
+        """Like encode(), but off the event loop when an async encoder is available."""
+        if self.async_encoder is None or text in self._cache:
+            return self.encode(text)
+        vec = await self.async_encoder(text)
+        self.stats["encoder_calls"] = self.stats.get("encoder_calls", 0) + 1
+        self._cache[text] = vec
+        return vec
+
+    async def prefetch(self):
+        """Encode the user message now (off the loop), so later sync `.vector` reads are free."""
+        await self.aencode(self.text)
+
+    def has_vector(self) -> bool:
+        return self.text in self._cache
@@ -0,0 +1,125 @@
+# memory/embedding_service.py
+
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from utils.logger import log_event
+
+
+class EmbeddingService:
+    """
+    Async front-end for VectorMemory: every encoder call and index read/write runs on
+    one dedicated worker thread, so the event loop (LLM streaming, UI callbacks) never
+    blocks on a forward pass or an index update, and index mutations are serialized
+    without locks. Encode requests that arrive within `max_wait_ms` of each other are
+    coalesced into a single encode() call of up to `max_batch` texts.
+    A thread rather than a process: the encoder releases the GIL in its tensor ops,
+    and the index must stay in this process anyway.
+    """
+
+    def __init__(self, vector_memory, max_batch: int = 64, max_wait_ms: float = 5.0):
+        self.vector = vector_memory
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self.stats = {"encode_requests": 0, "encode_calls": 0}
+        self._pending: List = []  # [(text, future)] waiting for the next micro-batch
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._closed = False
+        self._inflight = 0  # public operations that may still submit work to the worker
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    # ---------- encoding ----------
+
+    async def encode(self, text: str) -> np.ndarray:
+        """Embedding of one text, batched with concurrent requests."""
+        if self._closed:
+            raise RuntimeError("EmbeddingService is shut down")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.stats["encode_requests"] += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    async def encode_many(self, texts: List[str]) -> np.ndarray:
+        """Explicit batch: one encode call on the worker, not merged with other requests."""
+        self.stats["encode_calls"] += 1
+        return await self.run(self.vector.encode_batch, texts)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:  # overflow goes out in the next batch right away
+            self._flush_handle = asyncio.get_running_loop().call_soon(self._flush)
+        if not batch:
+            return
+        self.stats["encode_calls"] += 1
+        asyncio.ensure_future(self._encode_batch(batch))
+
+    async def _encode_batch(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            vectors = await self.run(self.vector.encode_batch, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vec in zip(batch, vectors):
+            if not future.done():  # caller may have given up (retrieval deadline)
+                future.set_result(vec)
+
+    # ---------- index work ----------
+
+    async def run(self, fn: Callable, *args):
+        """Run any VectorMemory operation on the worker thread."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    @asynccontextmanager
+    async def _operation(self):
+        if self._closed:
+            raise RuntimeError("EmbeddingService is shut down")
+        self._inflight += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            if not self._inflight:
+                self._idle.set()
+
+    async def query(self, query: str, top_k: int = 3, vector: Optional[np.ndarray] = None,
+                    since=None, until=None) -> List[Dict]:
+        async with self._operation():
+            if vector is None:
+                vector = await self.encode(query)
+            return await self.run(lambda: self.vector.query(query, top_k=top_k, vector=vector,
+                                                            since=since, until=until))
+
+    async def add_memory(self, text: str, metadata: Optional[Dict] = None, vector: Optional[np.ndarray] = None) -> int:
+        async with self._operation():
+            if vector is None:
+                vector = await self.encode(text)
+            return await self.run(lambda: self.vector.add_memory(text, metadata=metadata, vector=vector))
+
+    # ---------- lifecycle ----------
+
+    async def shutdown(self):
+        """Finish queued encodes and index writes, then stop the worker thread."""
+        self._closed = True
+        while self._pending or self._flush_handle is not None:
+            self._flush()
+            await asyncio.sleep(0)
+        await self._idle.wait()  # adds/queries that were waiting on an encode
+        await self.run(lambda: None)  # drain everything already submitted
+        self.executor.shutdown(wait=True)
+        log_event("EmbeddingService stopped", str(self.stats))
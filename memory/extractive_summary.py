@@ -0,0 +1,101 @@
+# memory/extractive_summary.py
+
+import re
+from typing import Callable, List, Optional
+import numpy as np
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+|\s+(?=(?:User|Assistant):)")
+
+
+def split_sentences(text: str, min_chars: int = 12) -> List[str]:
+    """Split on sentence punctuation, newlines and speaker labels; fragments are merged forward."""
+    sentences, carry = [], ""
+    for part in _SENTENCE_END.split(text):
+        part = (carry + " " + part).strip() if carry else part.strip()
+        if len(part) < min_chars:
+            carry = part
+            continue
+        sentences.append(part)
+        carry = ""
+    if carry:
+        if sentences:
+            sentences[-1] += " " + carry
+        else:
+            sentences.append(carry)
+    return sentences
+
+
+class ExtractiveSummarizer:
+    """
+    Local summaries for memory snippets: the snippet is split into sentences, the
+    sentences are embedded in one batch with the memory encoder, and the best ones
+    are kept in their original order until `max_chars`. Scoring is either
+      centroid  cosine to the mean sentence embedding (what the snippet is mostly about)
+      textrank  PageRank over the sentence cosine-similarity graph (power iteration)
+    Both are a few small NumPy matrix ops. summarize() returns None when the result
+    looks poor (too few sentences to choose from, or the kept sentences cover the
+    snippet's meaning badly), so the caller can fall back to the LLM Summarizer.
+    """
+
+    def __init__(self, encode_batch: Callable[[List[str]], np.ndarray], method: str = "centroid",
+                 max_chars: int = 300, min_coverage: float = 0.8, max_sentences: int = 200):
+        """
+        :param encode_batch: texts -> (n, dim) embeddings (e.g. VectorMemory.encode_batch)
+        :param method: "centroid" or "textrank"
+        :param max_chars: summary length budget
+        :param min_coverage: cosine between summary and snippet centroids below which the result is rejected
+        :param max_sentences: longer inputs are cut to their first sentences before encoding
+        """
+        if method not in ("centroid", "textrank"):
+            raise ValueError(f"Unknown extractive method: {method}")
+        self.encode_batch = encode_batch
+        self.method = method
+        self.max_chars = max_chars
+        self.min_coverage = min_coverage
+        self.max_sentences = max_sentences
+        self.stats = {"summaries": 0, "rejected": 0}
+
+    def summarize(self, text: str) -> Optional[str]:
+        sentences = split_sentences(text)[:self.max_sentences]
+        if len(sentences) < 3:
+            self.stats["rejected"] += 1
+            return None
+        vectors = np.asarray(self.encode_batch(sentences), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        scores = self._textrank(vectors) if self.method == "textrank" else self._centroid(vectors)
+        keep, used = [], 0
+        for i in np.argsort(-scores):
+            if used + len(sentences[i]) > self.max_chars and keep:
+                continue
+            keep.append(i)
+            used += len(sentences[i]) + 1
+        keep.sort()
+        if self._coverage(vectors, keep) < self.min_coverage:
+            self.stats["rejected"] += 1
+            return None
+        self.stats["summaries"] += 1
+        return " ".join(sentences[i] for i in keep)
+
+    @staticmethod
+    def _centroid(vectors: np.ndarray) -> np.ndarray:
+        centroid = vectors.mean(axis=0)
+        return vectors @ (centroid / max(np.linalg.norm(centroid), 1e-12))
+
+    @staticmethod
+    def _textrank(vectors: np.ndarray, damping: float = 0.85, iterations: int = 30) -> np.ndarray:
+        sim = np.clip(vectors @ vectors.T, 0.0, None)
+        np.fill_diagonal(sim, 0.0)
+        sim /= np.maximum(sim.sum(axis=1, keepdims=True), 1e-12)  # row-stochastic transitions
+        n = len(vectors)
+        rank = np.full(n, 1.0 / n, dtype=np.float32)
+        for _ in range(iterations):
+            updated = (1 - damping) / n + damping * (sim.T @ rank)
+            if np.abs(updated - rank).sum() < 1e-6:
+                return updated
+            rank = updated
+        return rank
+
+    @staticmethod
+    def _coverage(vectors: np.ndarray, keep: List[int]) -> float:
+        full, part = vectors.mean(axis=0), vectors[keep].mean(axis=0)
+        return float(full @ part / max(np.linalg.norm(full) * np.linalg.norm(part), 1e-12))
@@ -1,19 +1,94 @@
 # memory/fact_extractor.py
+#
+# Rule-based profile fact extraction. Rules live in config/fact_rules.yaml.
+# Batch extraction over the chat logs, run from the project root:
+#   python -m memory.fact_extractor --workers 4
 
+import argparse
+import json
+import multiprocessing
+import os
 import re
-from typing import List, Dict, Tuple
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+import yaml
 from utils.logger import log_event
 
+DEFAULT_RULES_PATH = "config/fact_rules.yaml"
+TRANSFORMS = {"title": str.title, "lower": str.lower, "none": lambda s: s}
+
+
 class FactExtractor:
-    def __init__(self):
-        pass
+    """
+    Extracts (key, value) profile facts from user messages with regex rules loaded
+    from YAML. Patterns are compiled once. Each rule lists trigger substrings, and
+    a message is lower-cased once and checked against the distinct triggers (plain
+    substring tests), so only the rules whose triggers occur run their regex; most
+    chat lines run none. Facts carry a confidence and their source.
+    """
+
+    def __init__(self, rules_path: str = DEFAULT_RULES_PATH, min_confidence: float = 0.0):
+        """
+        :param rules_path: YAML file with a top-level `rules` list
+        :param min_confidence: facts below this are dropped by extract()
+        """
+        self.rules_path = rules_path
+        self.min_confidence = min_confidence
+        with open(rules_path, "r", encoding="utf-8") as f:
+            specs = (yaml.safe_load(f) or {}).get("rules", [])
+        self.rules: List[Dict] = []
+        self.always: List[int] = []              # rules without triggers
+        self.by_trigger: Dict[str, List[int]] = {}
+        for spec in specs:
+            index = len(self.rules)
+            self.rules.append({
+                "key": spec["key"],
+                "regex": re.compile(spec["pattern"], re.I),
+                "transform": TRANSFORMS[spec.get("transform", "none")],
+                "confidence": float(spec.get("confidence", 0.5)),
+                "max_words": spec.get("max_words"),
+            })
+            triggers = [t.lower() for t in spec.get("triggers") or []]
+            if not triggers:
+                self.always.append(index)
+            for trigger in triggers:
+                self.by_trigger.setdefault(trigger, []).append(index)
+        self.stats = {"messages": 0, "prefiltered": 0, "regex_runs": 0, "facts": 0}
+
+    def extract_facts(self, text: str, source: str = "user") -> List[Dict]:
+        """All rule matches in one message: [{"key", "value", "confidence", "source"}]."""
+        self.stats["messages"] += 1
+        lowered = text.lower()
+        candidates = set(self.always)
+        for trigger, rules in self.by_trigger.items():
+            if trigger in lowered:
+                candidates.update(rules)
+        if not candidates:
+            self.stats["prefiltered"] += 1
+            return []
+        facts = []
+        for index in sorted(candidates):  # file order, so later rules win on duplicate keys
+            rule = self.rules[index]
+            self.stats["regex_runs"] += 1
+            match = rule["regex"].search(text)
+            if not match:
+                continue
+            value = rule["transform"](match.group(1).strip())
+            if not value:
+                continue
+            confidence = rule["confidence"]
+            if rule["max_words"] and len(value.split()) > rule["max_words"]:
+                confidence /= 2  # greedy captures run on into the rest of the sentence
+            facts.append({"key": rule["key"], "value": value, "confidence": confidence, "source": source})
+        self.stats["facts"] += len(facts)
+        return facts
 
     def extract(self, messages: List[Dict]) -> List[Tuple[str, str]]:
         """
         Given a list of messages (each {'role': 'user'/'assistant', 'content': ...}),
         only inspect the latest user message for structured facts.
         """
-        # Find the last user message:
         last_user = None
         for m in reversed(messages):
             if m.get("role") == "user":
@@ -21,48 +96,111 @@ class FactExtractor:
                 break
         if not last_user:
             return []
+        return [(f["key"], f["value"]) for f in self.extract_facts(last_user, "user_message")
+                if f["confidence"] >= self.min_confidence]
 
-        user_input = last_user  # only examine this
-        facts = []
+    def extract_batch(self, texts: List[str], sources: Optional[List[str]] = None) -> List[List[Dict]]:
+        """extract_facts() for many messages (one list of facts per message)."""
+        sources = sources or ["user"] * len(texts)
+        return [self.extract_facts(text, source) for text, source in zip(texts, sources)]
 
-        # Example patterns:
-
-        # 1. Name: "my name is X"
-        if match := re.search(r"\bmy name is ([A-Za-z ]+)", user_input, re.I):
-            name = match.group(1).strip().title()
-            facts.append(("name", name))
-            # log_event("🧠 FactExtractor: name", name)  # Commented out for performance
-
-        # 2. Preferred name: "just call me X"
-        if match := re.search(r"\bjust call me ([A-Za-z]+)", user_input, re.I):
-            pref = match.group(1).strip().title()
-            facts.append(("preferred_name", pref))
-            # log_event("🧠 FactExtractor: preferred_name", pref)  # Commented out for performance
-
-        # 3. Friend's name: "my friend's name is X"
-        if match := re.search(r"\bmy friend(?:'s)? name is ([A-Za-z ]+)", user_input, re.I):
-            friend = match.group(1).strip().title()
-            facts.append(("friend_name", friend))
-            # log_event("🧠 FactExtractor: friend_name", friend)  # Commented out for performance
-
-        # 4. Favorite food: "I like/enjoy/love X"
-        if match := re.search(r"\b(?:i like|i love|i enjoy|my favorite food is) ([A-Za-z ]+)", user_input, re.I):
-            food = match.group(1).strip().lower()
-            facts.append(("fav_food", food))
-            # log_event("🧠 FactExtractor: fav_food", food)  # Commented out for performance
-
-        # 5. Location: "I live in X"
-        if match := re.search(r"\bi live in ([A-Za-z ]+)", user_input, re.I):
-            loc = match.group(1).strip().title()
-            facts.append(("location", loc))
-            # log_event("🧠 FactExtractor: location", loc)  # Commented out for performance
-
-        # 6. Job: "I work as X" or "I am a/an X"
-        if match := re.search(r"\bi (?:work as|am a|am an) ([A-Za-z ]+)", user_input, re.I):
-            job = match.group(1).strip().title()
-            facts.append(("job", job))
-            # log_event("🧠 FactExtractor: job", job)  # Commented out for performance
-
-        # ... add more user-only patterns as needed ...
 
-        return facts
+# ---------- batch extraction over logs ----------
+
+_worker_extractor: Optional[FactExtractor] = None
+
+
+def _init_worker(rules_path: str):
+    global _worker_extractor
+    _worker_extractor = FactExtractor(rules_path)
+
+
+def _log_user_texts(path: str, start: int, end: int) -> Iterator[Tuple[str, str]]:
+    """(user text, time) for the log lines that start inside the byte range [start, end)."""
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()  # finish the line that straddles `start`; its owner is the previous range
+        while f.tell() < end:
+            raw = f.readline()
+            if not raw:
+                break
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            if "user" in entry:
+                yield entry["user"], entry.get("time")
+            elif entry.get("role") == "user":
+                yield entry.get("text", ""), entry.get("time")
+
+
+def _extract_range(path: str, start: int, end: int) -> Tuple[List[Dict], int]:
+    name = os.path.basename(path)
+    facts, lines = [], 0
+    for text, when in _log_user_texts(path, start, end):
+        lines += 1
+        facts.extend(_worker_extractor.extract_facts(text, f"{name}@{when}"))
+    return facts, lines
+
+
+def _byte_ranges(log_dir: str, chunk_bytes: int) -> List[Tuple[str, int, int]]:
+    ranges = []
+    for name in sorted(os.listdir(log_dir)):
+        if name.endswith(".jsonl"):
+            path = os.path.join(log_dir, name)
+            size = os.path.getsize(path)
+            ranges.extend((path, lo, min(lo + chunk_bytes, size)) for lo in range(0, size, chunk_bytes))
+    return ranges
+
+
+def extract_logs(log_dir: str, rules_path: str = DEFAULT_RULES_PATH, workers: Optional[int] = None,
+                 chunk_bytes: int = 4 << 20, stats: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Facts from every user line in log_dir/*.jsonl, in log order. Files are split into
+    byte ranges (aligned to lines by the reader), each parsed and matched in a worker
+    process, so the JSON decoding scales with the cores too. workers=0 runs inline.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    stats = stats if stats is not None else {}
+    stats.update(lines=0, facts=0)
+    ranges = _byte_ranges(log_dir, chunk_bytes) if os.path.isdir(log_dir) else []
+    if workers <= 0:
+        _init_worker(rules_path)
+        results = (_extract_range(*r) for r in ranges)
+        for facts, lines in results:
+            stats["lines"] += lines
+            stats["facts"] += len(facts)
+            yield from facts
+        return
+    context = multiprocessing.get_context("spawn")  # same start method as memory.backfill
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                             initargs=(rules_path,)) as pool:
+        for facts, lines in pool.map(_extract_range, *zip(*ranges)) if ranges else []:
+            stats["lines"] += lines
+            stats["facts"] += len(facts)
+            yield from facts
+
+
+if __name__ == "__main__":
+    from config.settings import load_config
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Extract profile facts from chat logs")
+    parser.add_argument("--log-dir", default=config.get("log_dir", "data/logs/"))
+    parser.add_argument("--rules", default=config.get("fact_rules_path", DEFAULT_RULES_PATH))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--min-confidence", type=float, default=0.0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats: Dict = {}
+    latest: Dict[str, Dict] = {}
+    for fact in extract_logs(args.log_dir, args.rules, workers=args.workers, stats=stats):
+        if fact["confidence"] >= args.min_confidence:
+            latest[fact["key"]] = fact  # log order: the last mention wins
+    seconds = time.perf_counter() - start
+    for fact in latest.values():
+        print(f"{fact['key']}: {fact['value']}  (confidence {fact['confidence']:.2f}, {fact['source']})")
+    print(f"{stats['lines']:,} user lines, {stats['facts']:,} facts in {seconds:.1f}s "
+          f"({stats['lines'] / max(seconds, 1e-9):,.0f} lines/sec)")
+    log_event("Fact extraction over logs", str(stats))
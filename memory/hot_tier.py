@@ -0,0 +1,170 @@
+# memory/hot_tier.py
+
+import os
+import time
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+HOT_STATE_FILE = "hot.npz"
+
+
+class HotTier:
+    """
+    Capacity-bounded in-RAM working set over a persistent VectorStore (the cold tier).
+    Every row is written to the store first, so the hot tier is only a cache of row
+    ids + vectors and evicting from it never loses data. Each hot entry has an
+    importance score from recency of use, access frequency and whether facts were
+    extracted from it; when the tier is over capacity the least important entries
+    are evicted, and cold rows that answer a query are promoted back in.
+    Removal is swap-with-last, so RAM use stays at `capacity` rows.
+    """
+
+    def __init__(self, dim: int, capacity: int = 20_000, half_life_hours: float = 72.0,
+                 cold_threshold: float = 0.45, evict_fraction: float = 0.05, path: Optional[str] = None):
+        """
+        :param capacity: max rows kept in RAM
+        :param half_life_hours: recency half-life used in the importance score
+        :param cold_threshold: a query goes to the cold tier when its best hot score is below this
+        :param evict_fraction: share of capacity evicted at once when full (amortizes the sort)
+        :param path: file for the hot membership/stats snapshot
+        """
+        self.dim = dim
+        self.capacity = capacity
+        self.half_life = half_life_hours * 3600.0
+        self.cold_threshold = cold_threshold
+        self.evict_batch = max(1, int(capacity * evict_fraction))
+        self.path = path
+        slots = capacity + self.evict_batch
+        self.vectors = np.zeros((slots, dim), dtype=np.float32)
+        self.rows = np.full(slots, -1, dtype=np.int64)       # store row id per slot
+        self.last_access = np.zeros(slots, dtype=np.float64)
+        self.access_count = np.zeros(slots, dtype=np.int32)
+        self.has_facts = np.zeros(slots, dtype=bool)
+        self._slot: Dict[int, int] = {}                        # store row id -> slot
+        self.n = 0
+        self.stats = {"hot_queries": 0, "cold_queries": 0, "promotions": 0, "evictions": 0}
+
+    def __len__(self):
+        return self.n
+
+    def __contains__(self, row: int) -> bool:
+        return row in self._slot
+
+    # ---------- scoring ----------
+
+    def importance(self, now: Optional[float] = None) -> np.ndarray:
+        now = now or time.time()
+        age = np.maximum(now - self.last_access[:self.n], 0.0)
+        recency = np.exp2(-age / self.half_life)
+        frequency = np.minimum(np.log1p(self.access_count[:self.n]) / np.log1p(20), 1.0)
+        return 0.5 * recency + 0.3 * frequency + 0.2 * self.has_facts[:self.n]
+
+    # ---------- membership ----------
+
+    def admit(self, rows: np.ndarray, vectors: np.ndarray, facts: Optional[np.ndarray] = None,
+              last_access: Optional[np.ndarray] = None, access_count: int = 0):
+        """Add store rows (normalized vectors) to the hot set, evicting if over capacity."""
+        now = time.time()
+        for i, row in enumerate(np.asarray(rows, dtype=np.int64)):
+            row = int(row)
+            slot = self._slot.get(row)
+            if slot is None:
+                if self.n >= len(self.rows):
+                    self._evict(now)
+                slot = self.n
+                self.n += 1
+                self._slot[row] = slot
+                self.rows[slot] = row
+                self.vectors[slot] = vectors[i]
+                self.access_count[slot] = access_count
+                self.has_facts[slot] = bool(facts[i]) if facts is not None else False
+                self.last_access[slot] = 0.0
+            self.last_access[slot] = max(self.last_access[slot], last_access[i] if last_access is not None else now)
+        if self.n > self.capacity:
+            self._evict(now)
+
+    def touch(self, rows):
+        """Record an access (a query hit) for hot rows."""
+        now = time.time()
+        for row in rows:
+            slot = self._slot.get(int(row))
+            if slot is not None:
+                self.last_access[slot] = now
+                self.access_count[slot] += 1
+
+    def discard(self, rows):
+        for row in rows:
+            slot = self._slot.pop(int(row), None)
+            if slot is not None:
+                self._remove_slot(slot)
+
+    def _remove_slot(self, slot: int):
+        last = self.n - 1
+        if slot != last:  # move the last entry into the hole
+            for array in (self.vectors, self.rows, self.last_access, self.access_count, self.has_facts):
+                array[slot] = array[last]
+            self._slot[int(self.rows[slot])] = slot
+        self.rows[last] = -1
+        self.n -= 1
+
+    def _evict(self, now: float):
+        excess = self.n - self.capacity + self.evict_batch
+        if excess <= 0:
+            return
+        victims = np.argpartition(self.importance(now), excess - 1)[:excess]
+        for slot in sorted(victims.tolist(), reverse=True):  # high slots first keeps indices valid
+            self._slot.pop(int(self.rows[slot]), None)
+            self._remove_slot(slot)
+        self.stats["evictions"] += excess
+
+    # ---------- search ----------
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k over the hot rows: (store row ids, scores), padded with -1 / -inf."""
+        out_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        if not self.n or k <= 0:
+            return out_ids, out_scores
+        scores = queries @ self.vectors[:self.n].T
+        kk = min(k, self.n)
+        top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk] if kk < self.n else \
+            np.broadcast_to(np.arange(self.n), (len(queries), self.n))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        out_ids[:, :kk] = self.rows[np.take_along_axis(top, order, axis=1)]
+        out_scores[:, :kk] = np.take_along_axis(top_scores, order, axis=1)
+        return out_ids, out_scores
+
+    def needs_cold(self, scores: np.ndarray) -> np.ndarray:
+        """Per query: True when the hot answer is weak (best score low or fewer than k hits)."""
+        return (scores[:, 0] < self.cold_threshold) | ~np.isfinite(scores[:, -1])
+
+    # ---------- persistence ----------
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp.npz"
+        n = self.n
+        np.savez(tmp, rows=self.rows[:n], last_access=self.last_access[:n],
+                 access_count=self.access_count[:n], has_facts=self.has_facts[:n])
+        os.replace(tmp, self.path)
+
+    def load(self, embeddings: np.ndarray, removed) -> bool:
+        """Restore the hot set saved by save(); vectors are re-read from the store."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        state = np.load(self.path)
+        keep = [i for i, row in enumerate(state["rows"]) if row < len(embeddings) and not removed(int(row))]
+        keep = keep[:self.capacity]
+        rows = state["rows"][keep]
+        order = np.argsort(rows)  # sequential reads from the memory map
+        vectors = np.empty((len(rows), self.dim), dtype=np.float32)
+        vectors[order] = embeddings[rows[order]]
+        self.admit(rows, vectors, state["has_facts"][keep], last_access=state["last_access"][keep])
+        for row, count in zip(rows, state["access_count"][keep]):
+            self.access_count[self._slot[int(row)]] = count
+        return True
+
+    def snapshot(self) -> Dict:
+        return dict(self.stats, size=self.n, capacity=self.capacity)
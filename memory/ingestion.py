@@ -0,0 +1,202 @@
+# memory/ingestion.py
+
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+from utils.logger import log_event
+
+
+def iter_chunks(source: Union[str, io.TextIOBase, Iterable[str]], chunk_chars: int = 1500,
+                overlap: int = 200, read_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    Stream overlapping text chunks from a string, text file object or iterable of strings.
+    Only about one read block plus one chunk is held in memory, whatever the document size.
+    Chunks prefer to end on a paragraph/sentence/word boundary.
+    """
+    if overlap >= chunk_chars:
+        raise ValueError("overlap must be smaller than chunk_chars")
+    if isinstance(source, str):
+        blocks = (source[i:i + read_size] for i in range(0, len(source), read_size))
+    elif hasattr(source, "read"):
+        blocks = iter(lambda: source.read(read_size), "")
+    else:
+        blocks = iter(source)
+
+    buffer = ""
+    for block in blocks:
+        buffer += block
+        while len(buffer) >= chunk_chars:
+            cut = _find_cut(buffer, chunk_chars, overlap)
+            chunk = buffer[:cut].strip()
+            if chunk:
+                yield chunk
+            buffer = buffer[max(cut - overlap, 1):]
+    tail = buffer.strip()
+    if tail:
+        yield tail
+
+
+def _find_cut(text: str, limit: int, overlap: int) -> int:
+    window = text[:limit]
+    floor = overlap + 1  # always advance past the overlap
+    for sep in ("\n\n", ". ", "\n", " "):
+        pos = window.rfind(sep)
+        if pos >= floor:
+            return pos + len(sep)
+    return limit
+
+
+class DocumentIngestor:
+    """
+    Streams a large document into VectorMemory: overlapping chunks are embedded in
+    batches and inserted in bulk, with at most `max_inflight` batches pending so memory
+    stays flat. With an `index_service` the batches are encoded on its worker thread,
+    queued behind live turns and queries instead of competing with them for the CPU;
+    standalone, a small pool of `workers` threads encodes them. Optionally builds a map-reduce summary with bounded
+    LLM concurrency. Progress is reported through `on_progress(name, done_chars, total_chars)`.
+    """
+
+    def __init__(self, vector_memory, llm_engine=None, chunk_chars: int = 1500, overlap: int = 200,
+                 batch_size: int = 32, workers: int = 2, max_llm_concurrency: int = 2,
+                 on_progress: Optional[Callable[[str, int, Optional[int]], None]] = None,
+                 index_service=None):
+        self.vector = vector_memory
+        self.index_service = index_service  # EmbeddingService: index writes go through its worker thread
+        self.llm = llm_engine
+        self.chunk_chars = chunk_chars
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.max_inflight = max(1, workers)
+        self.max_llm_concurrency = max(1, max_llm_concurrency)
+        self.on_progress = on_progress
+        self.pool = None
+        if index_service is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.max_inflight, thread_name_prefix="ingest")
+
+    async def ingest_file(self, path: str, summarize: bool = False) -> dict:
+        total = os.path.getsize(path)
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return await self.ingest(f, os.path.basename(path), total_chars=total, summarize=summarize)
+
+    async def ingest_text(self, text: str, name: str = "pasted text", summarize: bool = False) -> dict:
+        return await self.ingest(text, name, total_chars=len(text), summarize=summarize)
+
+    async def ingest(self, source, name: str, total_chars: Optional[int] = None, summarize: bool = False) -> dict:
+        """
+        :return: {"chunks": int, "summary": str or None}
+        """
+        loop = asyncio.get_running_loop()
+        now = datetime.now(timezone.utc).isoformat()
+        inflight = []  # [(future, texts)]
+        chunks_done = 0
+        chars_done = 0
+        summarizer = _MapReduceSummary(self.llm, self.max_llm_concurrency) if (summarize and self.llm) else None
+
+        async def flush_one():
+            nonlocal chunks_done
+            future, texts = inflight.pop(0)
+            vectors = await future
+            metas = [{"timestamp": now, "source": name, "chunk": chunks_done + i} for i in range(len(texts))]
+            await self._write(self.vector.add_batch, texts, metas, vectors)
+            chunks_done += len(texts)
+            self._report(name, chars_done, total_chars)
+
+        batch: List[str] = []
+        for chunk in iter_chunks(source, self.chunk_chars, self.overlap):
+            batch.append(chunk)
+            chars_done += len(chunk) - (self.overlap if chars_done else 0)  # approximate read position
+            if summarizer:
+                await summarizer.add(chunk)
+            if len(batch) >= self.batch_size:
+                inflight.append((self._encode(loop, batch), batch))
+                batch = []
+                if len(inflight) >= self.max_inflight:
+                    await flush_one()
+        if batch:
+            inflight.append((self._encode(loop, batch), batch))
+        while inflight:
+            await flush_one()
+
+        summary = await summarizer.finish() if summarizer else None
+        if summary:
+            await self._write(self.vector.add_memory, f"Summary of {name}: {summary}", {"timestamp": now, "source": name})
+        self._report(name, total_chars or chars_done, total_chars or chars_done)
+        log_event("DocumentIngestor done", f"{name}: {chunks_done} chunks")
+        return {"chunks": chunks_done, "summary": summary}
+
+    def _encode(self, loop, texts: List[str]) -> asyncio.Future:
+        if self.index_service is not None:
+            return asyncio.ensure_future(self.index_service.encode_many(texts))
+        return loop.run_in_executor(self.pool, self.vector.encode_batch, texts)
+
+    async def _write(self, fn, *args):
+        if self.index_service is not None:
+            await self.index_service.run(fn, *args)
+        else:
+            fn(*args)
+
+    def _report(self, name: str, done: int, total: Optional[int]):
+        if self.on_progress:
+            try:
+                self.on_progress(name, min(done, total) if total else done, total)
+            except Exception as e:
+                log_event("DocumentIngestor on_progress error", str(e))
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+
+
+class _MapReduceSummary:
+    """
+    Map: summarize each chunk (at most `concurrency` LLM calls in flight).
+    Reduce: whenever `fanout` partial summaries accumulate, fold them into one,
+    so only O(fanout) partial summaries are ever held. LLM failure replies
+    ("Error: ..." / "Sorry, ...") are dropped rather than summarized.
+    """
+
+    def __init__(self, llm_engine, concurrency: int, fanout: int = 8):
+        self.llm = llm_engine
+        self.sem = asyncio.Semaphore(concurrency)
+        self.fanout = fanout
+        self.pending = set()
+        self.partials: List[str] = []
+
+    async def add(self, chunk: str):
+        await self.sem.acquire()  # backpressure: chunk reading waits for a free LLM slot
+        task = asyncio.ensure_future(self._map(chunk))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+        if len(self.partials) >= self.fanout:
+            await self._reduce()
+
+    async def _map(self, chunk: str):
+        try:
+            text = await self.llm.get_response(
+                "Summarize the following text in 2-3 sentences, keeping key facts and names:\n\n"
+                f"{chunk}\n\nSummary:"
+            )
+            if text and not text.startswith(("Error:", "Sorry,")):
+                self.partials.append(text.strip())
+        finally:
+            self.sem.release()
+
+    async def _reduce(self):
+        parts, self.partials = self.partials, []
+        async with self.sem:
+            text = await self.llm.get_response(
+                "Combine these partial summaries of one document into a single summary of at most "
+                "5 sentences:\n\n" + "\n".join(f"- {p}" for p in parts) + "\n\nSummary:"
+            )
+        ok = text and not text.startswith(("Error:", "Sorry,"))
+        self.partials.insert(0, text.strip() if ok else " ".join(parts)[:1000])
+
+    async def finish(self) -> Optional[str]:
+        if self.pending:
+            await asyncio.gather(*list(self.pending))
+        if len(self.partials) > 1:
+            await self._reduce()
+        return self.partials[0] if self.partials else None
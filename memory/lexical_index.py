@@ -0,0 +1,249 @@
+# memory/lexical_index.py
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from memory.backfill import iter_log_turns, turn_text, normalize_timestamp
+from utils.logger import log_event
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY, hash BLOB UNIQUE, text TEXT, source TEXT, timestamp TEXT,
+    logged INTEGER NOT NULL DEFAULT 0
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    text, content='docs', content_rowid='id', tokenize="unicode61 tokenchars '_'"
+);
+CREATE TABLE IF NOT EXISTS vector_docs (row INTEGER PRIMARY KEY, doc INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS vector_docs_doc ON vector_docs (doc);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+MAX_QUERY_TERMS = 32
+
+
+def _doc_hash(text: str) -> bytes:
+    return hashlib.blake2b(" ".join(text.lower().split()).encode("utf-8"), digest_size=8).digest()
+
+
+def fts_query(query: str) -> Optional[str]:
+    """Free text -> FTS5 OR-query of quoted terms (quoting keeps identifiers/numbers literal)."""
+    terms = list(dict.fromkeys(t.lower() for t in re.findall(r"\w+", query)))[:MAX_QUERY_TERMS]
+    return " OR ".join(f'"{t}"' for t in terms) or None
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[str]:
+    """Merge ranked lists of texts: score(t) = sum over lists of 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, text in enumerate(ranking):
+            scores[text] = scores.get(text, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class LexicalIndex:
+    """
+    BM25 keyword index (SQLite FTS5) over conversation logs and VectorMemory texts.
+    Finds exact names, numbers and code identifiers that embeddings blur, and answers
+    without touching the encoder. Each vector row maps to the doc holding its text, so
+    a hit is the same string the vector search returns and the two fuse in RRF.
+    VectorMemory reports added, updated and removed rows as they happen (index_rows /
+    update_row / remove_rows); sync() catches up on log lines (per-file byte offsets)
+    and rows added while the index was not attached (row watermark). Duplicate texts
+    are stored once; a doc is deleted when no row and no log line refers to it.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade()
+        self._conn.executescript(SCHEMA)
+
+    def _upgrade(self):
+        """Indexes from before row mapping cannot tell removed rows apart; rebuild them from scratch."""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(docs)")]
+        if not columns or "logged" in columns:
+            return
+        with self._conn:
+            self._conn.execute("DROP TABLE IF EXISTS docs_fts")
+            self._conn.execute("DROP TABLE docs")
+            self._conn.execute("DELETE FROM meta")  # log offsets and row watermark start over
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    # ---------- writes ----------
+
+    def _insert(self, text: str, source: str, timestamp: Optional[str], logged: bool = False) -> Tuple[int, bool]:
+        """(doc id, newly added) for a text; an existing doc with the same text is reused. Caller holds the lock."""
+        digest = _doc_hash(text)
+        cur = self._conn.execute(
+            "INSERT OR IGNORE INTO docs (hash, text, source, timestamp, logged) VALUES (?, ?, ?, ?, ?)",
+            (digest, text, source, timestamp, int(logged))
+        )
+        if cur.rowcount:
+            self._conn.execute("INSERT INTO docs_fts (rowid, text) VALUES (?, ?)", (cur.lastrowid, text))
+            return cur.lastrowid, True
+        doc = self._conn.execute("SELECT id FROM docs WHERE hash=?", (digest,)).fetchone()[0]
+        if logged:
+            self._conn.execute("UPDATE docs SET logged=1 WHERE id=?", (doc,))
+        return doc, False
+
+    def _release(self, doc: int):
+        """Delete a doc once neither a log line nor a vector row refers to it. Caller holds the lock."""
+        if self._conn.execute("SELECT 1 FROM vector_docs WHERE doc=? LIMIT 1", (doc,)).fetchone():
+            return
+        row = self._conn.execute("SELECT text FROM docs WHERE id=? AND logged=0", (doc,)).fetchone()
+        if row:
+            # external-content FTS5 tables need the old text to remove its terms
+            self._conn.execute("INSERT INTO docs_fts (docs_fts, rowid, text) VALUES ('delete', ?, ?)", (doc, row[0]))
+            self._conn.execute("DELETE FROM docs WHERE id=?", (doc,))
+
+    def add_many(self, docs: Iterable[Tuple[str, str, Optional[str]]]) -> int:
+        """Insert (text, source, timestamp) log lines in one transaction; returns how many were new."""
+        added = 0
+        with self._lock:
+            for text, source, timestamp in docs:
+                if text:
+                    added += self._insert(text, source, timestamp, logged=True)[1]
+            self._conn.commit()
+        return added
+
+    def index_rows(self, first_row: int, metas: List[Dict], skip=None) -> int:
+        """Map vector rows first_row.. to the docs of their texts; `skip(row)` leaves a row out (removed)."""
+        added = 0
+        with self._lock:
+            for row, meta in enumerate(metas, first_row):
+                text = meta.get("text", "")
+                if not text or (skip is not None and skip(row)):
+                    continue
+                doc, new = self._insert(text, meta.get("source", "memory"), meta.get("timestamp"))
+                # a live update that got here first wins over a catch-up read of older metadata
+                self._conn.execute("INSERT OR IGNORE INTO vector_docs (row, doc) VALUES (?, ?)", (row, doc))
+                added += new
+            end = first_row + len(metas)
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('vector_rows', "
+                               "MAX(?, COALESCE((SELECT CAST(value AS INTEGER) FROM meta "
+                               "WHERE key='vector_rows'), 0)))", (end,))
+            self._conn.commit()
+        return added
+
+    def update_row(self, row: int, meta: Dict):
+        """A vector row's text changed (near-duplicate merged into it): repoint it to the new doc."""
+        with self._lock:
+            old = self._conn.execute("SELECT doc FROM vector_docs WHERE row=?", (row,)).fetchone()
+            text = meta.get("text", "")
+            if text:
+                doc, _ = self._insert(text, meta.get("source", "memory"), meta.get("timestamp"))
+                self._conn.execute("INSERT OR REPLACE INTO vector_docs (row, doc) VALUES (?, ?)", (row, doc))
+            else:
+                self._conn.execute("DELETE FROM vector_docs WHERE row=?", (row,))
+            if old:
+                self._release(old[0])
+            self._conn.commit()
+
+    def remove_rows(self, rows: Iterable[int]):
+        """Drop removed vector rows; their docs go too unless still referenced."""
+        with self._lock:
+            for row in rows:
+                old = self._conn.execute("SELECT doc FROM vector_docs WHERE row=?", (int(row),)).fetchone()
+                if old:
+                    self._conn.execute("DELETE FROM vector_docs WHERE row=?", (int(row),))
+                    self._release(old[0])
+            self._conn.commit()
+
+    def _get_meta(self, key: str, default: str = "0") -> str:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+            self._conn.commit()
+
+    def sync_logs(self, log_dir: str, batch: int = 5000) -> int:
+        """Index log lines appended since the last sync."""
+        if not os.path.isdir(log_dir):
+            return 0
+        added = 0
+        for name in sorted(os.listdir(log_dir)):
+            if not name.endswith(".jsonl"):
+                continue
+            key = f"log:{name}"
+            offset = int(self._get_meta(key))
+            docs = []
+            for turn, end in iter_log_turns(os.path.join(log_dir, name), offset):
+                docs.append((turn_text(turn["user"], turn["assistant"]), name, normalize_timestamp(turn["time"])))
+                offset = end
+                if len(docs) >= batch:
+                    added += self.add_many(docs)
+                    self._set_meta(key, offset)
+                    docs = []
+            added += self.add_many(docs)
+            self._set_meta(key, offset)
+        return added
+
+    def sync_vector(self, vector_memory, batch: int = 5000) -> int:
+        """Index VectorMemory rows added while the index was not attached (older stores, earlier runs)."""
+        end = vector_memory.size
+        start = int(self._get_meta("vector_rows"))
+        if start > end:
+            with self._lock:  # store was rebuilt; row ids no longer match
+                self._conn.execute("DELETE FROM vector_docs")
+                self._conn.execute("DELETE FROM meta WHERE key='vector_rows'")
+                self._conn.commit()
+            start = 0
+        if vector_memory.store is not None:
+            metas = vector_memory.store.iter_metadata(start, end)  # one sequential read
+        else:
+            metas = iter(vector_memory.metadata[start:end])
+        added, first, chunk = 0, start, []
+        for meta in metas:
+            chunk.append(meta)
+            if len(chunk) >= batch:
+                added += self.index_rows(first, chunk, skip=vector_memory.is_removed)
+                first, chunk = first + len(chunk), []
+        added += self.index_rows(first, chunk, skip=vector_memory.is_removed)
+        return added
+
+    def sync(self, log_dir: Optional[str] = None, vector_memory=None) -> Dict:
+        stats = {"logs": 0, "memory": 0}
+        try:
+            if log_dir:
+                stats["logs"] = self.sync_logs(log_dir)
+            if vector_memory is not None:
+                stats["memory"] = self.sync_vector(vector_memory)
+        except Exception as e:
+            log_event("LexicalIndex sync error", str(e))
+        log_event("LexicalIndex synced", str(stats))
+        return stats
+
+    # ---------- search ----------
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """BM25-ranked matches, best first: [{"text", "source", "timestamp", "score"}]."""
+        match = fts_query(query)
+        if match is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.text, d.source, d.timestamp, bm25(docs_fts) AS score "
+                "FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid "
+                "WHERE docs_fts MATCH ? ORDER BY score LIMIT ?",
+                (match, limit)
+            ).fetchall()
+        # FTS5 bm25() is lower-is-better; flip the sign so higher means more relevant
+        return [{"text": t, "source": s, "timestamp": ts, "score": -score} for t, s, ts, score in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -2,13 +2,27 @@
 
 import os
 import json
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone, date
 from typing import List, Dict, Optional
 from memory.fact_extractor import FactExtractor
 from utils.logger import log_event
 from memory.vector_memory import VectorMemory
+from memory.embedding_context import TurnEmbeddingContext
+from memory.embedding_cache import EmbeddingCache
+from memory.embedding_service import EmbeddingService
+from memory.lexical_index import LexicalIndex, reciprocal_rank_fusion
 from memory.behavior_analyzer import BehaviorAnalyzer
+from memory.behavior_classifier import BehaviorClassifier
 from memory.summarizer import Summarizer
+from memory.extractive_summary import ExtractiveSummarizer
+from memory.turn_analyzer import FusedTurnAnalyzer
+from memory.ingestion import DocumentIngestor
+from memory.digests import DigestIndex
+from memory.sqlite_backend import SQLiteBackend
 from llm.engine import LLMEngine
 from config.settings import load_config
 
@@ -20,19 +34,42 @@ from config.settings import load_config
 
 
 class ProfileStore:
-    """Simple JSON key-value store."""
-    def __init__(self, path: str):
+    """
+    JSON key-value store with write-behind persistence. Updates change the in-RAM
+    dict right away and bump `version` (only when a value really changed, so readers
+    can cache derived data per version); the file is rewritten at most once per
+    `flush_delay_s` on a timer thread, never on the caller's (event loop) thread.
+    Writes are atomic (temp file + fsync + rename), so a crash leaves either the old
+    or the new profile, never a torn one. With a SQLiteBackend, only the changed keys
+    are upserted (with history) instead of rewriting the JSON file.
+    """
+    def __init__(self, path: str, flush_delay_s: float = 1.0, backend=None):
         self.path = path
+        self.backend = backend
+        self._changed = set()
+        self.flush_delay_s = flush_delay_s
+        self.version = 0
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._batch_depth = 0
+        self._batch_changed = False
         self.data = self._load()
 
     def _load(self):
+        if self.backend is not None:
+            return self.backend.load_profile()
         try:
             with open(self.path, "r", encoding="utf-8") as f:
                 return json.load(f)
         except FileNotFoundError:
             return {}
         except json.JSONDecodeError as e:
-            log_event("ProfileStore JSON error", f"Corrupted profile file: {e}. Creating new profile.")
+            # keep the unreadable file for inspection instead of overwriting it on the next save
+            backup = f"{self.path}.corrupt-{int(time.time())}"
+            os.replace(self.path, backup)
+            log_event("ProfileStore JSON error", f"Corrupted profile file: {e}. Moved to {backup}; creating new profile.")
             return {}
         except Exception as e:
             log_event("ProfileStore load error", f"Error loading profile: {e}. Creating new profile.")
@@ -42,25 +79,121 @@ class ProfileStore:
         return self.data.get(key)
 
     def get_all(self) -> Dict:
-        return self.data
+        with self._lock:
+            return dict(self.data)
 
     def set(self, key: str, value):
-        self.data[key] = value
-        self._save()
+        self.update({key: value})
 
-    def _save(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=2)
+    def update(self, values: Dict) -> int:
+        """Apply several keys as one change (one version bump, one flush); returns keys changed."""
+        with self._lock:
+            changed = 0
+            for key, value in values.items():
+                if key in self.data and self.data[key] == value:
+                    continue
+                self.data[key] = value
+                self._changed.add(key)
+                changed += 1
+            if changed:
+                self._dirty = True
+                self._batch_changed = True
+                if not self._batch_depth:
+                    self._commit()
+            return changed
+
+    @contextmanager
+    def transaction(self):
+        """Group set()/update() calls into one change: one version bump, one scheduled flush."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._batch_changed:
+                    self._commit()
+
+    def _commit(self):
+        self._batch_changed = False
+        self.version += 1
+        if self._timer is None:  # a pending flush will pick up this change too
+            self._timer = threading.Timer(self.flush_delay_s, self.flush)
+            self._timer.start()
+
+    def flush(self):
+        """Write the profile now if it has unsaved changes."""
+        with self._write_lock:  # keeps writes in order; updates only wait for the snapshot
+            with self._lock:
+                self._timer = None
+                if not self._dirty:
+                    return
+                if self.backend is not None:
+                    payload = {key: self.data[key] for key in self._changed}
+                else:
+                    payload = json.dumps(self.data, indent=2)
+                changed, self._changed = self._changed, set()
+                self._dirty = False
+            try:
+                if self.backend is not None:
+                    self.backend.write_profile(payload)
+                else:
+                    self._save(payload)
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                    self._changed |= changed
+                log_event("ProfileStore save error", str(e))
+
+    def _save(self, payload: str):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def close(self):
+        """Cancel the pending timer and write any unsaved changes."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+        self.flush()
 
 
 class SessionLogger:
-    """Logs user/assistant turns in JSONL by day."""
-    def __init__(self, log_dir: str):
+    """
+    Logs user/assistant turns in JSONL by day. With a SQLiteBackend, turns are also
+    stored in its indexed `turns` table under this process's session id (numbered
+    in order); log() still writes the JSONL files because backfill and keyword
+    indexing read them, log_turn() writes only the table.
+    """
+    def __init__(self, log_dir: str, backend=None):
         self.dir = log_dir
+        self.backend = backend
+        self.session = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        self._seq = 0
+        self._seq_lock = threading.Lock()
         os.makedirs(self.dir, exist_ok=True)
 
+    def _next_seq(self) -> int:
+        with self._seq_lock:
+            self._seq += 1
+            return self._seq
+
+    def log_turn(self, user_msg: str, assistant_msg: str):
+        """One user/assistant exchange into the backend's turns table, as one transaction."""
+        now = datetime.now(timezone.utc).isoformat()
+        seq = self._next_seq()
+        self.backend.add_turns([(self.session, seq, now, "user", user_msg),
+                                (self.session, seq, now, "assistant", assistant_msg)])
+
     def log(self, role: str, text: str):
         now = datetime.now(timezone.utc).isoformat()
+        if self.backend is not None:
+            self.backend.add_turns([(self.session, self._next_seq(), now, role, text)])
         entry = {"time": now, "role": role, "text": text}
         filename = os.path.join(self.dir, f"{date.today()}.jsonl")
         # ensure directory exists
@@ -72,66 +205,171 @@ class SessionLogger:
 
 class MemoryManager:
     """Master memory manager: logs chat, extracts facts, updates profile, semantic memory."""
-    def __init__(self, profile_path="data/profile.json", log_dir="data/logs/", llm_engine: Optional[LLMEngine] = None):
-        self.profile = ProfileStore(profile_path)
-        self.logger = SessionLogger(log_dir)
-        self.fact_extractor = FactExtractor()
-        self.vector = VectorMemory()
+    def __init__(self, profile_path="data/profile.json", log_dir="data/logs/", llm_engine: Optional[LLMEngine] = None,
+                 fused_analysis: bool = False, ingest_threshold_chars: int = 4000,
+                 vector_store_path: Optional[str] = None, vector_options: Optional[Dict] = None,
+                 lexical_index_path: Optional[str] = None, memory_search_mode: str = "hybrid",
+                 dedup_consolidate_every: int = 200, digest_path: Optional[str] = None,
+                 digest_interval_s: float = 3600.0, backend_path: Optional[str] = None,
+                 summary_mode: str = "extractive", fact_rules_path: str = "config/fact_rules.yaml",
+                 behavior_prototypes_path: Optional[str] = "config/behavior_prototypes.yaml"):
+        # Optional single SQLite file for profile, turns and RAM-mode vector rows
+        self.backend = SQLiteBackend(backend_path) if backend_path else None
+        if self.backend is not None:
+            if vector_store_path:
+                log_event("MemoryManager: SQLite backend holds profile and turns",
+                          f"vector rows stay in {vector_store_path}")
+            self.backend.migrate(profile_path=profile_path)
+            threading.Thread(target=self.backend.migrate, kwargs={"log_dir": log_dir}, daemon=True,
+                             name="backend-migrate").start()
+        self.profile = ProfileStore(profile_path, backend=self.backend)
+        self.logger = SessionLogger(log_dir, backend=self.backend)
+        self.fact_extractor = FactExtractor(fact_rules_path)
+        vector_options = vector_options or {}
+        # Keyword (BM25) index over logs and memory texts; VectorMemory keeps it in step with its rows
+        self.lexical = LexicalIndex(lexical_index_path) if lexical_index_path else None
+        self.memory_search_mode = memory_search_mode if self.lexical else "vector"  # vector | lexical | hybrid
+        try:
+            self.vector = VectorMemory(store_path=vector_store_path, backend=self.backend, lexical=self.lexical,
+                                       **vector_options)
+        except ValueError as e:
+            # e.g. store built with another embedding model; keep running with RAM-only memory
+            log_event("MemoryManager: vector store unavailable", str(e))
+            self.vector = VectorMemory(**vector_options)  # row ids would not match the indexed store
         
+        # Encoder and index work run on one worker thread, off the event loop
+        self.embedder = EmbeddingService(self.vector)
+
+        # Periodic background sweep for near-duplicates that bypassed the insert check
+        self.dedup_consolidate_every = dedup_consolidate_every
+        self._turns_since_consolidate = 0
+        self._consolidate_tasks = set()
+
+        # Log lines and rows from before the index was attached are caught up in the background
+        if self.lexical:
+            threading.Thread(target=self.lexical.sync, args=(log_dir, self.vector if self.vector.lexical else None),
+                             daemon=True,
+                             name="lexical-sync").start()
+
         # Use provided LLM engine or create one
         if llm_engine is None:
             config = load_config()
             llm_engine = LLMEngine(config)
         
-        self.behavior = BehaviorAnalyzer(llm_engine=llm_engine)
-        self.summarizer = Summarizer()
+        # Mood / tone / cues from the message embedding; the LLM only for open-ended fields
+        classifier = BehaviorClassifier(behavior_prototypes_path) if behavior_prototypes_path else None
+        self.behavior = BehaviorAnalyzer(llm_engine=llm_engine, classifier=classifier, encoder=self.embedder.encode)
+        self.summarizer = Summarizer(llm_engine=llm_engine)
+        # Long snippets are summarized locally from sentence embeddings; the LLM only
+        # when summary_mode is "llm" or the extractive result is rejected
+        self.extractive = ExtractiveSummarizer(self.vector.encode_batch) if summary_mode == "extractive" else None
+        # Day/week digests for coarse-to-fine retrieval; built by start_background()
+        self.digests = None
+        if digest_path and self.vector.store is not None:
+            self.digests = DigestIndex(self.embedder, self.summarizer, digest_path,
+                                       interval_s=digest_interval_s)
+        # One structured LLM call per turn for facts + behavior + summary (optional)
+        self.fused_analyzer = FusedTurnAnalyzer(llm_engine, self.fact_extractor) if fused_analysis else None
+        # Long pasted text / dropped files are chunked and embedded in bulk instead of as one vector
+        self.ingestor = DocumentIngestor(self.vector, llm_engine, index_service=self.embedder)
+        self.ingest_threshold_chars = ingest_threshold_chars
+        self._ingest_tasks = set()  # background ingestion of long pasted text
+        # Running totals across turns for TurnEmbeddingContext
+        self.embedding_stats = {"encoder_calls": 0, "encoder_calls_avoided": 0}
 
         # Future integrations:
         # self.vector = VectorMemory(...)
         # self.summarizer = Summarizer(...)
         # self.behavior = BehaviorAnalyzer(...)
 
-    async def process_turn(self, user_msg: str, assistant_msg: str):
+    def embedding_cache_stats(self) -> Optional[Dict]:
+        """Hit/miss counters of the embedding cache, or None when caching is off."""
+        cache = self.vector.model
+        return cache.snapshot() if isinstance(cache, EmbeddingCache) else None
+
+    def new_turn_context(self, user_msg: str) -> TurnEmbeddingContext:
+        """
+        Create the per-turn embedding context; the user message is encoded lazily, at most once.
+        """
+        return TurnEmbeddingContext(self.vector.encode, user_msg, stats=self.embedding_stats,
+                                    async_encoder=self.embedder.encode)
+
+    async def process_turn(self, user_msg: str, assistant_msg: str,
+                           context: Optional[TurnEmbeddingContext] = None):
         """
         Called after every user-assistant exchange.
         Must be awaited by caller.
+        If `context` is given, the memory is keyed on the turn's user-message embedding
+        instead of encoding the snippet again. Long input is ingested as a document in
+        a background task, which this call does not wait for.
         """
         # 1. Log raw turns
         # self.logger.log("user", user_msg)  # Commented out for performance
         # self.logger.log("assistant", assistant_msg)  # Commented out for performance
+        if self.backend is not None:
+            # one indexed insert per turn, off the event loop (no JSONL write)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.logger.log_turn, user_msg, assistant_msg)
+            except Exception as e:
+                log_event("MemoryManager: turn logging failed", str(e))
 
-        # 2. Extract facts to profile
-        messages = [
-            {"role": "user", "content": user_msg}
-            # ,
-            # {"role": "assistant", "content": assistant_msg}
-        ]
-        facts = self.fact_extractor.extract(messages)
-        for k, v in facts:
-            self.profile.set(k, v)
-            # log_event("🧠 MemoryManager: Saved fact", f"{k}: {v}")  # Commented out for performance
-
-        # 3. Behavior analysis
-        patterns = await self.behavior.analyze(messages)
-        if patterns:
-            # store under a "behavior" key or break out subkeys
-            self.profile.set("behavior", patterns)
-            # log_event("🧠 MemoryManager: Saved behavior", str(patterns))  # Commented out for performance
-
-        # 4. Summarize & add to vector memory
         now = datetime.now(timezone.utc).isoformat()
+        if len(user_msg) > self.ingest_threshold_chars:
+            # Treat long input as a document: chunked into vector memory in the background
+            # (progress goes to the ingestor's on_progress); only its head is kept in the turn snippet
+            task = asyncio.get_running_loop().create_task(self.ingestor.ingest_text(user_msg, name="pasted text"))
+            self._ingest_tasks.add(task)
+            task.add_done_callback(self._ingest_done)
+            user_msg = user_msg[:300] + " [...]"
         snippet = f"User: {user_msg} Assistant: {assistant_msg}"
-        # if very long, summarize; else use snippet directly
-        if len(snippet) > 500:
-            try:
-                summary = await self.summarizer.summarize(snippet)
-            except Exception as e:
-                log_event("MemoryManager: Summarizer failed", str(e))
-                summary = snippet
+
+        if self.fused_analyzer is not None:
+            # 2-4. Facts, behavior and summary from a single LLM request
+            analysis = await self.fused_analyzer.analyze(user_msg, assistant_msg, want_summary=len(snippet) > 500)
+            facts = analysis["facts"]
+            patterns = analysis["behavior"]
+            summary = analysis["summary"] or snippet
         else:
+            # 2. Extract facts to profile
+            messages = [
+                {"role": "user", "content": user_msg}
+                # ,
+                # {"role": "assistant", "content": assistant_msg}
+            ]
+            facts = self.fact_extractor.extract(messages)
+
+            # 3. Behavior analysis
+            vector = await context.aencode(context.text) if context is not None else None
+            patterns = await self.behavior.analyze(messages, vector=vector)
+
+            # 4. Summarize: if very long, summarize; else use snippet directly
             summary = snippet
+            if len(snippet) > 500:
+                extracted = None
+                if self.extractive is not None:
+                    extracted = await self.embedder.run(self.extractive.summarize, snippet)
+                if extracted is not None:
+                    summary = extracted
+                else:
+                    try:
+                        summary = await self.summarizer.summarize(snippet)
+                    except Exception as e:
+                        log_event("MemoryManager: Summarizer failed", str(e))
+
+        # One in-memory update per turn; the file is written behind on a timer thread
+        with self.profile.transaction():
+            self.profile.update(dict(facts))
+            if patterns:
+                # store under a "behavior" key or break out subkeys
+                self.profile.set("behavior", patterns)
+
+        # 5. Add to vector memory
         try:
-            self.vector.add_memory(summary, metadata={"timestamp": now})
+            vector = await context.aencode(context.text) if context is not None else None
+            # the fact count feeds the hot tier's importance score
+            # also reaches the lexical index under the same row and text
+            await self.embedder.add_memory(summary, metadata={"timestamp": now, "facts": len(facts)}, vector=vector)
+            self._maybe_consolidate()
             # log_event("🧠 MemoryManager: Added to vector memory", summary[:80] + ("..." if len(summary)>80 else ""))  # Commented out for performance
         except Exception as e:
             log_event("MemoryManager: VectorMemory add failed", str(e))
@@ -141,6 +379,31 @@ class MemoryManager:
         # - generate vector summary
         # - semantic store using vector memory
 
+    def _ingest_done(self, task: asyncio.Task):
+        self._ingest_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log_event("MemoryManager: ingestion failed", str(task.exception()))
+
+    def _maybe_consolidate(self):
+        if self.vector.dedup is None:
+            return
+        self._turns_since_consolidate += 1
+        if self._turns_since_consolidate >= self.dedup_consolidate_every:
+            self._turns_since_consolidate = 0
+            # queued on the embedding worker; the turn does not wait for it
+            task = asyncio.ensure_future(self.embedder.run(self.vector.dedup.consolidate))
+            self._consolidate_tasks.add(task)
+            task.add_done_callback(self._consolidate_done)
+
+    def _consolidate_done(self, task: asyncio.Future):
+        self._consolidate_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log_event("MemoryManager: dedup consolidate failed", str(task.exception()))
+
+    def dedup_stats(self) -> Optional[Dict]:
+        """Near-duplicate counters (checked / merged / consolidated), or None when dedup is off."""
+        return dict(self.vector.dedup.stats) if self.vector.dedup is not None else None
+
     def get_profile(self) -> Dict:
         # Return current in-memory profile dict
         return self.profile.get_all()
@@ -148,14 +411,69 @@ class MemoryManager:
     def get_fact(self, key: str):
         return self.profile.get(key)
 
-    def retrieve_memory(self, query: str, top_k: int = 3) -> List[str]:
+    async def aretrieve_memory(self, query: str, top_k: int = 3,
+                               context: Optional[TurnEmbeddingContext] = None, since=None, until=None) -> List[str]:
         """
-        Return top memory snippets relevant to `query`.
+        Return top memory snippets relevant to `query`, optionally only from the
+        time window [since, until) (datetime, ISO string or epoch seconds).
+        Encoding and search run on the embedding worker thread, the keyword lookup
+        on the default executor alongside it.
         """
         try:
-            hits = self.vector.query(query, top_k=top_k)
-            # each hit is a dict with "text" and metadata
-            return [hit.get("text", "") for hit in hits]
+            windowed = since is not None or until is not None
+            loop = asyncio.get_running_loop()
+            lexical_future = None if windowed else loop.run_in_executor(None, self._lexical_hits, query, top_k)
+            if self.memory_search_mode == "lexical" and not windowed:
+                return (await lexical_future)[:top_k]
+            vector = await context.aencode(query) if context is not None else None
+            hits = None
+            if self.digests is not None and not windowed:
+                if vector is None:
+                    vector = await self.embedder.encode(query)
+                hits = await self.digests.asearch(vector, top_k)
+            if hits is None:
+                hits = await self.embedder.query(query, top_k=top_k, vector=vector, since=since, until=until)
+            lexical = await lexical_future if lexical_future is not None else []
+            return self._fuse([hit.get("text", "") for hit in hits], lexical, top_k)
         except Exception as e:
             log_event("MemoryManager: retrieve_memory error", str(e))
-            return []
\ No newline at end of file
+            return []
+
+    async def list_memories(self, since=None, until=None, limit: Optional[int] = 50,
+                            newest_first: bool = True) -> List[Dict]:
+        """
+        Memories stored in the time window [since, until), straight from the time index
+        (no embedding). Each item is the metadata dict with "text" and "timestamp".
+        """
+        return await self.embedder.run(lambda: self.vector.list_window(since, until, limit, newest_first))
+
+    def _lexical_hits(self, query: str, top_k: int) -> List[str]:
+        if self.memory_search_mode == "vector":
+            return []
+        return [hit["text"] for hit in self.lexical.search(query, limit=2 * top_k)]
+
+    @staticmethod
+    def _fuse(vector_hits: List[str], lexical_hits: List[str], top_k: int) -> List[str]:
+        if not lexical_hits:
+            return vector_hits
+        return reciprocal_rank_fusion([vector_hits, lexical_hits])[:top_k]
+
+    def start_background(self):
+        """Start background jobs that need the event loop (digest consolidation)."""
+        if self.digests is not None:
+            self.digests.start()
+
+    async def shutdown(self):
+        """Flush pending memory writes and stop background workers."""
+        if self.digests is not None:
+            await self.digests.stop()
+        if self._ingest_tasks or self._consolidate_tasks:
+            await asyncio.gather(*self._ingest_tasks, *self._consolidate_tasks, return_exceptions=True)
+        self.ingestor.shutdown()
+        await self.embedder.run(self.vector.save)
+        await self.embedder.shutdown()
+        self.profile.close()
+        if self.lexical:
+            self.lexical.close()
+        if self.backend is not None:
+            self.backend.close()
\ No newline at end of file
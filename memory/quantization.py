@@ -0,0 +1,228 @@
+# memory/quantization.py
+
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+import numpy as np
+
+CODEC_FILE = "codec.npz"
+CODES_FILE = "codes.bin"
+
+
+class VectorCodec(ABC):
+    """
+    Lossy compact encoding of normalized embeddings, used only to pick search
+    candidates; the caller re-scores candidates with the full-precision rows.
+    Subclasses map a query into code space so that `codes @ query` ranks rows
+    like the original cosine scores (up to a per-query constant).
+    """
+    kind = "base"
+    dtype = np.float32
+
+    def fit(self, vectors: np.ndarray):
+        pass
+
+    @property
+    @abstractmethod
+    def code_dim(self) -> int:
+        """Width of one code row."""
+
+    @abstractmethod
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Codes for normalized rows, shape (n, code_dim), dtype `dtype`."""
+
+    def prepare_query(self, queries: np.ndarray) -> np.ndarray:
+        return queries
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {}
+
+    def load_state(self, state):
+        pass
+
+
+class Float16Codec(VectorCodec):
+    """Half precision: 2 bytes per dimension, near-lossless for cosine ranking."""
+    kind = "float16"
+    dtype = np.float16
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    @property
+    def code_dim(self) -> int:
+        return self.dim
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.asarray(vectors, dtype=np.float16)
+
+
+class Int8Codec(VectorCodec):
+    """Symmetric scalar quantization with one scale per dimension: 1 byte per dimension."""
+    kind = "int8"
+    dtype = np.int8
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.scale = np.ones(dim, dtype=np.float32)
+
+    @property
+    def code_dim(self) -> int:
+        return self.dim
+
+    def fit(self, vectors: np.ndarray):
+        # 99.9th percentile rather than max, so a few outliers do not flatten the rest
+        bound = np.quantile(np.abs(np.asarray(vectors, dtype=np.float32)), 0.999, axis=0)
+        bound[bound == 0] = 1.0
+        self.scale = (bound / 127.0).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(np.asarray(vectors, dtype=np.float32) / self.scale), -127, 127).astype(np.int8)
+
+    def prepare_query(self, queries: np.ndarray) -> np.ndarray:
+        return queries * self.scale  # x ~ code * scale, so q.x ~ code.(q * scale)
+
+    def state(self):
+        return {"scale": self.scale}
+
+    def load_state(self, state):
+        self.scale = state["scale"].astype(np.float32)
+
+
+class PCACodec(VectorCodec):
+    """
+    PCA projection to `n_components` dimensions (scikit-learn), stored as float32
+    (numpy has no fast float16 matmul, and the reduction already does the shrinking).
+    q.x ~ q.mean + (W q).z, and q.mean is constant per query, so ranking on
+    codes @ (W q) matches ranking on the reconstructed vectors.
+    """
+    kind = "pca"
+    dtype = np.float32
+
+    def __init__(self, dim: int, n_components: int = 128):
+        self.dim = dim
+        self.n_components = min(n_components, dim)
+        self.components = None  # (n_components, dim)
+        self.mean = np.zeros(dim, dtype=np.float32)
+
+    @property
+    def code_dim(self) -> int:
+        return self.n_components
+
+    def fit(self, vectors: np.ndarray):
+        from sklearn.decomposition import PCA
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n_components = min(self.n_components, len(vectors))
+        pca = PCA(n_components=n_components, svd_solver="randomized", random_state=0).fit(vectors)
+        self.n_components = n_components
+        self.components = pca.components_.astype(np.float32)
+        self.mean = pca.mean_.astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return ((np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components.T).astype(np.float32)
+
+    def prepare_query(self, queries: np.ndarray) -> np.ndarray:
+        return queries @ self.components.T
+
+    def state(self):
+        return {"components": self.components, "mean": self.mean}
+
+    def load_state(self, state):
+        self.components = state["components"].astype(np.float32)
+        self.mean = state["mean"].astype(np.float32)
+        self.n_components = len(self.components)
+
+
+def make_codec(kind: str, dim: int, pca_components: int = 128) -> VectorCodec:
+    if kind == "float16":
+        return Float16Codec(dim)
+    if kind == "int8":
+        return Int8Codec(dim)
+    if kind == "pca":
+        return PCACodec(dim, pca_components)
+    raise ValueError(f"Unknown vector compression: {kind!r} (expected float16, int8 or pca)")
+
+
+class CompactIndex:
+    """
+    In-RAM matrix of compact codes for every row, scanned to shortlist candidates.
+    With `directory`, the fitted codec and the codes are persisted (codes.bin is
+    append-only and derived data: a short or torn file is simply re-encoded).
+    """
+
+    def __init__(self, codec: VectorCodec, directory: Optional[str] = None, initial_capacity: int = 1024):
+        self.codec = codec
+        self.directory = directory
+        self._codes = np.zeros((initial_capacity, codec.code_dim), dtype=codec.dtype)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self._n]
+
+    @property
+    def nbytes(self) -> int:
+        return self._n * self.codec.code_dim * np.dtype(self.codec.dtype).itemsize
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def add(self, vectors: np.ndarray, persist: bool = True):
+        codes = self.codec.encode(vectors)
+        if self._n + len(codes) > len(self._codes):
+            grown = np.zeros((max(self._n + len(codes), 2 * len(self._codes)), self.codec.code_dim),
+                             dtype=self.codec.dtype)
+            grown[:self._n] = self._codes[:self._n]
+            self._codes = grown
+        self._codes[self._n:self._n + len(codes)] = codes
+        self._n += len(codes)
+        if persist and self.directory:
+            with open(self._path(CODES_FILE), "ab") as f:
+                f.write(np.ascontiguousarray(codes).tobytes())
+
+    def candidates(self, queries: np.ndarray, n_candidates: int, chunk: int = 8192) -> np.ndarray:
+        """Row ids of the `n_candidates` best approximate scores per query, shape (m, n_candidates)."""
+        projected = self.codec.prepare_query(queries).astype(np.float32)
+        scores = np.empty((len(queries), self._n), dtype=np.float32)
+        for start in range(0, self._n, chunk):  # bounded float32 temporaries for int8/float16 codes
+            block = self._codes[start:min(start + chunk, self._n)].astype(np.float32)
+            scores[:, start:start + len(block)] = projected @ block.T
+        if n_candidates >= self._n:
+            return np.broadcast_to(np.arange(self._n), (len(queries), self._n))
+        return np.argpartition(-scores, n_candidates - 1, axis=1)[:, :n_candidates]
+
+    # ---------- persistence ----------
+
+    def save_codec(self):
+        tmp = self._path(CODEC_FILE + ".tmp.npz")
+        np.savez(tmp, kind=np.array(self.codec.kind), **self.codec.state())
+        os.replace(tmp, self._path(CODEC_FILE))
+        open(self._path(CODES_FILE), "wb").close()  # codes written from here on match this codec
+        if self._n:
+            with open(self._path(CODES_FILE), "ab") as f:
+                f.write(np.ascontiguousarray(self.codes).tobytes())
+
+    @classmethod
+    def load(cls, directory: str, codec: VectorCodec, max_rows: int) -> Optional["CompactIndex"]:
+        """Load persisted codes (at most `max_rows`); None if missing or built with another codec."""
+        try:
+            state = np.load(os.path.join(directory, CODEC_FILE))
+        except FileNotFoundError:
+            return None
+        if str(state["kind"]) != codec.kind:
+            return None
+        codec.load_state(state)
+        index = cls(codec, directory)
+        path = index._path(CODES_FILE)
+        row_bytes = codec.code_dim * np.dtype(codec.dtype).itemsize
+        rows = min(max_rows, os.path.getsize(path) // row_bytes) if os.path.exists(path) else 0
+        with open(path, "r+b") if os.path.exists(path) else open(path, "w+b") as f:
+            f.truncate(rows * row_bytes)  # drop torn rows / rows past the committed store count
+            codes = np.fromfile(f, dtype=codec.dtype, count=rows * codec.code_dim)
+        index._codes = codes.reshape(rows, codec.code_dim).copy() if rows else index._codes
+        index._n = rows
+        return index
@@ -0,0 +1,80 @@
+# memory/rolling_summary.py
+
+import asyncio
+from typing import Dict, List, Optional
+from utils.logger import log_event
+
+
+class RollingSummarizer:
+    """
+    Incrementally folds messages evicted from SessionState into a short running
+    summary (session.rolling_summary). Updates run as background tasks on the
+    event loop and never block the interactive turn. A batch whose update fails is
+    put back in front of the pending messages and retried with the next eviction.
+    """
+
+    def __init__(self, llm_engine, session, model: Optional[str] = None, max_chars: int = 800,
+                 max_pending: int = 50):
+        """
+        :param llm_engine: shared LLMEngine (model is overridden per call)
+        :param session: SessionState whose evictions are summarized
+        :param model: cheap model for summary updates (e.g. ModelSelector.get_cheapest_model())
+        :param max_chars: hard cap on the stored summary length
+        :param max_pending: messages kept for retry while the LLM fails (oldest dropped first)
+        """
+        self.llm = llm_engine
+        self.session = session
+        self.model = model
+        self.max_chars = max_chars
+        self.max_pending = max_pending
+        self._pending: List[Dict] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def on_evict(self, message: Dict):
+        """SessionState.on_evict hook; schedules an update once a user/assistant pair is complete."""
+        self._pending.append(message)
+        if message.get("role") != "assistant":
+            return
+        if self._task is not None and not self._task.done():
+            return  # running drain loop will pick the new messages up
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop (e.g. sync caller); keep pending for the next update
+        self._task = loop.create_task(self._drain())
+
+    async def _drain(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                summary = await self.llm.get_response(self._build_prompt(batch), model=self.model)
+            except Exception as e:
+                log_event("RollingSummarizer error", str(e))
+                summary = None
+            # LLMEngine reports failures as plain text; don't let them replace the summary
+            if not summary or summary.startswith(("Error:", "Sorry,")):
+                self._requeue(batch)
+                return
+            self.session.rolling_summary = summary.strip()[:self.max_chars]
+
+    def _requeue(self, batch: List[Dict]):
+        """Put a failed batch back in front of messages evicted meanwhile; retried on the next eviction."""
+        self._pending[:0] = batch
+        dropped = len(self._pending) - self.max_pending
+        if dropped > 0:
+            del self._pending[:dropped]
+            log_event("RollingSummarizer dropped messages", f"{dropped} (LLM unavailable)")
+
+    def _build_prompt(self, messages: List[Dict]) -> str:
+        lines = []
+        for msg in messages:
+            role = "User" if msg.get("role") == "user" else "Assistant"
+            lines.append(f"{role}: {msg.get('content', '').strip()}")
+        previous = self.session.rolling_summary or "(none yet)"
+        return (
+            "You maintain a running summary of a conversation. Update the summary with the new "
+            "messages, keeping names, facts, decisions and open questions. Reply with the updated "
+            "summary only, in at most 5 short sentences.\n\n"
+            f"Current summary:\n{previous}\n\n"
+            "New messages:\n" + "\n".join(lines) + "\n\nUpdated summary:"
+        )
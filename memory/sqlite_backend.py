@@ -0,0 +1,248 @@
+# memory/sqlite_backend.py
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from memory.backfill import normalize_timestamp
+from utils.logger import log_event
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile_facts (
+    key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profile_history (
+    id INTEGER PRIMARY KEY, key TEXT NOT NULL, value TEXT, changed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profile_history_key ON profile_history (key, id);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY, session TEXT NOT NULL, seq INTEGER NOT NULL, time TEXT NOT NULL,
+    role TEXT NOT NULL, text TEXT NOT NULL,
+    UNIQUE (session, seq, role)
+);
+CREATE INDEX IF NOT EXISTS turns_session_time ON turns (session, time);
+CREATE INDEX IF NOT EXISTS turns_time ON turns (time);
+CREATE TABLE IF NOT EXISTS vector_rows (
+    row INTEGER PRIMARY KEY, vector BLOB NOT NULL, timestamp TEXT, meta TEXT NOT NULL,
+    removed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS vector_rows_timestamp ON vector_rows (timestamp);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SQLiteBackend:
+    """
+    Optional single-file store (WAL mode) for agent state that otherwise lives in
+    profile.json, per-day JSONL logs and RAM-only VectorMemory lists:
+      profile_facts / profile_history   current value per key + every change
+      turns                             conversation lines, indexed on (session, time) and time; `seq`
+                                        is the line's byte offset (imported logs) or turn number (live)
+      vector_rows                       RAM-mode VectorMemory rows (embedding + metadata)
+    Vector rows are only kept here when VectorMemory has no store_path; a VectorStore
+    stays the single home of its own rows (its memory-mapped files are what make
+    opening it O(1)), so with both configured this file holds profile and turns only.
+    All statements are parameterized (sqlite3 caches the prepared statements) and
+    each write call is one transaction. One connection shared across threads under a
+    lock; WAL lets readers in other processes proceed during writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade_turns()
+        self._conn.executescript(SCHEMA)
+
+    def _upgrade_turns(self):
+        """Files from before `seq` keyed turns on (time, role), which dropped lines sharing a second."""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(turns)")]
+        if not columns or "seq" in columns:
+            return
+        with self._conn:
+            self._conn.execute("ALTER TABLE turns RENAME TO turns_old")
+            self._conn.execute("DROP INDEX IF EXISTS turns_session_time")
+            self._conn.execute("DROP INDEX IF EXISTS turns_time")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute("INSERT INTO turns (id, session, seq, time, role, text) "
+                               "SELECT id, session, id, time, role, text FROM turns_old")
+            self._conn.execute("DROP TABLE turns_old")
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+    # ---------- profile ----------
+
+    def load_profile(self) -> Dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM profile_facts").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def write_profile(self, changes: Dict):
+        """Upsert changed keys and record each change in the history, in one transaction."""
+        now = _now()
+        upserts = [(key, json.dumps(value, ensure_ascii=False), now) for key, value in changes.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO profile_facts (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=excluded.updated_at",
+                upserts
+            )
+            self._conn.executemany("INSERT INTO profile_history (key, value, changed_at) VALUES (?, ?, ?)", upserts)
+
+    def profile_history(self, key: str, limit: int = 20) -> List[Dict]:
+        """Past values of a profile key, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value, changed_at FROM profile_history WHERE key=? ORDER BY id DESC LIMIT ?",
+                (key, limit)
+            ).fetchall()
+        return [{"value": json.loads(v), "changed_at": t} for v, t in rows]
+
+    # ---------- conversation turns ----------
+
+    def add_turns(self, turns: List[Tuple[str, int, str, str, str]]) -> int:
+        """Insert (session, seq, time, role, text) rows; lines already stored (same session, seq, role) are skipped."""
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO turns (session, seq, time, role, text) "
+                                   "VALUES (?, ?, ?, ?, ?)", turns)
+            return self._conn.total_changes - before
+
+    def turns(self, session: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+              limit: int = 100) -> List[Dict]:
+        """Turns filtered by session and/or ISO time range [since, until), oldest first."""
+        clauses, params = [], []
+        for clause, value in (("session = ?", session), ("time >= ?", since), ("time < ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT session, time, role, text FROM (SELECT * FROM turns {where}ORDER BY time DESC, id DESC "
+                "LIMIT ?) ORDER BY time, id", (*params, limit)
+            ).fetchall()
+        return [{"session": s, "time": t, "role": r, "text": x} for s, t, r, x in rows]
+
+    # ---------- vector rows ----------
+
+    def vector_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM vector_rows").fetchone()[0]
+
+    def append_vectors(self, first_row: int, vectors: np.ndarray, metas: List[Dict]):
+        rows = [(first_row + i, np.asarray(vec, dtype=np.float32).tobytes(), meta.get("timestamp"),
+                 json.dumps(meta, ensure_ascii=False)) for i, (vec, meta) in enumerate(zip(vectors, metas))]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO vector_rows (row, vector, timestamp, meta) VALUES (?, ?, ?, ?)",
+                                   rows)
+
+    def load_vectors(self, dim: int) -> np.ndarray:
+        """All stored embeddings as one (n, dim) float32 matrix (rows are contiguous from 0)."""
+        with self._lock:
+            blobs = self._conn.execute("SELECT vector FROM vector_rows ORDER BY row").fetchall()
+        return np.frombuffer(b"".join(b for (b,) in blobs), dtype=np.float32).reshape(-1, dim).copy()
+
+    def iter_vector_meta(self, start: int = 0, stop: Optional[int] = None, batch: int = 5000) -> Iterator[Dict]:
+        stop = self.vector_count() if stop is None else stop
+        for lo in range(start, stop, batch):
+            with self._lock:
+                rows = self._conn.execute("SELECT meta FROM vector_rows WHERE row >= ? AND row < ? ORDER BY row",
+                                          (lo, min(lo + batch, stop))).fetchall()
+            for (meta,) in rows:
+                yield json.loads(meta)
+
+    def update_vector_meta(self, row: int, meta: Dict):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE vector_rows SET timestamp=?, meta=? WHERE row=?",
+                               (meta.get("timestamp"), json.dumps(meta, ensure_ascii=False), int(row)))
+
+    def remove_vectors(self, rows: np.ndarray):
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE vector_rows SET removed=1 WHERE row=?", [(int(r),) for r in rows])
+
+    def removed_vectors(self) -> np.ndarray:
+        with self._lock:
+            rows = self._conn.execute("SELECT row FROM vector_rows WHERE removed=1").fetchall()
+        return np.array([r for (r,) in rows], dtype=np.int64)
+
+    # ---------- migration ----------
+
+    def migrate(self, profile_path: Optional[str] = None, log_dir: Optional[str] = None) -> Dict:
+        """
+        Import profile.json (once, when the table is still empty) and the chat logs
+        (incrementally, per-file byte offsets). The original files are left in place.
+        """
+        stats = {"profile": 0, "turns": 0}
+        if profile_path and self.get_meta("migrated_profile") is None:
+            try:
+                with open(profile_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if not self.load_profile():
+                    self.write_profile(data)
+                    stats["profile"] = len(data)
+            except FileNotFoundError:
+                pass
+            except ValueError as e:
+                log_event("SQLiteBackend: profile migration skipped", str(e))
+            self.set_meta("migrated_profile", _now())
+        if log_dir and os.path.isdir(log_dir):
+            try:
+                for name in sorted(os.listdir(log_dir)):
+                    if name.endswith(".jsonl"):
+                        stats["turns"] += self._migrate_log(os.path.join(log_dir, name), name[:-len(".jsonl")])
+            except sqlite3.Error as e:  # e.g. closed at shutdown; resumes from the saved offsets
+                log_event("SQLiteBackend: log migration stopped", str(e))
+        if stats["profile"] or stats["turns"]:
+            log_event("SQLiteBackend migrated", str(stats))
+        return stats
+
+    def _migrate_log(self, path: str, session: str, batch: int = 5000) -> int:
+        key = f"log:{os.path.basename(path)}"
+        offset = int(self.get_meta(key, "0"))
+        if os.path.getsize(path) <= offset:
+            return 0
+        added, turns = 0, []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # line still being written; picked up on the next run
+                line, offset = offset, offset + len(raw)
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue
+                time = normalize_timestamp(entry.get("time")) or ""
+                if "role" in entry:  # SessionLogger line
+                    turns.append((session, line, time, entry["role"], entry.get("text", "")))
+                else:  # MemoryBus line: one user + assistant pair
+                    turns.append((session, line, time, "user", entry.get("user", "")))
+                    turns.append((session, line, time, "assistant", entry.get("assistant", "")))
+                if len(turns) >= batch:
+                    added += self.add_turns(turns)
+                    turns = []
+        added += self.add_turns(turns)
+        self.set_meta(key, offset)
+        return added
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
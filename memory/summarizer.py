@@ -11,9 +11,10 @@ class Summarizer:
     for vector memory storage or fact compression.
     """
 
-    def __init__(self, model_name: Optional[str] = None):
+    def __init__(self, model_name: Optional[str] = None, llm_engine: Optional[LLMEngine] = None):
         config = load_config()
-        self.llm = LLMEngine(config)
+        # reuse the caller's engine (and its model selector) instead of building another one
+        self.llm = llm_engine if llm_engine is not None else LLMEngine(config)
         self.model = model_name or config.get("default_model", "openhermes")
 
     async def summarize(self, text: str) -> str:
@@ -29,6 +30,24 @@ class Summarizer:
             print("[Summarizer Error]", e)
             return text  # fallback to original
 
+    async def digest(self, text: str, period: str) -> str:
+        """Digest of a whole period's conversations; "" on failure (the period is retried later)."""
+        prompt = (
+            f"Below are the conversations from {period}. Write a short digest (3-5 sentences) "
+            "of the topics discussed, decisions made, and any personal facts, plans or dates "
+            "mentioned, so the period can be found again later:\n\n"
+            f"{text}\n\nDigest:"
+        )
+        try:
+            response = await self.llm.get_response(prompt)
+        except Exception as e:
+            log_event("Summarizer digest error", str(e))
+            return ""
+        # LLMEngine reports failures as plain text; never store them as a digest
+        if not isinstance(response, str) or response.startswith(("Error:", "Sorry,")):
+            return ""
+        return response.strip()
+
     def _build_summary_prompt(self, text: str) -> str:
         return (
             "Please summarize the following conversation exchange into 1-2 concise sentences "
@@ -0,0 +1,215 @@
+# memory/time_index.py
+
+import os
+import re
+from datetime import datetime, timedelta, time as dtime
+from typing import Iterable, Optional, Tuple, Union
+import numpy as np
+
+TIMESTAMPS_FILE = "timestamps.i64"
+ORDER_FILE = "timestamps.order.i64"
+MISSING = np.iinfo(np.int64).min  # rows without a timestamp sort first and match no window
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+TimeLike = Union[None, str, datetime, int, float]
+
+
+def to_epoch_ms(value: TimeLike) -> int:
+    """ISO string / datetime / epoch seconds -> int64 epoch milliseconds (naive times are local)."""
+    if value is None:
+        return MISSING
+    if isinstance(value, (int, float)):
+        return int(value * 1000)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return MISSING
+    return int(value.timestamp() * 1000)
+
+
+def time_window_from_text(text: str, now: Optional[datetime] = None) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Recognize simple time phrases: today, yesterday, last/this week, last <weekday>,
+    on/for <weekday>, N days ago, YYYY-MM-DD. Returns a local (start, end) or None.
+    """
+    now = now or datetime.now()
+    today = datetime.combine(now.date(), dtime.min)
+    text = text.lower()
+    match = re.search(r"\b(\d{4}-\d{2}-\d{2})\b", text)
+    if match:
+        try:
+            day = datetime.fromisoformat(match.group(1))
+            return day, day + timedelta(days=1)
+        except ValueError:
+            pass
+    if "yesterday" in text:
+        return today - timedelta(days=1), today
+    if "today" in text:
+        return today, today + timedelta(days=1)
+    match = re.search(r"\b(\d+) days? ago\b", text)
+    if match:
+        day = today - timedelta(days=int(match.group(1)))
+        return day, day + timedelta(days=1)
+    week_start = today - timedelta(days=today.weekday())
+    if "last week" in text:
+        return week_start - timedelta(days=7), week_start
+    if "this week" in text:
+        return week_start, today + timedelta(days=1)
+    match = re.search(r"\b(?:last |on |this )?(" + "|".join(WEEKDAYS) + r")\b", text)
+    if match:
+        back = (today.weekday() - WEEKDAYS.index(match.group(1))) % 7 or 7  # most recent past one
+        day = today - timedelta(days=back)
+        return day, day + timedelta(days=1)
+    return None
+
+
+class TimeIndex:
+    """
+    Timestamp column for VectorMemory rows as int64 epoch milliseconds, plus the row
+    order sorted by time, so a time window is two binary searches (np.searchsorted)
+    instead of a Python scan over metadata. In-order appends (the normal case) are
+    O(1) amortized; out-of-order batches (backfills) are merged with one searchsorted
+    insert. With `directory`, the per-row column is persisted in timestamps.i64 and
+    rows missing from it (older stores, crashes) are rebuilt from metadata on open.
+    Opening a column that is not in time order (backfills, merged duplicates) reuses
+    the sorted row order saved by save_order() in timestamps.order.i64 after checking
+    it in one vectorized pass; only a missing or stale order file costs an argsort.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.path = os.path.join(directory, TIMESTAMPS_FILE) if directory else None
+        self.order_path = os.path.join(directory, ORDER_FILE) if directory else None
+        self._order_dirty = False  # sorted order changed since it was last saved
+        self._ts = np.empty(1024, dtype=np.int64)     # per row, row order
+        self._sorted = np.empty(1024, dtype=np.int64)  # timestamps ascending
+        self._rows = np.empty(1024, dtype=np.int64)    # row id for each entry of _sorted
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._ts[:self._n]
+
+    def load(self, max_rows: int):
+        """Read the persisted column (at most `max_rows`, the committed store size)."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        rows = min(max_rows, os.path.getsize(self.path) // 8)
+        with open(self.path, "r+b") as f:
+            f.truncate(rows * 8)
+        ts = np.fromfile(self.path, dtype=np.int64, count=rows)
+        self._n = 0
+        if not len(ts) or np.all(ts[1:] >= ts[:-1]):
+            self._append_memory(ts)  # in time order: no sort needed
+            return
+        order = self._load_order(ts)
+        if order is None:
+            self._append_memory(ts)
+            self.save_order()
+            return
+        n = len(order)
+        self._reserve(len(ts))
+        self._ts[:n] = ts[:n]
+        self._sorted[:n] = ts[order]
+        self._rows[:n] = order
+        self._n = n
+        self._append_memory(ts[n:])  # rows added after the order was saved
+
+    def _load_order(self, ts: np.ndarray) -> Optional[np.ndarray]:
+        """Saved sorted row order, if it still sorts the column (a crash can leave it stale)."""
+        if not os.path.exists(self.order_path):
+            return None
+        order = np.fromfile(self.order_path, dtype=np.int64)
+        if len(order) > len(ts) or (len(order) and order.max() >= len(order)):
+            return None
+        sorted_ts = ts[order]
+        return order if np.all(sorted_ts[1:] >= sorted_ts[:-1]) else None
+
+    def save_order(self):
+        """Persist the sorted row order (atomic replace) when it changed since the last save."""
+        if not self.order_path or not self._order_dirty:
+            return
+        tmp = self.order_path + ".tmp"
+        self._rows[:self._n].tofile(tmp)
+        os.replace(tmp, self.order_path)
+        self._order_dirty = False
+
+    def add(self, timestamps: Iterable[TimeLike]):
+        ts = np.fromiter((to_epoch_ms(t) for t in timestamps), dtype=np.int64)
+        self._append_memory(ts)
+        if self.path:
+            with open(self.path, "ab") as f:
+                f.write(ts.tobytes())
+
+    def _append_memory(self, ts: np.ndarray):
+        first_row, n = self._n, len(ts)
+        if n == 0:
+            return
+        self._reserve(self._n + n)
+        self._ts[first_row:first_row + n] = ts
+        rows = np.arange(first_row, first_row + n, dtype=np.int64)
+        order = np.argsort(ts, kind="stable")
+        ts_sorted, rows = ts[order], rows[order]
+        if self._n == 0 or ts_sorted[0] >= self._sorted[self._n - 1]:
+            self._sorted[self._n:self._n + n] = ts_sorted
+            self._rows[self._n:self._n + n] = rows
+            if n > 1 and np.any(order[1:] < order[:-1]):
+                self._order_dirty = True  # the batch itself was out of row order
+        else:
+            # Out of order (e.g. backfilled history): merge into the sorted arrays
+            positions = np.searchsorted(self._sorted[:self._n], ts_sorted, side="right")
+            self._sorted[:self._n + n] = np.insert(self._sorted[:self._n], positions, ts_sorted)
+            self._rows[:self._n + n] = np.insert(self._rows[:self._n], positions, rows)
+            self._order_dirty = True
+        self._n += n
+
+    def _reserve(self, needed: int):
+        if needed > len(self._ts):
+            capacity = max(needed, 2 * len(self._ts))
+            for name in ("_ts", "_sorted", "_rows"):
+                grown = np.empty(capacity, dtype=np.int64)
+                grown[:self._n] = getattr(self, name)[:self._n]
+                setattr(self, name, grown)
+
+    def update(self, row: int, timestamp: TimeLike):
+        """Move one row to a new timestamp (one delete + one insert in the sorted arrays)."""
+        ts = to_epoch_ms(timestamp)
+        old = self._ts[row]
+        if old == ts:
+            return
+        sorted_ts = self._sorted[:self._n]
+        lo = np.searchsorted(sorted_ts, old, side="left")
+        hi = np.searchsorted(sorted_ts, old, side="right")
+        pos = lo + int(np.flatnonzero(self._rows[lo:hi] == row)[0])
+        new = np.searchsorted(sorted_ts, ts, side="right")
+        if new > pos:
+            new -= 1  # the slot at pos is vacated first
+            self._sorted[pos:new] = self._sorted[pos + 1:new + 1]
+            self._rows[pos:new] = self._rows[pos + 1:new + 1]
+        else:
+            self._sorted[new + 1:pos + 1] = self._sorted[new:pos].copy()
+            self._rows[new + 1:pos + 1] = self._rows[new:pos].copy()
+        self._sorted[new], self._rows[new] = ts, row
+        self._ts[row] = ts
+        self._order_dirty = True
+        if self.path:
+            with open(self.path, "r+b") as f:
+                f.seek(row * 8)
+                f.write(np.int64(ts).tobytes())
+
+    def window(self, since: TimeLike = None, until: TimeLike = None) -> np.ndarray:
+        """Row ids with since <= timestamp < until (either bound optional), oldest first."""
+        sorted_ts = self._sorted[:self._n]
+        if since is None:
+            lo = np.searchsorted(sorted_ts, MISSING, side="right")  # skip rows without a time
+        else:
+            lo = np.searchsorted(sorted_ts, to_epoch_ms(since), side="left")
+        hi = self._n if until is None else np.searchsorted(sorted_ts, to_epoch_ms(until), side="left")
+        return self._rows[lo:max(lo, hi)]
+
+    def undated(self) -> np.ndarray:
+        """Row ids without a timestamp (they match no window)."""
+        return self._rows[:np.searchsorted(self._sorted[:self._n], MISSING, side="right")]
@@ -0,0 +1,136 @@
+# memory/turn_analyzer.py
+
+import copy
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.logger import log_event
+from memory.fact_extractor import FactExtractor
+
+BEHAVIOR_KEYS = ("mood", "tone", "goals", "habits", "preferences", "emotional_cues")
+# Profile keys the LLM may set besides the FactExtractor rule keys (the profile goes into every prompt)
+EXTRA_FACT_KEYS = ("age", "birthday", "pronouns", "hometown", "partner_name", "pet_name", "language")
+RESERVED_PROFILE_KEYS = ("behavior",)
+
+# JSON schema passed to Ollama's structured output (`format`) and used for validation
+TURN_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "facts": {"type": "object", "additionalProperties": {"type": "string"}},
+        "behavior": {
+            "type": "object",
+            "properties": {
+                key: {"anyOf": [{"type": "string"}, {"type": "array", "items": {"type": "string"}}]}
+                for key in BEHAVIOR_KEYS
+            }
+        },
+        "summary": {"type": "string"}
+    },
+    "required": ["facts", "behavior", "summary"]
+}
+
+
+class FusedTurnAnalyzer:
+    """
+    Post-turn analysis in a single LLM request: extracted facts, behavior attributes
+    and a memory summary come back as one JSON object. Each field is validated on
+    its own; an invalid field falls back (facts -> regex FactExtractor, behavior ->
+    no update, summary -> raw snippet) without discarding the valid ones. Fact keys
+    are limited to the FactExtractor rule keys plus `extra_fact_keys`; other keys
+    are dropped, and no facts at all also falls back to the regex extractor.
+    """
+
+    def __init__(self, llm_engine, fact_extractor: Optional[FactExtractor] = None,
+                 extra_fact_keys: Iterable[str] = EXTRA_FACT_KEYS):
+        self.llm = llm_engine
+        self.fact_extractor = fact_extractor or FactExtractor()
+        rule_keys = [rule["key"] for rule in self.fact_extractor.rules]
+        self.fact_keys = [key for key in dict.fromkeys([*rule_keys, *extra_fact_keys])
+                          if key not in RESERVED_PROFILE_KEYS]
+        self.schema = copy.deepcopy(TURN_ANALYSIS_SCHEMA)
+        self.schema["properties"]["facts"] = {
+            "type": "object",
+            "properties": {key: {"type": "string"} for key in self.fact_keys},
+            "additionalProperties": False
+        }
+
+    async def analyze(self, user_msg: str, assistant_msg: str, want_summary: bool = True) -> Dict:
+        """
+        :return: {"facts": [(key, value)], "behavior": dict or None, "summary": str or None}
+        """
+        snippet = f"User: {user_msg} Assistant: {assistant_msg}"
+        data = {}
+        try:
+            raw = await self.llm.get_response(
+                self._build_prompt(user_msg, assistant_msg, want_summary),
+                format=self.schema
+            )
+            data = self._parse_json(raw) or {}
+        except Exception as e:
+            log_event("FusedTurnAnalyzer error", str(e))
+
+        facts = self._validate_facts(data.get("facts"))
+        if facts is None:
+            facts = self.fact_extractor.extract([{"role": "user", "content": user_msg}])
+
+        summary = data.get("summary") if want_summary else None
+        if want_summary and not (isinstance(summary, str) and summary.strip()):
+            summary = snippet
+
+        return {
+            "facts": facts,
+            "behavior": self._validate_behavior(data.get("behavior")),
+            "summary": summary.strip() if summary else None
+        }
+
+    def _build_prompt(self, user_msg: str, assistant_msg: str, want_summary: bool) -> str:
+        summary_rule = (
+            "\"summary\": 1-2 concise sentences with the important personal facts, goals or interests."
+            if want_summary else "\"summary\": an empty string."
+        )
+        return (
+            "You analyze one exchange between a user and an assistant. Respond ONLY with a JSON object "
+            "with exactly these keys:\n"
+            "  \"facts\": object of stable personal facts the USER stated about themselves, using only "
+            f"these keys: {', '.join(self.fact_keys)}; string values; {{}} if none.\n"
+            "  \"behavior\": object with any of \"mood\", \"tone\", \"goals\", \"habits\", \"preferences\", "
+            "\"emotional_cues\" (string or array of strings); omit what you cannot infer.\n"
+            f"  {summary_rule}\n\n"
+            f"User: {user_msg}\nAssistant: {assistant_msg}\n\nJSON:"
+        )
+
+    def _parse_json(self, text: str) -> Optional[Dict]:
+        try:
+            start = text.index('{')
+            end = text.rindex('}') + 1
+            data = json.loads(text[start:end])
+            return data if isinstance(data, dict) else None
+        except Exception as e:
+            log_event("FusedTurnAnalyzer JSON parse error", f"{e}; text: {text}")
+            return None
+
+    def _validate_facts(self, facts) -> Optional[List[Tuple[str, str]]]:
+        """Known keys with non-empty string values; None (use the regex extractor) when none remain."""
+        if not isinstance(facts, dict):
+            return None
+        valid = []
+        for key, value in facts.items():
+            if key not in self.fact_keys:
+                continue
+            if not isinstance(value, str):
+                return None
+            if value.strip():
+                valid.append((key, value.strip()))
+        return valid or None
+
+    def _validate_behavior(self, behavior) -> Optional[Dict]:
+        if not isinstance(behavior, dict):
+            return None
+        valid = {}
+        for key, value in behavior.items():
+            if key not in BEHAVIOR_KEYS:
+                continue
+            if isinstance(value, str) and value.strip():
+                valid[key] = value.strip()
+            elif isinstance(value, list) and all(isinstance(v, str) for v in value) and value:
+                valid[key] = value
+        return valid or None
@@ -1,46 +1,542 @@
 # memory/vector_memory.py
 
-from typing import List, Dict
+import os
+import time
+from typing import List, Dict, Optional, Tuple
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.neighbors import NearestNeighbors
+from memory.vector_store import VectorStore, MetadataView
+from memory.ann_index import IVFIndex
+from memory.quantization import CompactIndex, make_codec
+from memory.embedding_cache import EmbeddingCache
+from memory.time_index import TimeIndex
+from memory.dedup import NearDuplicateFilter, MERGES_FILE
+from memory.hot_tier import HotTier, HOT_STATE_FILE
+from utils.logger import log_event
+
+TOMBSTONES_FILE = "tombstones.i64"
 
 class VectorMemory:
-    def __init__(self):
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")  # Light offline model
-        self.embeddings = []
-        self.metadata = []
-        self.nn = None
-
-    def add(self, text: str, meta: Dict):
-        vec = self.model.encode(text)
-        self.embeddings.append(vec)
-        self.metadata.append(meta)
-        self._rebuild_index()
-
-    def add_memory(self, text: str, metadata: Dict = None):
+    """
+    Semantic memory over L2-normalized float32 embeddings kept in one preallocated
+    matrix that grows geometrically (amortized O(1) insert, no index refit).
+    Cosine search is a single matrix-vector product plus argpartition top-k.
+    With `store_path`, rows live in a persistent memory-mapped VectorStore instead,
+    so memories survive restarts and opening costs O(1).
+    Large corpora can switch to an approximate IVF index (`ann_min_size`); below
+    that size search stays exact.
+    With a store, `compression` (float16 / int8 / pca) keeps only compact codes in
+    RAM for the scan and re-scores the shortlisted rows from the full-precision store.
+    Metadata timestamps are mirrored in a sorted int64 TimeIndex, so queries can be
+    restricted to a time window (`since` / `until`) with a binary search.
+    With a store, `hot_capacity` keeps the most important rows in a bounded in-RAM
+    HotTier; queries scan the store (cold tier) only when the hot answer is weak.
+    An attached LexicalIndex receives every added, updated and removed row.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", initial_capacity: int = 1024, model=None,
+                 store_path: Optional[str] = None, ann_min_size: Optional[int] = None,
+                 ann_n_probe: int = 16, ann_n_lists: Optional[int] = None, ann_save_every: int = 1000,
+                 compression: Optional[str] = None, pca_components: int = 128,
+                 compression_min_size: int = 1024, rescore_factor: int = 4,
+                 cache_size: int = 0, cache_path: Optional[str] = None,
+                 dedup_threshold: Optional[float] = None, hot_capacity: Optional[int] = None,
+                 hot_cold_threshold: float = 0.45, hot_half_life_hours: float = 72.0,
+                 hot_save_every: int = 500, backend=None, lexical=None):
+        """
+        :param model_name: SentenceTransformer model (light offline default)
+        :param initial_capacity: rows preallocated before the first growth (in-RAM mode)
+        :param model: optional preloaded encoder exposing encode() (skips loading model_name)
+        :param store_path: directory of a persistent VectorStore; None keeps everything in RAM
+        :param ann_min_size: corpus size at which the IVF index is trained and used (None = always exact)
+        :param ann_n_probe: IVF cells probed per query (recall/speed trade-off)
+        :param ann_n_lists: IVF cell count (default ~4*sqrt(n))
+        :param ann_save_every: persist the IVF index after this many inserts (store mode)
+        :param compression: None, "float16", "int8" or "pca" compact codes for the search scan (store mode)
+        :param pca_components: output dimension for "pca"
+        :param compression_min_size: rows needed before the codec is fitted (exact scan below)
+        :param rescore_factor: candidates shortlisted per result and re-scored exactly
+        :param cache_size: embeddings kept in an in-RAM LRU cache (0 and no cache_path = no cache)
+        :param cache_path: SQLite file for a persistent embedding cache tier
+        :param dedup_threshold: cosine at/above which a near-identical text is merged into an existing entry (None = off)
+        :param hot_capacity: rows kept in the in-RAM hot tier (store mode; None = search everything)
+        :param hot_cold_threshold: best hot-tier score below which a query also searches the store
+        :param hot_half_life_hours: recency half-life of the hot-tier importance score
+        :param hot_save_every: persist hot-tier membership after this many changes
+        :param backend: SQLiteBackend that persists rows when there is no store_path
+        :param lexical: LexicalIndex kept in step with added, updated and removed rows
+        """
+        self.model_name = model_name
+        self.model = model if model is not None else SentenceTransformer(model_name)
+        if cache_size or cache_path:
+            # Repeated strings (questions, replays, re-added snippets) skip the forward pass
+            self.model = EmbeddingCache(self.model, model_name, capacity=cache_size or 10_000, disk_path=cache_path)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.store = VectorStore(store_path, model_name, self.dim) if store_path else None
+        self.backend = backend if self.store is None else None
+        self.lexical = lexical
+        if self.store is not None:
+            self.metadata = MetadataView(self.store)
+        else:
+            self._matrix = np.zeros((max(1, initial_capacity), self.dim), dtype=np.float32)
+            self._size = 0
+            self.metadata: List[Dict] = []
+            if self.backend is not None:
+                self._load_backend()
+
+        # Tombstones: removed rows stay in the append-only matrix/store but never match
+        self._deleted = np.zeros(max(1024, self.size), dtype=bool)
+        self._n_deleted = 0
+        self._tombstone_path = os.path.join(store_path, TOMBSTONES_FILE) if store_path else None
+        if self._tombstone_path and os.path.exists(self._tombstone_path):
+            removed = np.fromfile(self._tombstone_path, dtype=np.int64)
+            self._mark_deleted(removed[removed < self.size])
+        elif self.backend is not None:
+            self._mark_deleted(self.backend.removed_vectors())
+
+        self.time_index = TimeIndex(store_path)
+        if self.store is not None:
+            self.time_index.load(self.size)
+            if len(self.time_index) < self.size:  # older store, or crash before the column write
+                self.time_index.add(m.get("timestamp") for m in self.store.iter_metadata(len(self.time_index)))
+        elif self.metadata:
+            self.time_index.add(m.get("timestamp") for m in self.metadata)  # rows loaded from the backend
+
+        self.ann_min_size = ann_min_size
+        self.ann_n_probe = ann_n_probe
+        self.ann_n_lists = ann_n_lists
+        self.ann_save_every = ann_save_every
+        self.ann: Optional[IVFIndex] = None
+        self._ann_trained_size = 0
+        self._ann_unsaved = 0
+        self._ann_path = os.path.join(store_path, "ivf.npz") if store_path else None
+        if ann_min_size is not None and self._ann_path and os.path.exists(self._ann_path):
+            self._load_ann()
+
+        if compression and self.store is None:
+            log_event("VectorMemory: compression ignored", "needs store_path for full-precision re-scoring")
+            compression = None
+        self.compression = compression
+        self.pca_components = pca_components
+        self.compression_min_size = compression_min_size
+        self.rescore_factor = rescore_factor
+        self.compact: Optional[CompactIndex] = None
+        if compression:
+            make_codec(compression, self.dim, pca_components)  # validate the name early
+            self._load_compact()
+
+        self.dedup = None
+        if dedup_threshold:
+            self.dedup = NearDuplicateFilter(self, threshold=dedup_threshold,
+                                             path=os.path.join(store_path, MERGES_FILE) if store_path else None)
+
+        if hot_capacity and self.store is None:
+            log_event("VectorMemory: hot tier ignored", "needs store_path for the cold tier")
+            hot_capacity = None
+        self.hot: Optional[HotTier] = None
+        self.hot_save_every = hot_save_every
+        self._hot_unsaved = 0
+        if hot_capacity:
+            self.hot = HotTier(self.dim, hot_capacity, half_life_hours=hot_half_life_hours,
+                               cold_threshold=hot_cold_threshold,
+                               path=os.path.join(store_path, HOT_STATE_FILE))
+            if not self.hot.load(self.embeddings, self.is_removed):
+                self._warm_hot()
+
+    @property
+    def size(self) -> int:
+        return len(self.store) if self.store is not None else self._size
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """View of the stored (normalized) embeddings, shape (size, dim)."""
+        if self.store is not None:
+            return self.store.vectors
+        return self._matrix[:self._size]
+
+    def encode(self, text: str) -> np.ndarray:
+        """Single encoder entry point, so callers can cache/reuse embeddings."""
+        return self.model.encode(text)
+
+    def encode_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Encode many texts in one forward-pass loop (much cheaper than one call per text)."""
+        return self.model.encode(texts, batch_size=batch_size)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _load_backend(self):
+        header = f"{self.model_name}:{self.dim}"
+        stored = self.backend.get_meta("vector_model")
+        if stored is not None and stored != header:
+            raise ValueError(f"Vector rows in {self.backend.path} were built with {stored}, not {header}")
+        self.backend.set_meta("vector_model", header)
+        vectors = self.backend.load_vectors(self.dim)
+        self._ensure_capacity(len(vectors))
+        self._matrix[:len(vectors)] = vectors
+        self._size = len(vectors)
+        self.metadata.extend(self.backend.iter_vector_meta(0, self._size))
+
+    def _ensure_capacity(self, needed: int):
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        grown = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+    def _append(self, vectors: np.ndarray, metas: List[Dict]):
+        """Single write path for normalized rows (persistent store or in-RAM matrix)."""
+        if self.size + len(vectors) > len(self._deleted):
+            grown = np.zeros(max(self.size + len(vectors), 2 * len(self._deleted)), dtype=bool)
+            grown[:len(self._deleted)] = self._deleted
+            self._deleted = grown
+        if self.store is not None:
+            self.store.append(vectors, metas)
+        else:
+            self._ensure_capacity(self._size + len(vectors))
+            if self.backend is not None:
+                self.backend.append_vectors(self._size, vectors, metas)
+            self._matrix[self._size:self._size + len(vectors)] = vectors
+            self._size += len(vectors)
+            self.metadata.extend(metas)
+        self.time_index.add(meta.get("timestamp") for meta in metas)
+        if self.lexical is not None:
+            self.lexical.index_rows(self.size - len(metas), metas)
+        self._update_ann(self.size - len(vectors))
+        self._update_compact(vectors)
+        if self.hot is not None:
+            # only the newest rows of a large batch can stay hot anyway
+            tail = slice(max(0, len(metas) - self.hot.capacity), len(metas))
+            rows = np.arange(self.size - len(metas), self.size)[tail]
+            self._admit_hot(rows, vectors[tail], metas[tail])
+
+    # ---------- removal ----------
+
+    def _mark_deleted(self, rows: np.ndarray):
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        rows = rows[~self._deleted[rows]]
+        self._deleted[rows] = True
+        self._n_deleted += len(rows)
+        return rows
+
+    def remove(self, rows) -> int:
+        """Tombstone rows so searches and listings skip them; returns how many were newly removed."""
+        rows = self._mark_deleted(np.atleast_1d(rows))
+        if self.hot is not None:
+            self.hot.discard(rows)
+        if len(rows) and self.lexical is not None:
+            self.lexical.remove_rows(rows)
+        if len(rows) and self._tombstone_path:
+            with open(self._tombstone_path, "ab") as f:
+                f.write(rows.tobytes())
+        elif len(rows) and self.backend is not None:
+            self.backend.remove_vectors(rows)
+        return len(rows)
+
+    def is_removed(self, row: int) -> bool:
+        return bool(self._deleted[row])
+
+    @property
+    def live_count(self) -> int:
+        return self.size - self._n_deleted
+
+    def _drop_deleted(self, ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Remove tombstoned hits from over-fetched results and pad each row back to k."""
+        out_ids = np.full((len(ids), k), -1, dtype=np.int64)
+        out_scores = np.full((len(ids), k), -np.inf, dtype=np.float32)
+        for qi in range(len(ids)):
+            keep = (ids[qi] >= 0) & ~self._deleted[np.maximum(ids[qi], 0)]
+            kept_ids, kept_scores = ids[qi][keep][:k], scores[qi][keep][:k]
+            out_ids[qi, :len(kept_ids)] = kept_ids
+            out_scores[qi, :len(kept_ids)] = kept_scores
+        return out_ids, out_scores
+
+    # ---------- approximate index ----------
+
+    def _load_ann(self):
+        try:
+            ann = IVFIndex.load(self._ann_path, self.dim, n_probe=self.ann_n_probe)
+        except Exception as e:
+            log_event("VectorMemory: IVF index load failed", str(e))
+            return
+        if len(ann) > self.size:
+            return  # index is ahead of the (recovered) store; retrain lazily
+        ann.add(self.embeddings[len(ann):], len(ann))  # catch up rows appended after the last save
+        self.ann = ann
+        self._ann_trained_size = self.size
+
+    def _update_ann(self, first_new_row: int):
+        if self.ann_min_size is None or self.size < self.ann_min_size:
+            return
+        if self.ann is None or self.size > 4 * self._ann_trained_size:
+            # (Re)train when crossing the threshold or when cells have grown ~4x
+            self.ann = IVFIndex(self.dim, n_lists=self.ann_n_lists, n_probe=self.ann_n_probe)
+            self.ann.train(self.embeddings)
+            self._ann_trained_size = self.size
+            self._save_ann(force=True)
+            return
+        self.ann.add(self.embeddings[first_new_row:], first_new_row)
+        self._save_ann()
+
+    def _save_ann(self, force: bool = False):
+        if not self._ann_path:
+            return
+        self._ann_unsaved += 1
+        if force or self._ann_unsaved >= self.ann_save_every:
+            self.ann.save(self._ann_path)
+            self._ann_unsaved = 0
+
+    # ---------- compact codes ----------
+
+    def _load_compact(self):
+        codec = make_codec(self.compression, self.dim, self.pca_components)
+        self.compact = CompactIndex.load(self.store.directory, codec, self.size)
+        if self.compact is not None:
+            self.compact.add(self.embeddings[len(self.compact):])  # catch up unsaved rows
+        else:
+            self._update_compact(self.embeddings[:0])
+
+    def _update_compact(self, vectors: np.ndarray):
+        if not self.compression:
+            return
+        if self.compact is not None:
+            self.compact.add(vectors)
+            return
+        if self.size < self.compression_min_size:
+            return
+        codec = make_codec(self.compression, self.dim, self.pca_components)
+        sample = np.sort(np.random.default_rng(0).choice(self.size, min(self.size, 50_000), replace=False))
+        codec.fit(self.embeddings[sample])
+        self.compact = CompactIndex(codec, self.store.directory)
+        for start in range(0, self.size, 65536):
+            self.compact.add(self.embeddings[start:start + 65536], persist=False)
+        self.compact.save_codec()
+        log_event("VectorMemory: compact codes built", f"{self.compression}, {self.size} rows, {self.compact.nbytes} bytes")
+
+    def _rescore(self, queries: np.ndarray, candidates: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact cosine over each query's shortlisted rows (read from the full-precision store)."""
+        out_ids = np.empty((len(queries), k), dtype=np.int64)
+        out_scores = np.empty((len(queries), k), dtype=np.float32)
+        for qi, query in enumerate(queries):
+            rows = np.sort(candidates[qi])  # sequential reads from the memory map
+            scores = np.asarray(self.embeddings[rows]) @ query
+            best = np.argpartition(-scores, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+            best = best[np.argsort(-scores[best])]
+            out_ids[qi] = rows[best]
+            out_scores[qi] = scores[best]
+        return out_ids, out_scores
+
+    # ---------- hot tier ----------
+
+    def _admit_hot(self, rows: np.ndarray, vectors: np.ndarray, metas: List[Dict], access_count: int = 0):
+        """Add rows to the hot tier; recency starts at the row's own timestamp (backfills start cold)."""
+        now = time.time()
+        stamps = self.time_index.timestamps[rows] / 1000.0
+        last_access = np.where(stamps > 0, np.minimum(stamps, now), now)
+        facts = np.array([bool(meta.get("facts")) for meta in metas], dtype=bool)
+        self.hot.admit(rows, vectors, facts, last_access=last_access, access_count=access_count)
+        self._hot_changed(len(rows))
+
+    def _hot_changed(self, n: int = 1):
+        self._hot_unsaved += n
+        if self._hot_unsaved >= self.hot_save_every:
+            self.save_hot()
+
+    def save_hot(self):
+        if self.hot is not None:
+            self.hot.save()
+            self._hot_unsaved = 0
+
+    def save(self):
+        """Persist state that is written behind (hot-tier membership, sorted time order); call on shutdown."""
+        self.save_hot()
+        self.time_index.save_order()
+
+    def _warm_hot(self):
+        """No saved hot set (new store, or hot tier just enabled): start from the newest live rows."""
+        rows = self.time_index.window()[::-1]
+        if self._n_deleted:
+            rows = rows[~self._deleted[rows]]
+        rows = np.sort(rows[:self.hot.capacity])
+        if len(rows):
+            self._admit_hot(rows, np.asarray(self.embeddings[rows]), self.store.get_metadata_many(rows))
+
+    def _tiered_search(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k from the hot tier; queries whose hot answer is weak fall through to the full
+        (cold) search, and the cold rows they return are promoted into the hot tier.
+        """
+        queries = self._normalize(queries)
+        k = min(top_k, self.live_count)
+        if k <= 0:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+        ids, scores = self.hot.search(queries, k)
+        cold = self.hot.needs_cold(scores)
+        if len(self.hot) >= self.live_count:
+            cold[:] = False  # everything is hot; the store has nothing more to offer
+        self.hot.stats["hot_queries"] += int((~cold).sum())
+        if cold.any():
+            self.hot.stats["cold_queries"] += int(cold.sum())
+            cold_ids, cold_scores = self.search_vectors(queries[cold], k)
+            ids[cold], scores[cold] = -1, -np.inf
+            ids[np.ix_(cold, np.arange(cold_ids.shape[1]))] = cold_ids
+            scores[np.ix_(cold, np.arange(cold_ids.shape[1]))] = cold_scores
+            promote = np.array(sorted({int(r) for r in cold_ids.ravel() if r >= 0 and r not in self.hot}),
+                               dtype=np.int64)
+            if len(promote):
+                self.hot.stats["promotions"] += len(promote)
+                self._admit_hot(promote, np.asarray(self.embeddings[promote]),
+                                self.store.get_metadata_many(promote))
+        hits = ids[ids >= 0]
+        self.hot.touch(hits)
+        self._hot_changed(len(hits))
+        return ids, scores
+
+    def hot_stats(self) -> Optional[Dict]:
+        return self.hot.snapshot() if self.hot is not None else None
+
+    def update_metadata(self, row: int, meta: Dict):
+        """Replace one row's metadata in place (the vector is kept); moves its timestamp in the time index."""
+        if self.store is not None:
+            self.store.update_metadata(row, meta)
+        else:
+            if self.backend is not None:
+                self.backend.update_vector_meta(row, meta)
+            self.metadata[row] = meta
+        self.time_index.update(row, meta.get("timestamp"))
+        if self.lexical is not None:
+            self.lexical.update_row(row, meta)
+
+    def add(self, text: str, meta: Dict, vector: Optional[np.ndarray] = None) -> int:
+        """
+        Insert one entry; returns its row id. A near-duplicate of an existing row is
+        merged into it instead: that row keeps its vector, takes the new text,
+        metadata and timestamp, and its merge count goes up. Nothing is appended.
+        """
+        vec = self._normalize(vector if vector is not None else self.encode(text))
+        duplicate = self.dedup.find_duplicate(text, vec[0]) if self.dedup is not None else None
+        if duplicate is not None:
+            self.update_metadata(duplicate, meta)
+            self.dedup.merge(duplicate)
+            self.dedup.remember(duplicate, text)
+            if self.hot is not None:
+                self.hot.touch([duplicate])  # repeated content counts as a use
+            return duplicate
+        self._append(vec, [meta])
+        row = self.size - 1
+        if self.dedup is not None:
+            self.dedup.remember(row, text)
+        return row
+
+    def add_memory(self, text: str, metadata: Dict = None, vector: Optional[np.ndarray] = None) -> int:
         """Alias for add method to match expected interface"""
         if metadata is None:
             metadata = {}
         metadata["text"] = text  # Ensure text is stored in metadata
-        self.add(text, metadata)
+        return self.add(text, metadata, vector=vector)
+
+    def add_batch(self, texts: List[str], metas: List[Dict], vectors: Optional[np.ndarray] = None):
+        """Bulk insert: one encode call and one block write for the whole batch."""
+        if not texts:
+            return
+        if vectors is None:
+            vectors = self.encode_batch(texts)
+        for text, meta in zip(texts, metas):
+            meta["text"] = text
+        self._append(self._normalize(vectors), list(metas))
+
+    def search_vectors(self, query_vectors: np.ndarray, top_k: int = 3,
+                       rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cosine top-k for one or many query vectors (exact, or IVF once the corpus is large).
+        Removed (tombstoned) rows never appear.
+        :param rows: restrict the search to these row ids (e.g. a time window); always exact
+        :return: (indices, scores), each shape (n_queries, k), best first; may be padded with -1
+        """
+        queries = self._normalize(query_vectors)
+        if rows is not None:
+            if self._n_deleted:
+                rows = rows[~self._deleted[rows]]
+            k = min(top_k, len(rows))
+            if k <= 0:
+                return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+            return self._rescore(queries, np.broadcast_to(rows, (len(queries), len(rows))), k)
+        k = min(top_k, self.live_count)
+        if k <= 0:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+        # Approximate paths cannot see tombstones, so over-fetch and filter afterwards
+        fetch = min(self.size, k + min(self._n_deleted, 4 * k + 16))
+        if self.ann is not None and self.size >= self.ann_min_size:
+            ids, scores = self.ann.search(queries, fetch, self.embeddings)
+            return self._drop_deleted(ids, scores, k) if self._n_deleted else (ids, scores)
+        if self.compact is not None and len(self.compact) == self.size:
+            candidates = self.compact.candidates(queries, min(self.size, fetch * self.rescore_factor))
+            ids, scores = self._rescore(queries, candidates, fetch)
+            return self._drop_deleted(ids, scores, k) if self._n_deleted else (ids, scores)
+        scores = queries @ self.embeddings.T  # (n_queries, size)
+        if self._n_deleted:
+            scores[:, self._deleted[:self.size]] = -np.inf
+        if k < self.size:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(self.size), (len(queries), self.size))
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
 
-    def _rebuild_index(self):
-        if self.embeddings:
-            self.nn = NearestNeighbors(n_neighbors=3, metric="cosine")
-            self.nn.fit(np.array(self.embeddings))
+    def search_all(self, query_vectors: np.ndarray, top_k: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k over all live rows: through the hot tier when there is one, else search_vectors()."""
+        if self.hot is not None:
+            return self._tiered_search(query_vectors, top_k)
+        return self.search_vectors(query_vectors, top_k)
 
-    def search(self, query: str, top_k=3) -> List[str]:
-        if not self.embeddings:
+    def search(self, query: str, top_k=3, vector: Optional[np.ndarray] = None) -> List[str]:
+        return [meta["text"] for meta in self.query(query, top_k=top_k, vector=vector)]
+
+    def query(self, query: str, top_k=3, vector: Optional[np.ndarray] = None,
+              since=None, until=None) -> List[Dict]:
+        """Alias for search method that returns metadata dicts; `since`/`until` bound the timestamp"""
+        if not self.live_count:
             return []
-        qvec = self.model.encode(query).reshape(1, -1)
-        dists, indices = self.nn.kneighbors(qvec, n_neighbors=min(top_k, len(self.embeddings)))
-        return [self.metadata[i]["text"] for i in indices[0]]
+        rows = None
+        if since is not None or until is not None:
+            rows = self.time_index.window(since, until)
+            if not len(rows):
+                return []
+        qvec = vector if vector is not None else self.encode(query)
+        if rows is None:
+            indices, _ = self.search_all(qvec, top_k)
+        else:
+            indices, _ = self.search_vectors(qvec, top_k, rows=rows)
+        return [self.metadata[i] for i in indices[0] if i >= 0]
+
+    def list_window(self, since=None, until=None, limit: Optional[int] = None,
+                    newest_first: bool = True) -> List[Dict]:
+        """Metadata of the memories stored in a time window, in time order (no encoder call)."""
+        rows = self.time_index.window(since, until)
+        if self._n_deleted:
+            rows = rows[~self._deleted[rows]]
+        if newest_first:
+            rows = rows[::-1]
+        if limit is not None:
+            rows = rows[:limit]
+        return [self.metadata[i] for i in rows]
 
-    def query(self, query: str, top_k=3) -> List[Dict]:
-        """Alias for search method that returns metadata dicts"""
-        if not self.embeddings:
+    def query_batch(self, queries: List[str], top_k=3, vectors: Optional[np.ndarray] = None) -> List[List[Dict]]:
+        """Answer many queries with one batched encode and one matrix-matrix product."""
+        if not queries:
             return []
-        qvec = self.model.encode(query).reshape(1, -1)
-        dists, indices = self.nn.kneighbors(qvec, n_neighbors=min(top_k, len(self.embeddings)))
-        return [self.metadata[i] for i in indices[0]]
+        if not self.size:
+            return [[] for _ in queries]
+        qvecs = vectors if vectors is not None else self.encode_batch(queries)
+        indices, _ = self.search_all(qvecs, top_k)
+        return [[self.metadata[i] for i in row if i >= 0] for row in indices]
@@ -0,0 +1,194 @@
+# memory/vector_store.py
+
+import json
+import os
+from typing import Dict, List, Optional
+import numpy as np
+
+HEADER_FILE = "header.json"
+VECTORS_FILE = "vectors.f32"
+METADATA_FILE = "metadata.jsonl"
+OFFSETS_FILE = "metadata.idx"
+FORMAT_VERSION = 1
+
+
+class VectorStore:
+    """
+    Append-only on-disk embedding store:
+      header.json     model name, dimension and the committed row count
+      vectors.f32     raw float32 rows, memory-mapped read-only
+      metadata.jsonl  one JSON object per row
+      metadata.idx    int64 byte offset of each metadata line (memory-mapped)
+    Opening maps the files instead of reading them, so startup cost does not grow
+    with the number of rows. An append writes and fsyncs the data files first and
+    then atomically replaces the header; rows past the committed count (a torn
+    write) are truncated on the next open. update_metadata() appends the row's new
+    metadata line, commits it in the header, then repoints the row's offset.
+    """
+
+    def __init__(self, directory: str, model_name: str, dim: int):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._path = lambda name: os.path.join(directory, name)
+        header = self._read_header()
+        if header is None:
+            header = {"version": FORMAT_VERSION, "model": model_name, "dim": dim, "dtype": "float32", "count": 0}
+            self._write_header(header)
+        elif header["model"] != model_name or header["dim"] != dim:
+            raise ValueError(
+                f"Vector store {directory} was built with {header['model']} (dim {header['dim']}), "
+                f"not {model_name} (dim {dim})"
+            )
+        self.header = header
+        self.dim = dim
+        self._recover()
+        self._remap()
+
+    # ---------- header / recovery ----------
+
+    def _read_header(self):
+        try:
+            with open(self._path(HEADER_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_header(self, header: Dict):
+        tmp = self._path(HEADER_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(HEADER_FILE))
+
+    def _recover(self):
+        """Drop anything written after the last committed header (crash mid-append)."""
+        count = self.header["count"]
+        for name, size in ((VECTORS_FILE, count * self.dim * 4), (OFFSETS_FILE, count * 8)):
+            path = self._path(name)
+            if not os.path.exists(path):
+                open(path, "wb").close()
+            if os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+        meta_path = self._path(METADATA_FILE)
+        if not os.path.exists(meta_path):
+            open(meta_path, "wb").close()
+        if "meta_bytes" in self.header:
+            end = self.header["meta_bytes"]
+        elif count:  # stores written before meta_bytes: the last row's line ends the file
+            offsets = np.memmap(self._path(OFFSETS_FILE), dtype=np.int64, mode="r", shape=(count,))
+            with open(meta_path, "rb") as f:
+                f.seek(int(offsets[-1]))
+                end = int(offsets[-1]) + len(f.readline())
+            del offsets
+        else:
+            end = 0
+        if os.path.getsize(meta_path) > end:
+            with open(meta_path, "r+b") as f:
+                f.truncate(end)
+
+    def _remap(self):
+        count = self.header["count"]
+        if count:
+            self.vectors = np.memmap(self._path(VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, self.dim))
+            self._offsets = np.memmap(self._path(OFFSETS_FILE), dtype=np.int64, mode="r", shape=(count,))
+        else:
+            self.vectors = np.empty((0, self.dim), dtype=np.float32)
+            self._offsets = np.empty(0, dtype=np.int64)
+
+    # ---------- API ----------
+
+    def __len__(self):
+        return self.header["count"]
+
+    def append(self, vectors: np.ndarray, metas: List[Dict]):
+        """Durably append rows (vectors must already be float32, shape (n, dim))."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        meta_path = self._path(METADATA_FILE)
+        offset = os.path.getsize(meta_path)
+        offsets = np.empty(len(metas), dtype=np.int64)
+        lines = []
+        for i, meta in enumerate(metas):
+            line = (json.dumps(meta, ensure_ascii=False) + "\n").encode("utf-8")
+            offsets[i] = offset
+            offset += len(line)
+            lines.append(line)
+        for name, payload in ((VECTORS_FILE, vectors.tobytes()), (OFFSETS_FILE, offsets.tobytes()),
+                              (METADATA_FILE, b"".join(lines))):
+            with open(self._path(name), "ab") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+        self.header["count"] += len(metas)
+        self.header["meta_bytes"] = offset
+        self._write_header(self.header)  # commit point
+        self._remap()
+
+    def update_metadata(self, index: int, meta: Dict):
+        """Replace one row's metadata (the vector is kept)."""
+        line = (json.dumps(meta, ensure_ascii=False) + "\n").encode("utf-8")
+        meta_path = self._path(METADATA_FILE)
+        offset = os.path.getsize(meta_path)
+        with open(meta_path, "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.header["meta_bytes"] = offset + len(line)
+        self._write_header(self.header)  # the new line survives recovery from here on
+        with open(self._path(OFFSETS_FILE), "r+b") as f:  # the read-only map shares these pages
+            f.seek(index * 8)
+            f.write(np.int64(offset).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def get_metadata(self, index: int) -> Dict:
+        if index < 0:
+            index += len(self)
+        with open(self._path(METADATA_FILE), "rb") as f:
+            f.seek(int(self._offsets[index]))
+            return json.loads(f.readline())
+
+    def get_metadata_many(self, indices) -> List[Dict]:
+        """Metadata of many rows with one open; lines are read in file order."""
+        offsets = [int(self._offsets[i]) for i in indices]
+        metas: List[Optional[Dict]] = [None] * len(offsets)
+        with open(self._path(METADATA_FILE), "rb") as f:
+            for k in sorted(range(len(offsets)), key=offsets.__getitem__):
+                f.seek(offsets[k])
+                metas[k] = json.loads(f.readline())
+        return metas
+
+    def iter_metadata(self, start: int = 0, stop: Optional[int] = None):
+        """
+        Scan of metadata rows start..stop-1 (for rebuilds/backfills). Sequential reads;
+        a seek only where a row's line was replaced by update_metadata().
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return
+        with open(self._path(METADATA_FILE), "rb") as f:
+            position = -1
+            for index in range(start, stop):
+                offset = int(self._offsets[index])
+                if offset != position:
+                    f.seek(offset)
+                line = f.readline()
+                position = offset + len(line)
+                yield json.loads(line)
+
+
+class MetadataView:
+    """List-like read access to a VectorStore's metadata (rows are read on demand)."""
+
+    def __init__(self, store: VectorStore):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, index: int) -> Dict:
+        return self.store.get_metadata(index)
+
+    def __iter__(self):
+        return self.store.iter_metadata()
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def event_log(tmp_path, monkeypatch):
+    """Send log_event output to a temp file instead of data/logs/events.log."""
+    from utils import logger
+    path = tmp_path / "events.log"
+    monkeypatch.setattr(logger, "LOG_FILE", str(path))
+    return path
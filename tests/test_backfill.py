@@ -0,0 +1,69 @@
+import json
+
+from memory.backfill import iter_log_turns
+
+
+def write_lines(path, entries, tail: str = ""):
+    with open(path, "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+        f.write(tail)
+
+
+def turns(path, offset: int = 0):
+    return [(turn["user"], turn["assistant"]) for turn, _ in iter_log_turns(str(path), offset)]
+
+
+def test_memory_bus_lines_and_offsets(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_lines(path, [{"time": "t1", "user": "hi", "assistant": "hello"},
+                       {"time": "t2", "user": "bye", "assistant": "see you"}])
+    result = list(iter_log_turns(str(path)))
+    assert [(t["user"], t["assistant"], t["time"]) for t, _ in result] == [
+        ("hi", "hello", "t1"), ("bye", "see you", "t2")]
+    assert result[-1][1] == path.stat().st_size
+    assert turns(path, result[0][1]) == [("bye", "see you")]
+
+
+def test_session_logger_lines_are_paired(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_lines(path, [
+        {"time": "t1", "role": "user", "text": "first"},
+        {"time": "t2", "role": "user", "text": "second"},  # first never got a reply
+        {"time": "t3", "role": "assistant", "text": "answer"},
+        {"time": "t4", "role": "assistant", "text": "orphan reply"},
+    ])
+    assert turns(path) == [("first", ""), ("second", "answer"), ("", "orphan reply")]
+
+
+def test_unpaired_user_line_is_left_for_the_next_run(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_lines(path, [{"time": "t1", "role": "user", "text": "q1"},
+                       {"time": "t2", "role": "assistant", "text": "a1"},
+                       {"time": "t3", "role": "user", "text": "q2"}])
+    result = list(iter_log_turns(str(path)))
+    assert [(t["user"], t["assistant"]) for t, _ in result] == [("q1", "a1")]
+
+    write_lines(path, [{"time": "t4", "role": "assistant", "text": "a2"}])
+    resumed = list(iter_log_turns(str(path), result[-1][1]))
+    assert [(t["user"], t["assistant"], t["time"]) for t, _ in resumed] == [("q2", "a2", "t3")]
+
+
+def test_torn_last_line_is_not_consumed(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_lines(path, [{"time": "t1", "user": "hi", "assistant": "hello"}], tail='{"time": "t2", "user": "mid')
+    result = list(iter_log_turns(str(path)))
+    assert len(result) == 1
+    end = result[0][1]
+    assert end < path.stat().st_size
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('-write", "assistant": "done"}\n')
+    assert turns(path, end) == [("mid-write", "done")]
+
+
+def test_malformed_line_in_the_middle_is_skipped(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_lines(path, [{"time": "t1", "user": "a", "assistant": "b"}], tail="not json\n")
+    write_lines(path, [{"time": "t2", "user": "c", "assistant": "d"}])
+    assert turns(path) == [("a", "b"), ("c", "d")]
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+from datetime import date
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")  # imported by memory.vector_memory
+
+from memory.digests import DigestIndex
+from memory.embedding_service import EmbeddingService
+from memory.vector_memory import VectorMemory
+
+DIM = 256
+TODAY = date(2026, 1, 10)
+TOPICS = {
+    "2026-01-05": "pasta tomato basil recipe",
+    "2026-01-06": "flight lisbon booking gate",
+    "2026-01-07": "tax return deadline accountant",
+}
+
+
+class BagOfWords:
+    """Deterministic encoder: hashed word counts, so texts sharing words are similar."""
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        def one(text):
+            vector = np.zeros(DIM, dtype=np.float32)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % DIM] += 1
+            return vector
+        return one(texts) if isinstance(texts, str) else np.array([one(t) for t in texts])
+
+
+class EchoSummarizer:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    async def digest(self, text, period):
+        self.calls += 1
+        return "" if self.fail else text  # Summarizer.digest returns "" when the LLM fails
+
+
+def build(tmp_path, summarizer, rows_per_day: int = 10):
+    memory = VectorMemory(model=BagOfWords(), store_path=str(tmp_path / "store"))
+    for day, topic in TOPICS.items():
+        for i in range(rows_per_day):
+            memory.add_memory(f"User: {topic} Assistant: noted", {"timestamp": f"{day}T{9 + i:02d}:00:00"})
+    memory.add_memory("User: lisbon hotel reservation Assistant: booked", {"timestamp": "2026-01-10T08:00:00"})
+    service = EmbeddingService(memory)
+    digests = DigestIndex(service, summarizer, index_path=str(tmp_path / "digests"), periods=1, min_score=0.2)
+    return memory, service, digests
+
+
+def run(service, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await service.shutdown()
+    return asyncio.run(main())
+
+
+def test_search_scores_matched_period_and_undigested_tail(tmp_path):
+    memory, service, digests = build(tmp_path, EchoSummarizer())
+
+    async def scenario():
+        assert await digests.consolidate(today=TODAY) == 3
+        return await digests.asearch(memory.encode("lisbon hotel"), top_k=3)
+
+    hits = run(service, scenario())
+    assert hits and all("lisbon" in hit["text"] for hit in hits)
+    assert "hotel" in hits[0]["text"]  # today's row, not digested yet
+    assert digests.stats["rows_scored"] == 10 + 1  # one day of rows plus the tail, not all 31
+    assert digests.covered_until == "2026-01-08T00:00:00"
+
+
+def test_search_falls_back_when_no_digest_matches(tmp_path):
+    memory, service, digests = build(tmp_path, EchoSummarizer())
+
+    async def scenario():
+        await digests.consolidate(today=TODAY)
+        return await digests.asearch(memory.encode("zebra quantum"), top_k=3)
+
+    assert run(service, scenario()) is None
+    assert digests.stats["fallbacks"] == 1
+
+
+def test_failed_digest_is_not_recorded(tmp_path):
+    summarizer = EchoSummarizer(fail=True)
+    memory, service, digests = build(tmp_path, summarizer)
+
+    async def scenario():
+        built = await digests.consolidate(today=TODAY)
+        hits = await digests.asearch(memory.encode("lisbon flight"))
+        summarizer.fail = False
+        return built, hits, await digests.consolidate(today=TODAY)
+
+    failed, hits, retried = run(service, scenario())
+    assert failed == 0 and hits is None
+    assert summarizer.calls > 1
+    assert retried == 3 and len(digests.coarse.metadata) == 3
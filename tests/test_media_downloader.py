@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import json
+import os
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from tools.media_downloader import DownloadEngine
+
+DATA = os.urandom(300 * 1024 + 123)  # last chunk is partial
+CHUNK = 64 * 1024
+
+
+class FileServer:
+    """Serves DATA at /f; records every Range header and can fail chosen chunks."""
+
+    def __init__(self, ranges: bool = True, fail_chunks=()):
+        self.ranges = ranges
+        self.fail_chunks = set(fail_chunks)
+        self.requests = []
+
+    async def handle(self, request):
+        header = request.headers.get("Range")
+        self.requests.append(header)
+        if not self.ranges or header is None:
+            return web.Response(body=DATA)
+        first, last = (int(x) for x in header.split("=")[1].split("-"))
+        if first // CHUNK in self.fail_chunks and first > 0:
+            return web.Response(status=500)
+        return web.Response(status=206, body=DATA[first:last + 1],
+                            headers={"Content-Range": f"bytes {first}-{last}/{len(DATA)}", "ETag": '"v1"'})
+
+
+def run(server: FileServer, coro_fn):
+    async def main():
+        app = web.Application()
+        app.router.add_get("/f", server.handle)
+        test_server = TestServer(app)
+        await test_server.start_server()
+        engine = DownloadEngine(chunk_size=CHUNK, parallel=3, read_size=4096)
+        try:
+            return await coro_fn(engine, str(test_server.make_url("/f")))
+        finally:
+            await engine.close()
+            await test_server.close()
+    return asyncio.run(main())
+
+
+def test_chunked_range_download(tmp_path):
+    server = FileServer()
+    dest = str(tmp_path / "out.bin")
+    progress = []
+    result = run(server, lambda engine, url: engine.download(
+        url, dest, sha256=hashlib.sha256(DATA).hexdigest(), on_progress=lambda done, total: progress.append(done)))
+
+    assert open(dest, "rb").read() == DATA
+    assert result["verified"] is True and result["resumed"] is False
+    assert result["size"] == len(DATA)
+    n_chunks = -(-len(DATA) // CHUNK)
+    assert len(server.requests) == 1 + n_chunks  # probe + one request per chunk
+    assert progress[-1] == len(DATA)
+    assert not os.path.exists(dest + ".part") and not os.path.exists(dest + ".part.json")
+
+
+def test_resume_from_part_json(tmp_path):
+    dest = str(tmp_path / "out.bin")
+    server = FileServer(fail_chunks={3})
+
+    async def interrupted_then_resumed(engine, url):
+        with pytest.raises(IOError):
+            await engine.download(url, dest)
+        state = json.load(open(dest + ".part.json"))
+        server.fail_chunks.clear()
+        server.requests.clear()
+        return state, await engine.download(url, dest)
+
+    state, result = run(server, interrupted_then_resumed)
+    assert 3 not in state["done"] and state["done"]
+    assert result["resumed"] is True
+    assert open(dest, "rb").read() == DATA
+    refetched = {int(r.split("=")[1].split("-")[0]) // CHUNK for r in server.requests[1:]}
+    assert 3 in refetched and not refetched & set(state["done"])
+
+
+def test_no_range_support_falls_back_to_stream(tmp_path):
+    server = FileServer(ranges=False)
+    dest = str(tmp_path / "out.bin")
+    result = run(server, lambda engine, url: engine.download(url, dest))
+
+    assert open(dest, "rb").read() == DATA
+    assert result["resumed"] is False
+    assert len(server.requests) == 2  # probe + one plain GET
+    assert not os.path.exists(dest + ".part.json")
+
+
+def test_checksum_mismatch_removes_partial_file(tmp_path):
+    dest = str(tmp_path / "out.bin")
+    with pytest.raises(ValueError, match="checksum mismatch"):
+        run(FileServer(), lambda engine, url: engine.download(url, dest, sha256="0" * 64))
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".part") and not os.path.exists(dest + ".part.json")
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from tools.schedule_manager import ReminderScheduler, parse_reminder
+
+
+def fire_all(scheduler: ReminderScheduler, adds, wait_s: float = 0.3):
+    """Start the run loop, apply `adds` (callables) and return the texts fired within wait_s."""
+    fired = []
+    scheduler.on_fire = lambda reminder: fired.append(reminder["text"])
+
+    async def main():
+        scheduler.start()
+        for add in adds:
+            add()
+            await asyncio.sleep(0)
+        await asyncio.sleep(wait_s)
+        await scheduler.stop()
+    asyncio.run(main())
+    return fired
+
+
+def test_fires_in_due_order(tmp_path):
+    scheduler = ReminderScheduler(str(tmp_path / "reminders.jsonl"))
+    now = time.time()
+    fired = fire_all(scheduler, [
+        lambda: scheduler.add("third", now + 0.09),
+        lambda: scheduler.add("first", now + 0.01),
+        lambda: scheduler.add("second", now + 0.05),
+    ])
+    assert fired == ["first", "second", "third"]
+    assert scheduler.pending() == []
+
+
+def test_earlier_reminder_wakes_the_loop(tmp_path):
+    scheduler = ReminderScheduler(str(tmp_path / "reminders.jsonl"))
+    now = time.time()
+    fired = fire_all(scheduler, [
+        lambda: scheduler.add("later", now + 60),
+        lambda: scheduler.add("soon", now + 0.02),
+    ])
+    assert fired == ["soon"]
+    assert [r["text"] for r in scheduler.pending()] == ["later"]
+
+
+def test_cancelled_reminder_does_not_fire(tmp_path):
+    scheduler = ReminderScheduler(str(tmp_path / "reminders.jsonl"))
+    now = time.time()
+    doomed = scheduler.add("cancelled", now + 0.02)
+    assert scheduler.cancel(doomed["id"])
+    assert not scheduler.cancel(doomed["id"])
+    fired = fire_all(scheduler, [lambda: scheduler.add("kept", now + 0.04)])
+    assert fired == ["kept"]
+
+
+def test_journal_replay_skips_cancelled_and_torn_lines(tmp_path):
+    path = tmp_path / "reminders.jsonl"
+    scheduler = ReminderScheduler(str(path))
+    now = time.time()
+    a = scheduler.add("a", now + 300)
+    b = scheduler.add("b", now + 100)
+    c = scheduler.add("c", now + 200)
+    scheduler.cancel(a["id"])
+    asyncio.run(scheduler.stop())
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "id": 99, "du')  # crash mid-write
+
+    replayed = ReminderScheduler(str(path))
+    assert [r["text"] for r in replayed.pending()] == ["b", "c"]
+    assert replayed.add("d", now + 400)["id"] > c["id"]  # ids are not reused
+    assert b["id"] in replayed.reminders
+
+
+def test_compaction_keeps_only_live_reminders(tmp_path):
+    path = tmp_path / "reminders.jsonl"
+    scheduler = ReminderScheduler(str(path), compact_min_ops=10)
+    now = time.time()
+    for i in range(20):
+        reminder = scheduler.add(f"r{i}", now + 1000 + i)
+        if i % 4:
+            scheduler.cancel(reminder["id"])
+    asyncio.run(scheduler.stop())
+
+    lines = [json.loads(line) for line in open(path, encoding="utf-8")]
+    assert len(lines) < 40  # 20 adds + 15 cancels without compaction
+    replayed = ReminderScheduler(str(path))
+    assert sorted(r["text"] for r in replayed.reminders.values()) == ["r0", "r12", "r16", "r4", "r8"]
+
+
+def test_parse_reminder():
+    now = datetime(2026, 3, 2, 14, 0)
+    text, due = parse_reminder("remind me to call mom in 10 minutes", now=now)
+    assert text == "call mom"
+    assert due == datetime(2026, 3, 2, 14, 10).timestamp()
+    text, due = parse_reminder("set reminder at 9 am to pay rent", now=now)
+    assert text == "pay rent"
+    assert due == datetime(2026, 3, 3, 9, 0).timestamp()  # 9 am already passed today
+    assert parse_reminder("remind me to stretch", now=now)[1] is None
@@ -1,2 +1,237 @@
-def search_files(query):
-    return f"Searching for files related to: {query}"
+# tools/file_search.py
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional
+from config.settings import load_config
+from utils.logger import log_event
+
+STOP_WORDS = {
+    "find", "search", "for", "file", "files", "document", "documents", "my", "the", "a", "an",
+    "named", "called", "please", "me", "locate", "where", "is", "are", "in", "of", "with",
+    "can", "could", "you", "i", "on", "to", "at", "it", "this", "that", "some", "look", "show",
+    "get", "open", "computer", "pc", "laptop", "disk", "drive", "folder", "somewhere", "do", "have"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime REAL);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE, dir TEXT, name TEXT, ext TEXT, size INTEGER, mtime REAL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE INDEX IF NOT EXISTS files_ext ON files(ext);
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(tokens, content='', tokenize='unicode61');
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def name_tokens(name: str) -> str:
+    """Split a file name into search tokens: 'MyReport_2024-final.pdf' -> 'my report 2024 final pdf'."""
+    spaced = re.sub(r"(?<=[a-z])(?=[A-Z])", " ", name)
+    return " ".join(t for t in re.split(r"[^0-9A-Za-z]+", spaced.lower()) if t)
+
+
+def _scan_dir(path: str, known_mtime: Optional[float] = None):
+    """
+    Worker: list one directory (non-recursive). Returns (mtime, files, subdirs), or
+    (mtime, None, None) when the mtime still equals known_mtime (not listed), or None.
+    """
+    try:
+        mtime = os.stat(path).st_mtime
+        if mtime == known_mtime:
+            return mtime, None, None
+        files, subdirs = [], []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith("."):
+                            subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        files.append((entry.path, entry.name, st.st_size, st.st_mtime))
+                except OSError:
+                    continue
+        return mtime, files, subdirs
+    except OSError:
+        return None
+
+
+class FileIndex:
+    """
+    Persistent SQLite index of files under the configured roots (path, name tokens,
+    extension, size, mtime). Directories are listed in parallel on a thread pool;
+    rescans stat each directory and list only those whose mtime has changed. Only a
+    bounded number of directory listings is held in memory at once, so huge trees
+    index fine. Searches match any query word and rank by BM25, then recency.
+    """
+
+    def __init__(self, db_path: str, roots: List[str], workers: int = 8, max_pending: int = 256):
+        self.db_path = db_path
+        self.roots = [os.path.abspath(os.path.expanduser(r)) for r in roots]
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def last_scan(self) -> float:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key='last_scan'").fetchone()
+        return float(row[0]) if row else 0.0
+
+    def rescan(self) -> Dict:
+        """Walk all roots, refreshing only changed directories. Returns scan statistics."""
+        if not self._lock.acquire(blocking=False):
+            return {"skipped": True}  # a scan is already running
+        try:
+            start = time.perf_counter()
+            stats = {"dirs_scanned": 0, "dirs_unchanged": 0, "files_indexed": 0}
+            conn = self._connect()
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="file-index") as pool:
+                    todo = list(self.roots)
+                    pending = {}
+                    while todo or pending:
+                        while todo and len(pending) < self.max_pending:
+                            path = todo.pop()
+                            row = conn.execute("SELECT mtime FROM dirs WHERE path=?", (path,)).fetchone()
+                            pending[pool.submit(_scan_dir, path, row[0] if row else None)] = path
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            path = pending.pop(future)
+                            todo.extend(self._apply_scan(conn, path, future.result(), stats))
+                        conn.commit()
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_scan', ?)", (str(time.time()),))
+                conn.commit()
+            finally:
+                conn.close()
+            stats["seconds"] = round(time.perf_counter() - start, 3)
+            log_event("FileIndex rescan", stats)
+            return stats
+        finally:
+            self._lock.release()
+
+    def _apply_scan(self, conn, path: str, result, stats: Dict) -> List[str]:
+        """Write one directory listing to the index; returns subdirectories still to visit."""
+        if result is None:
+            self._forget_dir(conn, path)
+            return []
+        mtime, files, subdirs = result
+        if files is None:
+            # Entries unchanged (not listed): descend into the known subdirectories only
+            stats["dirs_unchanged"] += 1
+            return [r[0] for r in conn.execute("SELECT path FROM dirs WHERE parent=?", (path,))]
+
+        stats["dirs_scanned"] += 1
+        old_subdirs = {r[0] for r in conn.execute("SELECT path FROM dirs WHERE parent=?", (path,))}
+        for gone in old_subdirs - set(subdirs):
+            self._forget_dir(conn, gone)
+        self._delete_files(conn, "dir=?", (path,))
+        for fpath, name, size, fmtime in files:
+            ext = os.path.splitext(name)[1].lower().lstrip(".")
+            cur = conn.execute(
+                "INSERT INTO files (path, dir, name, ext, size, mtime) VALUES (?, ?, ?, ?, ?, ?)",
+                (fpath, path, name, ext, size, fmtime)
+            )
+            conn.execute("INSERT INTO names (rowid, tokens) VALUES (?, ?)", (cur.lastrowid, name_tokens(name)))
+        stats["files_indexed"] += len(files)
+        conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (path, os.path.dirname(path), mtime))
+        return subdirs
+
+    def _delete_files(self, conn, where: str, args):
+        rows = conn.execute(f"SELECT id, name FROM files WHERE {where}", args).fetchall()
+        for file_id, name in rows:
+            # contentless FTS5 tables need the original tokens to delete a row
+            conn.execute("INSERT INTO names (names, rowid, tokens) VALUES ('delete', ?, ?)", (file_id, name_tokens(name)))
+        conn.execute(f"DELETE FROM files WHERE {where}", args)
+
+    def _forget_dir(self, conn, path: str):
+        prefix = path.rstrip(os.sep) + os.sep
+        self._delete_files(conn, "dir=? OR dir LIKE ? ESCAPE '\\'", (path, _like_prefix(prefix)))
+        conn.execute("DELETE FROM dirs WHERE path=? OR path LIKE ? ESCAPE '\\'", (path, _like_prefix(prefix)))
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Answer from the index only: files whose name tokens start with any query word
+        (best BM25 first, then newest), optionally restricted to the given extensions.
+        """
+        terms = [t for t in re.split(r"[^0-9a-z.]+", query.lower()) if t and t not in STOP_WORDS]
+        exts = [t.lstrip(".") for t in terms if t.startswith(".")]
+        words = [t for t in terms if not t.startswith(".")]
+        words = [w for t in words for w in name_tokens(t).split()]
+        if not words and not exts:
+            return []
+        sql = "SELECT f.path, f.size, f.mtime FROM files f"
+        args = []
+        clauses = []
+        order = "f.mtime DESC"
+        if words:
+            sql += " JOIN names ON names.rowid = f.id"
+            clauses.append("names MATCH ?")
+            # OR: one unknown word (a filler the stop list misses) must not empty the result
+            args.append(" OR ".join(f'"{w}"*' for w in dict.fromkeys(words)))
+            order = "bm25(names), " + order
+        if exts:
+            clauses.append(f"f.ext IN ({','.join('?' * len(exts))})")
+            args.extend(exts)
+        sql += " WHERE " + " AND ".join(clauses) + f" ORDER BY {order} LIMIT ?"
+        args.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(sql, args).fetchall()
+        return [{"path": p, "size": s, "mtime": m} for p, s, m in rows]
+
+
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+_index: Optional[FileIndex] = None
+_rescan_task: Optional[asyncio.Future] = None
+
+
+def get_index() -> FileIndex:
+    global _index
+    if _index is None:
+        config = load_config()
+        _index = FileIndex(
+            config.get("file_search_index", "data/file_index.db"),
+            config.get("file_search_roots") or [],  # opt-in; nothing is indexed by default
+            workers=config.get("file_search_workers", 8)
+        )
+    return _index
+
+
+async def search_files(user_input: str, session_state=None) -> str:
+    """
+    Tool handler: answer from the index and refresh it in the background when stale.
+    """
+    global _rescan_task
+    index = get_index()
+    if not index.roots:
+        return "File search is not set up yet: add the folders to index under file_search_roots in config/settings.yaml."
+    loop = asyncio.get_running_loop()
+    max_age = load_config().get("file_search_rescan_minutes", 30) * 60
+    last_scan = index.last_scan()
+    if time.time() - last_scan > max_age and (_rescan_task is None or _rescan_task.done()):
+        _rescan_task = loop.run_in_executor(None, index.rescan)
+
+    hits = await loop.run_in_executor(None, index.search, user_input)
+    if hits:
+        return "\n".join(f"{hit['path']} ({hit['size']} bytes)" for hit in hits)
+    if not last_scan:
+        return "I'm still building the file index; please try again in a moment."
+    return "No matching files found."
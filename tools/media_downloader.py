@@ -1,2 +1,293 @@
-def download_media(url):
-    return f"Downloading media from: {url}"
+# tools/media_downloader.py
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse, unquote
+import aiohttp
+from config.settings import load_config
+from utils.logger import log_event
+
+
+class RateLimiter:
+    """Token bucket shared by all chunk workers of a download (bytes per second)."""
+
+    def __init__(self, bytes_per_sec: Optional[float]):
+        self.rate = bytes_per_sec
+        self.tokens = bytes_per_sec or 0.0
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def consume(self, nbytes: int):
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= nbytes or self.tokens >= self.rate:
+                    self.tokens -= nbytes  # may go negative for reads bigger than the bucket
+                    return
+                await asyncio.sleep((nbytes - self.tokens) / self.rate)
+
+
+class DownloadEngine:
+    """
+    Parallel, resumable HTTP downloader. Files are fetched as byte-range chunks by
+    `parallel` workers over one pooled aiohttp session and written in place into a
+    preallocated `<dest>.part` file, so memory use is one read buffer per worker.
+    Finished chunk indices are recorded in a `<dest>.part.json` sidecar, letting an
+    interrupted download resume where it stopped. Servers without range support
+    fall back to a single sequential stream.
+    """
+
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, chunk_size: int = 8 * 1024 * 1024,
+                 parallel: int = 4, rate_limit: Optional[float] = None, read_size: int = 64 * 1024):
+        self._session = session
+        self.chunk_size = chunk_size
+        self.parallel = parallel
+        self.rate_limit = rate_limit
+        self.read_size = read_size
+
+    async def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.parallel),
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=60)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def probe(self, url: str) -> Dict:
+        """Size, range support and validator for `url` (via a 1-byte range GET)."""
+        session = await self.session()
+        async with session.get(url, headers={"Range": "bytes=0-0"}, allow_redirects=True) as resp:
+            resp.raise_for_status()
+            info = {"url": str(resp.url), "etag": resp.headers.get("ETag") or resp.headers.get("Last-Modified")}
+            content_range = resp.headers.get("Content-Range", "")
+            if resp.status == 206 and "/" in content_range and not content_range.endswith("/*"):
+                info.update(size=int(content_range.rsplit("/", 1)[1]), ranges=True)
+            else:
+                length = resp.headers.get("Content-Length")
+                info.update(size=int(length) if length else None, ranges=False)
+            return info
+
+    async def download(self, url: str, dest: str, sha256: Optional[str] = None,
+                       on_progress: Optional[Callable[[int, Optional[int]], None]] = None) -> Dict:
+        """
+        Download `url` to `dest`. Returns {"path", "size", "sha256", "verified", "resumed", "seconds"}.
+        Raises ValueError on checksum mismatch (the partial file is removed).
+        """
+        start = time.perf_counter()
+        info = await self.probe(url)
+        part_path, state_path = dest + ".part", dest + ".part.json"
+        limiter = RateLimiter(self.rate_limit)
+        os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+
+        if info["ranges"] and info["size"]:
+            resumed = await self._download_ranges(info, part_path, state_path, limiter, on_progress)
+        else:
+            resumed = False
+            await self._download_stream(info, part_path, limiter, on_progress)
+
+        digest = await asyncio.get_running_loop().run_in_executor(None, _sha256_file, part_path)
+        verified = None
+        if sha256:
+            verified = digest.lower() == sha256.lower()
+            if not verified:
+                os.remove(part_path)
+                _remove_quietly(state_path)
+                raise ValueError(f"checksum mismatch for {dest}: expected {sha256}, got {digest}")
+        os.replace(part_path, dest)
+        _remove_quietly(state_path)
+        return {
+            "path": dest, "size": os.path.getsize(dest), "sha256": digest, "verified": verified,
+            "resumed": resumed, "seconds": round(time.perf_counter() - start, 2)
+        }
+
+    async def _download_ranges(self, info, part_path, state_path, limiter, on_progress) -> bool:
+        size = info["size"]
+        state = _load_state(state_path)
+        resumed = bool(
+            state and state.get("url") == info["url"] and state.get("size") == size
+            and state.get("etag") == info["etag"] and state.get("chunk_size") == self.chunk_size
+            and os.path.exists(part_path)
+        )
+        if not resumed:
+            state = {"url": info["url"], "size": size, "etag": info["etag"], "chunk_size": self.chunk_size, "done": []}
+            with open(part_path, "wb") as f:
+                f.truncate(size)  # preallocate (sparse where supported)
+            _save_state(state_path, state)
+
+        done = set(state["done"])
+        n_chunks = (size + self.chunk_size - 1) // self.chunk_size
+        queue = asyncio.Queue()
+        for index in range(n_chunks):
+            if index not in done:
+                queue.put_nowait(index)
+        progress = {"bytes": sum(min(self.chunk_size, size - i * self.chunk_size) for i in done)}
+        session = await self.session()
+
+        async def worker():
+            with open(part_path, "r+b") as f:
+                while True:
+                    try:
+                        index = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    first = index * self.chunk_size
+                    last = min(size, first + self.chunk_size) - 1
+                    headers = {"Range": f"bytes={first}-{last}"}
+                    async with session.get(info["url"], headers=headers) as resp:
+                        if resp.status != 206:
+                            raise IOError(f"server ignored range request (HTTP {resp.status})")
+                        f.seek(first)
+                        async for block in resp.content.iter_chunked(self.read_size):
+                            await limiter.consume(len(block))
+                            f.write(block)
+                            progress["bytes"] += len(block)
+                            if on_progress:
+                                on_progress(progress["bytes"], size)
+                    f.flush()
+                    done.add(index)
+                    state["done"] = sorted(done)
+                    _save_state(state_path, state)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.parallel, max(1, queue.qsize())))]
+        try:
+            finished, _ = await asyncio.wait(workers, return_when=asyncio.FIRST_EXCEPTION)
+            for task in finished:
+                task.result()  # re-raise the first failure
+        finally:
+            # on a failure (or when the download itself is cancelled) stop the other
+            # workers before they write more, then record exactly the chunks finished
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            state["done"] = sorted(done)
+            _save_state(state_path, state)
+        return resumed
+
+    async def _download_stream(self, info, part_path, limiter, on_progress):
+        session = await self.session()
+        received = 0
+        async with session.get(info["url"]) as resp:
+            resp.raise_for_status()
+            with open(part_path, "wb") as f:
+                async for block in resp.content.iter_chunked(self.read_size):
+                    await limiter.consume(len(block))
+                    f.write(block)
+                    received += len(block)
+                    if on_progress:
+                        on_progress(received, info["size"])
+
+
+def _sha256_file(path: str, block: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(block), b""):
+            h.update(data)
+    return h.hexdigest()
+
+
+def _load_state(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _save_state(path: str, state: Dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+# ---------- tool handler ----------
+
+_engine: Optional[DownloadEngine] = None
+
+
+def get_engine() -> DownloadEngine:
+    global _engine
+    if _engine is None:
+        config = load_config()
+        rate = config.get("download_rate_limit_kbps")
+        _engine = DownloadEngine(
+            chunk_size=config.get("download_chunk_mb", 8) * 1024 * 1024,
+            parallel=config.get("download_parallel", 4),
+            rate_limit=rate * 1024 if rate else None
+        )
+    return _engine
+
+
+async def download_media(user_input: str, session_state=None):
+    """
+    Tool handler. Returns an async generator of progress lines (the tool result is
+    streamed to the UI chunk by chunk by AgentCore).
+    """
+    return _download_with_progress(user_input)
+
+
+async def _download_with_progress(user_input: str):
+    match = re.search(r"https?://\S+", user_input)
+    if not match:
+        yield "Please include the direct URL of the file to download."
+        return
+    url = match.group(0).rstrip(").,;'\"")
+    checksum = re.search(r"\bsha256[:= ]+([0-9a-fA-F]{64})\b", user_input)
+    name = os.path.basename(unquote(urlparse(url).path)) or "download"
+    dest = os.path.join(load_config().get("download_dir", "data/downloads"), name)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    last = {"pct": -10}
+
+    def on_progress(done: int, total: Optional[int]):
+        pct = int(100 * done / total) if total else None
+        if pct is not None and pct >= last["pct"] + 10:
+            last["pct"] = pct - pct % 10
+            queue.put_nowait(f"⬇️ {name}: {last['pct']}% ({_format_bytes(done)} of {_format_bytes(total)})\n")
+
+    task = asyncio.ensure_future(get_engine().download(url, dest, checksum.group(1) if checksum else None, on_progress))
+    yield f"Downloading {url}\n"
+    while not task.done() or not queue.empty():
+        getter = asyncio.ensure_future(queue.get())
+        finished, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+        if getter in finished:
+            yield getter.result()
+        else:
+            getter.cancel()
+    try:
+        result = task.result()
+    except Exception as e:
+        log_event("Download failed", f"{url}: {e}")
+        yield f"❌ Download failed: {e}"
+        return
+    status = "checksum verified" if result["verified"] else f"sha256 {result['sha256'][:16]}…"
+    resumed = ", resumed" if result["resumed"] else ""
+    yield f"✅ Saved {result['path']} ({_format_bytes(result['size'])} in {result['seconds']}s{resumed}, {status})"
@@ -1,2 +1,215 @@
-def add_task_to_schedule(task):
-    return f"Added task to schedule: {task}"
+# tools/schedule_manager.py
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from config.settings import load_config
+from utils.logger import log_event
+
+
+class ReminderScheduler:
+    """
+    Asyncio reminder scheduler. Pending reminders sit in a min-heap keyed by due
+    time; the run loop sleeps until the earliest one (or until an earlier reminder
+    is added), so nothing polls. State is an append-only JSONL journal that is
+    replayed at startup and compacted once it grows well past the live set.
+    Add/cancel/fire are O(log n); cancelled entries are dropped lazily from the heap.
+    """
+
+    def __init__(self, journal_path: str, on_fire: Optional[Callable[[Dict], None]] = None,
+                 compact_min_ops: int = 1000):
+        self.journal_path = journal_path
+        self.on_fire = on_fire
+        self.compact_min_ops = compact_min_ops
+        self.reminders: Dict[int, Dict] = {}   # id -> {"id", "due", "text"}
+        self.heap: List[Tuple[float, int]] = []
+        self._ids = itertools.count(1)
+        self._journal_ops = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._load()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    # ---------- persistence ----------
+
+    def _load(self):
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        max_id = 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line after a crash
+                    self._journal_ops += 1
+                    max_id = max(max_id, op.get("id", 0))
+                    if op.get("op") == "add":
+                        self.reminders[op["id"]] = {"id": op["id"], "due": op["due"], "text": op["text"]}
+                    else:  # "done" / "cancel"
+                        self.reminders.pop(op.get("id"), None)
+        except FileNotFoundError:
+            pass
+        self.heap = [(r["due"], r["id"]) for r in self.reminders.values()]
+        heapq.heapify(self.heap)  # O(n) instead of n pushes
+        self._ids = itertools.count(max_id + 1)
+
+    def _append(self, op: Dict):
+        self._journal.write(json.dumps(op) + "\n")
+        self._journal.flush()
+        self._journal_ops += 1
+        if self._journal_ops > max(self.compact_min_ops, 2 * len(self.reminders)):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the journal with only live reminders (atomic replace)."""
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for r in self.reminders.values():
+                f.write(json.dumps({"op": "add", **r}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal.close()
+        os.replace(tmp, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_ops = len(self.reminders)
+
+    # ---------- API ----------
+
+    def add(self, text: str, due: float) -> Dict:
+        reminder = {"id": next(self._ids), "due": due, "text": text}
+        self.reminders[reminder["id"]] = reminder
+        self._append({"op": "add", **reminder})
+        heapq.heappush(self.heap, (due, reminder["id"]))
+        if self._wakeup is not None and self.heap[0][1] == reminder["id"]:
+            self._wakeup.set()  # new earliest deadline
+        return reminder
+
+    def cancel(self, reminder_id: int) -> bool:
+        if self.reminders.pop(reminder_id, None) is None:
+            return False
+        self._append({"op": "cancel", "id": reminder_id})
+        return True
+
+    def pending(self, limit: int = 10) -> List[Dict]:
+        return [self.reminders[i] for _, i in heapq.nsmallest(limit, self.heap) if i in self.reminders]
+
+    def start(self):
+        """Start the run loop on the current event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._journal.close()
+
+    async def _run(self):
+        while True:
+            # Drop cancelled entries lazily
+            while self.heap and self.heap[0][1] not in self.reminders:
+                heapq.heappop(self.heap)
+            timeout = max(0.0, self.heap[0][0] - time.time()) if self.heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                continue  # woken by an earlier reminder; recompute the deadline
+            except asyncio.TimeoutError:
+                pass
+            now = time.time()
+            while self.heap and self.heap[0][0] <= now:
+                _, reminder_id = heapq.heappop(self.heap)
+                reminder = self.reminders.pop(reminder_id, None)
+                if reminder is None:
+                    continue
+                self._append({"op": "done", "id": reminder_id})
+                self._fire(reminder)
+
+    def _fire(self, reminder: Dict):
+        log_event("Reminder fired", reminder["text"])
+        if self.on_fire:
+            try:
+                self.on_fire(reminder)
+            except Exception as e:
+                log_event("ReminderScheduler on_fire error", str(e))
+
+
+# ---------- natural-language parsing ----------
+
+_UNITS = {"second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600, "hr": 3600, "day": 86400, "week": 604800}
+
+
+def parse_reminder(user_input: str, now: Optional[datetime] = None) -> Tuple[str, Optional[float]]:
+    """
+    Extract (text, due_epoch) from e.g. "remind me to call mom in 10 minutes",
+    "set reminder at 5:30 pm to stretch" or "remind me tomorrow at 9 to pay rent".
+    due is None if no time expression was found.
+    """
+    now = now or datetime.now()
+    text = user_input.strip()
+    due = None
+
+    if match := re.search(r"\bin (\d+(?:\.\d+)?|an?|one) ?(second|sec|minute|min|hour|hr|day|week)s?\b", text, re.I):
+        amount = match.group(1).lower()
+        amount = 1.0 if amount in ("a", "an", "one") else float(amount)
+        due = now + timedelta(seconds=amount * _UNITS[match.group(2).lower()])
+        text = text[:match.start()] + text[match.end():]
+    else:
+        day_offset = 0
+        if match := re.search(r"\btomorrow\b", text, re.I):
+            day_offset = 1
+            text = text[:match.start()] + text[match.end():]
+        if match := re.search(r"\bat (\d{1,2})(?::(\d{2}))? ?(am|pm)?\b", text, re.I):
+            hour, minute = int(match.group(1)), int(match.group(2) or 0)
+            meridiem = (match.group(3) or "").lower()
+            if meridiem == "pm" and hour < 12:
+                hour += 12
+            elif meridiem == "am" and hour == 12:
+                hour = 0
+            if hour < 24 and minute < 60:
+                due = now.replace(hour=hour, minute=minute, second=0, microsecond=0) + timedelta(days=day_offset)
+                if due <= now:
+                    due += timedelta(days=1)
+                text = text[:match.start()] + text[match.end():]
+        elif day_offset:
+            due = now + timedelta(days=1)
+
+    text = re.sub(r"^\s*(please\s+)?(set (a )?reminder|remind me|schedule|reminder)\s*(to|for|about|that)?\s*", "", text, flags=re.I)
+    text = re.sub(r"\s+(to|for|about)\s*$", "", " ".join(text.split()), flags=re.I)
+    text = re.sub(r"^(to|for|about)\s+", "", text, flags=re.I)
+    return text or "reminder", due.timestamp() if due else None
+
+
+# ---------- tool handler ----------
+
+_scheduler: Optional[ReminderScheduler] = None
+
+
+def get_scheduler() -> ReminderScheduler:
+    global _scheduler
+    if _scheduler is None:
+        config = load_config()
+        _scheduler = ReminderScheduler(config.get("reminder_journal", "data/reminders.jsonl"))
+    return _scheduler
+
+
+async def add_task_to_schedule(user_input: str, session_state=None) -> str:
+    scheduler = get_scheduler()
+    scheduler.start()
+    text, due = parse_reminder(user_input)
+    if due is None:
+        return "When should I remind you? Try e.g. 'remind me to stretch in 20 minutes' or 'at 5:30 pm'."
+    scheduler.add(text, due)
+    when = datetime.fromtimestamp(due).strftime("%a %d %b, %I:%M %p")
+    return f"⏰ Reminder set for {when}: {text}"
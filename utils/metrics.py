@@ -0,0 +1,41 @@
+# utils/metrics.py
+
+from collections import defaultdict, deque
+from typing import Dict
+
+
+class Metrics:
+    """
+    Tiny in-process metrics registry: counters plus a rolling window of latency samples.
+    """
+
+    def __init__(self, window: int = 200):
+        self.counters = defaultdict(int)
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+
+    def incr(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def observe(self, name: str, seconds: float):
+        self.latencies[name].append(seconds)
+
+    def rate(self, numerator: str, denominator: str) -> float:
+        total = self.counters.get(denominator, 0)
+        return self.counters.get(numerator, 0) / total if total else 0.0
+
+    def latency_summary(self, name: str) -> Dict:
+        samples = sorted(self.latencies.get(name, ()))
+        if not samples:
+            return {"count": 0}
+        return {
+            "count": len(samples),
+            "avg_ms": 1000 * sum(samples) / len(samples),
+            "p50_ms": 1000 * samples[len(samples) // 2],
+            "p95_ms": 1000 * samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        }
+
+    def snapshot(self) -> Dict:
+        return {
+            "counters": dict(self.counters),
+            "latency": {name: self.latency_summary(name) for name in self.latencies},
+        }